@@ -0,0 +1,118 @@
+"""
+Бенчмарк: стоимость вызова get_item через транспорты без сети против
+aiohttp по localhost
+
+- handler - HandlerTransport, ответ заранее закодирован: накладные расходы
+  клиента вместе с транспортным путем _send_request;
+- asgi raw - ASGITransport и минимальное ASGI приложение;
+- asgi fastapi - ASGITransport и FastAPI приложение (если установлен);
+- aiohttp - обычная сессия и aiohttp сервер на 127.0.0.1.
+
+Запуск:
+    python -m benchmarks.asgi_transport [--iterations 5000]
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+
+from aiohttp import web
+
+from .common import DEMO_SPEC, generate_client, install_fake_transport, measure
+
+ITEM = {"id": 1, "name": "item", "price": 1.5, "tags": [{"label": "a"}]}
+
+
+async def raw_asgi_app(scope, receive, send):
+    """ASGI приложение без фреймворка: на любой запрос отвечает ITEM"""
+    await receive()
+    body = json.dumps(ITEM).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def fastapi_app():
+    """FastAPI приложение с маршрутом /items/{item_id} или None без fastapi"""
+    try:
+        from fastapi import FastAPI
+    except ImportError:
+        return None
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {**ITEM, "id": item_id}
+
+    return app
+
+
+async def start_server():
+    async def get_item(request):
+        return web.json_response({**ITEM, "id": int(request.match_info["item_id"])})
+
+    app = web.Application()
+    app.router.add_get("/items/{item_id}", get_item)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def run(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        package = generate_client(DEMO_SPEC, target_dir, "bench_asgi_client")
+        transport = __import__("bench_asgi_client.transport", fromlist=["ASGITransport"])
+        call = lambda: client.items.get_item(item_id_path=1)  # noqa: E731
+
+        client = package.ApiClient().initialize("http://testserver")
+        send_request = client._send_request
+        install_fake_transport(client, ITEM)
+        results = {"fake": await measure("fake _send_request (нижняя граница)", call, iterations)}
+        client._send_request = send_request
+
+        body = json.dumps(ITEM).encode()
+        response = transport.BufferedResponse(200, {"content-type": "application/json"}, body)
+        client.set_transport(transport.HandlerTransport(lambda request: response))
+        results["handler"] = await measure("HandlerTransport", call, iterations)
+
+        client.set_transport(transport.ASGITransport(raw_asgi_app))
+        results["asgi raw"] = await measure("ASGITransport (raw ASGI app)", call, iterations)
+
+        app = fastapi_app()
+        if app is not None:
+            client.set_transport(transport.ASGITransport(app))
+            results["asgi fastapi"] = await measure("ASGITransport (FastAPI)", call, iterations)
+
+        runner, url = await start_server()
+        try:
+            client.set_transport(None).initialize(url)
+            results["aiohttp"] = await measure("aiohttp localhost", call, iterations)
+            await client.close()
+        finally:
+            await runner.cleanup()
+
+        print("\naiohttp localhost / transport:")
+        for label, elapsed in results.items():
+            if label != "aiohttp":
+                print(f"  {label:<14} {results['aiohttp'] / elapsed:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Микро-бенчмарк: decorator режим против inline режима генерации
+
+Оба клиента генерируются из одной спецификации, транспорт подменяется
+заглушкой без сети - измеряются только накладные расходы сборки запроса
+и парсинга ответа.
+
+Запуск:
+    python -m benchmarks.codegen_modes [--iterations 20000]
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from .common import DEMO_SPEC, generate_client, install_fake_transport, measure
+
+
+async def run(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        modes = {
+            mode: generate_client(
+                DEMO_SPEC, target_dir, f"bench_{mode}_client", codegen_mode=mode
+            )
+            for mode in ("decorator", "inline")
+        }
+
+        results = {}
+        for mode, package in modes.items():
+            client = package.ApiClient().initialize("http://bench.local")
+            print(f"{mode}:")
+
+            install_fake_transport(client, None)
+            results[(mode, "transport")] = await measure(
+                "transport only (нижняя граница)",
+                lambda: client._send_request(method="get", path="/items/1"),
+                iterations,
+            )
+            results[(mode, "path")] = await measure(
+                "get_item (path)",
+                lambda: client.items.get_item(item_id_path=1),
+                iterations,
+            )
+            results[(mode, "query")] = await measure(
+                "list_items (query+header+cookie)",
+                lambda: client.items.list_items(
+                    limit_query=5, offset_query=10, X_Tenant="t", session="s"
+                ),
+                iterations,
+            )
+            results[(mode, "body")] = await measure(
+                "update_item (path+body)",
+                lambda: client.items.update_item(
+                    item_id_path=1, name_body="n", price_value_body=2.0
+                ),
+                iterations,
+            )
+
+        print("\ninline / decorator:")
+        for case in ("path", "query", "body"):
+            ratio = results[("inline", case)] / results[("decorator", case)]
+            print(f"  {case:<10} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Общие утилиты для бенчмарков сгенерированного клиента
+"""
+
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+import jsonref
+
+from openapi_client.generator import ApiClientGenerator
+
+
+# Небольшая спецификация с path/query/header/cookie/body параметрами
+DEMO_SPEC: Dict[str, Any] = {
+    "openapi": "3.1.0",
+    "info": {"title": "Bench", "version": "1.0.0"},
+    "paths": {
+        "/items": {
+            "get": {
+                "tags": ["items"],
+                "summary": "List items",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer", "default": 10}},
+                    {"name": "offset", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "X-Tenant", "in": "header", "schema": {"type": "string"}},
+                    {"name": "session", "in": "cookie", "schema": {"type": "string"}},
+                ],
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "array",
+                                    "items": {"$ref": "#/components/schemas/Item"},
+                                }
+                            }
+                        }
+                    }
+                },
+            },
+        },
+        "/items/{item_id}": {
+            "get": {
+                "tags": ["items"],
+                "summary": "Get item",
+                "parameters": [
+                    {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+                ],
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {"schema": {"$ref": "#/components/schemas/Item"}}
+                        }
+                    }
+                },
+            },
+            "patch": {
+                "tags": ["items"],
+                "summary": "Update item",
+                "parameters": [
+                    {"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+                ],
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "name": {"type": "string"},
+                                    "price-value": {"type": "number"},
+                                },
+                            }
+                        }
+                    }
+                },
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {"schema": {"$ref": "#/components/schemas/Item"}}
+                        }
+                    }
+                },
+            },
+        },
+    },
+    "components": {
+        "schemas": {
+            "Item": {
+                "type": "object",
+                "title": "Item",
+                "required": ["id", "name"],
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name": {"type": "string"},
+                    "price": {"type": "number"},
+                },
+            }
+        }
+    },
+}
+
+
+def generate_client(
+    spec: Dict[str, Any], target_dir: str, package_name: str, **generator_kwargs
+):
+    """Генерация клиента в target_dir/package_name и импорт пакета"""
+    resolved_spec = dict(jsonref.loads(json.dumps(spec)))
+    project = ApiClientGenerator(
+        resolved_spec,
+        original_spec=spec,
+        package_name=package_name,
+        **generator_kwargs,
+    ).generate()
+
+    package_dir = os.path.join(target_dir, package_name)
+    for code_file in project.files:
+        path = os.path.join(package_dir, code_file.file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(str(code_file))
+
+    if target_dir not in sys.path:
+        sys.path.insert(0, target_dir)
+    return importlib.import_module(package_name)
+
+
+class FakeResponse:
+    """Ответ без сети - повторяет интерфейс ответа из common._send_request"""
+
+    def __init__(self, payload: Any, content_type: str = "application/json"):
+        self.status_code = 200
+        self.headers = {"content-type": content_type}
+        self._content = json.dumps(payload).encode()
+
+    async def read(self):
+        return self._content
+
+    async def text(self):
+        return self._content.decode()
+
+    async def json(self):
+        return json.loads(self._content)
+
+    async def content(self):
+        return self._content
+
+
+def install_fake_transport(client, payload: Any) -> None:
+    """Подмена _send_request клиента, чтобы мерить только накладные расходы клиента"""
+
+    # Тело кодируется один раз - в замер попадает только работа клиента
+    response = FakeResponse(payload)
+
+    async def _send_request(*args, **kwargs):
+        return response
+
+    client._send_request = _send_request
+
+
+async def measure(label: str, call, iterations: int) -> float:
+    """Среднее время вызова в микросекундах"""
+    # Прогрев
+    for _ in range(min(iterations // 10, 1000)):
+        await call()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    elapsed = (time.perf_counter() - started) / iterations * 1e6
+
+    print(f"  {label:<40} {elapsed:8.2f} us/call")
+    return elapsed
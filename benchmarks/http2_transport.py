@@ -0,0 +1,188 @@
+"""
+Бенчмарк: HTTP/1.1 (aiohttp) против HTTP/2 транспорта (httpx) при
+параллельных запросах к одному хосту
+
+Оба клиента обращаются к локальным серверам, отвечающим с одинаковой
+задержкой: aiohttp HTTP/1.1 серверу и минимальному h2c серверу на пакете
+h2 (HTTP/2 без TLS, prior knowledge). Серверы работают в отдельном
+процессе, чтобы не делить CPU с клиентом. HTTP/1.1 ограничен одним
+запросом на соединение и max_connections_per_host, HTTP/2 мультиплексирует
+запросы в одном соединении.
+
+Запуск (нужен httpx[http2]):
+    python -m benchmarks.http2_transport [--requests 500] [--delay 0.02] [--per-host 10]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import tempfile
+import time
+from typing import Any, Dict
+
+from aiohttp import web
+
+from .common import DEMO_SPEC, generate_client
+
+
+class H2ServerProtocol(asyncio.Protocol):
+    """h2c сервер: на любой запрос отвечает JSON элементом через delay секунд"""
+
+    def __init__(self, delay: float, connections: Any):
+        import h2.config
+        import h2.connection
+
+        self._delay = delay
+        self._connections = connections
+        self._conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self._transport = None
+        self._paths: Dict[int, str] = {}
+
+    def connection_made(self, transport):
+        self._transport = transport
+        with self._connections.get_lock():
+            self._connections.value += 1
+        self._conn.initiate_connection()
+        self._transport.write(self._conn.data_to_send())
+
+    def data_received(self, data: bytes):
+        import h2.events
+        import h2.exceptions
+
+        try:
+            events = self._conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._transport.write(self._conn.data_to_send())
+            self._transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self._paths[event.stream_id] = dict(event.headers).get(":path", "/")
+            elif isinstance(event, h2.events.DataReceived):
+                self._conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded) and event.stream_id in self._paths:
+                asyncio.ensure_future(self._respond(event.stream_id))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self._transport.close()
+        self._transport.write(self._conn.data_to_send())
+
+    async def _respond(self, stream_id: int):
+        path = self._paths.pop(stream_id, "/")
+        await asyncio.sleep(self._delay)
+        if self._transport.is_closing():
+            return
+        item_id = path.split("?")[0].rstrip("/").rsplit("/", 1)[-1]
+        body = json.dumps({"id": int(item_id) if item_id.isdigit() else 0, "name": "item"}).encode()
+        self._conn.send_headers(
+            stream_id,
+            [(":status", "200"), ("content-type", "application/json"), ("content-length", str(len(body)))],
+        )
+        self._conn.send_data(stream_id, body, end_stream=True)
+        self._transport.write(self._conn.data_to_send())
+
+
+async def start_h2_server(delay: float, connections: Any, host: str = "127.0.0.1"):
+    """Запуск h2c сервера на свободном порту: (server, base_url)"""
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: H2ServerProtocol(delay, connections), host, 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://{host}:{port}"
+
+
+async def start_h1_server(delay: float, connections: Any, host: str = "127.0.0.1"):
+    """Запуск aiohttp HTTP/1.1 сервера с той же задержкой: (runner, base_url)"""
+    peers = set()
+
+    async def get_item(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        connections.value = len(peers)
+        await asyncio.sleep(delay)
+        return web.json_response({"id": int(request.match_info["item_id"]), "name": "item"})
+
+    app = web.Application()
+    app.router.add_get("/items/{item_id}", get_item)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+async def burst(client, requests: int) -> float:
+    """requests одновременных get_item; время всей пачки в секундах"""
+    started = time.perf_counter()
+    items = await asyncio.gather(*(client.items.get_item(item_id_path=i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    assert [item.id for item in items] == list(range(requests)), items[:3]
+    return elapsed
+
+
+def _serve(delay: float, h1_connections: Any, h2_connections: Any, urls: Any) -> None:
+    """Процесс серверов: оба сервера работают до завершения процесса"""
+
+    async def main():
+        _, h1_url = await start_h1_server(delay, h1_connections)
+        _, h2_url = await start_h2_server(delay, h2_connections)
+        urls.put((h1_url, h2_url))
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+async def run(requests: int, delay: float, per_host: int) -> None:
+    h1_connections = multiprocessing.Value("i", 0)
+    h2_connections = multiprocessing.Value("i", 0)
+    urls = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_serve, args=(delay, h1_connections, h2_connections, urls), daemon=True
+    )
+    server.start()
+    h1_url, h2_url = urls.get(timeout=30)
+
+    try:
+        with tempfile.TemporaryDirectory() as target_dir:
+            package = generate_client(DEMO_SPEC, target_dir, "bench_transport_client")
+            transport_module = __import__("bench_transport_client.transport", fromlist=["HttpxTransport"])
+
+            client = package.ApiClient().initialize(h1_url, max_connections_per_host=per_host)
+            await burst(client, per_host)  # прогрев пула
+            h1_time = await burst(client, requests)
+            await client.close()
+
+            # HTTP/2 без TLS: prior knowledge (http1=False)
+            client.initialize(h2_url, transport=transport_module.HttpxTransport(http1=False))
+            await burst(client, per_host)
+            h2_time = await burst(client, requests)
+            await client.close()
+            client.set_transport(None)
+    finally:
+        server.terminate()
+        server.join()
+
+    print(f"{requests} concurrent requests, server delay {delay * 1e3:.0f} ms:")
+    print(
+        f"  HTTP/1.1 aiohttp (per host {per_host:>3})  {h1_time * 1e3:8.1f} ms  "
+        f"{requests / h1_time:8.0f} req/s  connections: {h1_connections.value}"
+    )
+    print(
+        f"  HTTP/2 httpx                     {h2_time * 1e3:8.1f} ms  "
+        f"{requests / h2_time:8.0f} req/s  connections: {h2_connections.value}"
+    )
+    print(f"\nHTTP/2 / HTTP/1.1 time: {h2_time / h1_time:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--delay", type=float, default=0.02, help="Задержка ответа сервера, секунды")
+    parser.add_argument("--per-host", type=int, default=10, help="max_connections_per_host для HTTP/1.1")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.delay, args.per_host))
+
+
+if __name__ == "__main__":
+    main()
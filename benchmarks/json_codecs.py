@@ -0,0 +1,80 @@
+"""
+Бенчмарк JSON кодеков сгенерированного клиента на больших payload
+
+Сравниваются все доступные в окружении кодеки (orjson, msgspec, stdlib json):
+кодирование тела запроса и декодирование тела ответа из bytes.
+
+Запуск:
+    python -m benchmarks.json_codecs [--items 50000] [--iterations 5]
+"""
+
+import argparse
+import gc
+import tempfile
+import time
+
+from .common import DEMO_SPEC, generate_client
+
+
+def build_payload(items: int) -> list:
+    """Список вложенных объектов, похожий на типичный ответ list-эндпоинта"""
+    return [
+        {
+            "id": i,
+            "name": f"item-{i}",
+            "price": i * 1.25,
+            "active": i % 2 == 0,
+            "tags": ["a", "b", "c"],
+            "meta": {"created": "2024-01-01T00:00:00Z", "owner": {"id": i % 100}},
+        }
+        for i in range(items)
+    ]
+
+
+def timed(call, iterations: int) -> float:
+    """Лучшее время вызова в миллисекундах (GC отключен, как в timeit)"""
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            call()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best * 1e3
+
+
+def run(items: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        package = generate_client(DEMO_SPEC, target_dir, "bench_codecs_client")
+        codecs_module = package.json_codecs
+
+        payload = build_payload(items)
+        raw = codecs_module.get_json_codec("json").dumps(payload)
+        print(f"payload: {items} объектов, {len(raw) / 1024 / 1024:.1f} MiB")
+
+        results = {}
+        for name in codecs_module.available_json_codecs():
+            codec = codecs_module.get_json_codec(name)
+            dumps_ms = timed(lambda: codec.dumps(payload), iterations)
+            loads_ms = timed(lambda: codec.loads(raw), iterations)
+            results[name] = (dumps_ms, loads_ms)
+            print(f"  {name:<8} dumps {dumps_ms:8.1f} ms   loads {loads_ms:8.1f} ms")
+
+        base_dumps, base_loads = results["json"]
+        print("\nускорение относительно stdlib json:")
+        for name, (dumps_ms, loads_ms) in results.items():
+            print(f"  {name:<8} dumps {base_dumps / dumps_ms:5.1f}x   loads {base_loads / loads_ms:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    run(args.items, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Бенчмарк: накладные расходы метрик клиента (client.metrics) на вызов
+
+get_item замеряется с выключенными и включенными метриками на двух
+транспортах: HandlerTransport без сети (худший случай - вызов дешевый,
+доля метрик максимальна) и aiohttp к локальному серверу.
+
+Запуск:
+    python -m benchmarks.metrics_overhead [--iterations 5000]
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+
+from .asgi_transport import ITEM, start_server
+from .common import DEMO_SPEC, generate_client, measure
+
+
+async def compare(client, label: str, iterations: int) -> None:
+    call = lambda: client.items.get_item(item_id_path=1)  # noqa: E731
+    client.set_metrics(None)
+    off = await measure(f"{label}, metrics off", call, iterations)
+    client.set_metrics(True)
+    on = await measure(f"{label}, metrics on", call, iterations)
+    print(f"  {'overhead':<40} {on - off:8.2f} us/call ({(on / off - 1) * 100:+.1f}%)\n")
+
+
+async def run(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        package = generate_client(DEMO_SPEC, target_dir, "bench_metrics_client")
+        transport = __import__("bench_metrics_client.transport", fromlist=["HandlerTransport"])
+
+        client = package.ApiClient().initialize("http://bench.local")
+        response = transport.BufferedResponse(200, {"content-type": "application/json"}, json.dumps(ITEM).encode())
+        client.set_transport(transport.HandlerTransport(lambda request: response))
+        await compare(client, "HandlerTransport", iterations)
+
+        runner, url = await start_server()
+        try:
+            client.set_transport(None).initialize(url)
+            await compare(client, "aiohttp localhost", iterations)
+            await client.close()
+        finally:
+            await runner.cleanup()
+        print(json.dumps(client.metrics.snapshot()["GET /items/{item_id}"]["latency"], indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк: первая волна конкурентных вызовов на холодном и прогретом пуле
+
+Между клиентом и локальным сервером стоит TCP прокси, задерживающий каждое
+новое соединение на --connect-delay мс (имитация TCP/TLS handshake до
+удаленного API). Холодный пул платит эту задержку в первой волне, прогретый
+(client.warmup()) - заранее. В конце печатается pool_stats() после волны,
+превышающей max_connections_per_host, - ожидание соединения в перцентилях.
+
+Запуск:
+    python -m benchmarks.pool_warmup [--connections 10] [--connect-delay 50]
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from .asgi_transport import start_server
+from .common import DEMO_SPEC, generate_client
+
+
+async def start_delay_proxy(target_port: int, delay: float):
+    """TCP прокси на 127.0.0.1: новое соединение начинает работать через delay секунд"""
+
+    async def pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        await asyncio.sleep(delay)
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", target_port)
+        await asyncio.gather(pipe(client_reader, server_writer), pipe(server_reader, client_writer))
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def first_wave(client, connections: int) -> float:
+    """Время (мс) волны из connections одновременных вызовов"""
+    started = time.perf_counter()
+    await asyncio.gather(*(client.items.get_item(item_id_path=i) for i in range(connections)))
+    return (time.perf_counter() - started) * 1e3
+
+
+async def run(connections: int, connect_delay: float) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        package = generate_client(DEMO_SPEC, target_dir, "bench_pool_client")
+        runner, url = await start_server()
+        proxy, proxy_url = await start_delay_proxy(int(url.rsplit(":", 1)[1]), connect_delay / 1e3)
+        client = package.ApiClient()
+        try:
+            client.initialize(proxy_url, max_connections_per_host=connections)
+            cold = await first_wave(client, connections)
+            print(f"  {'cold pool, first wave':<40} {cold:8.2f} ms")
+
+            client.initialize(proxy_url, max_connections_per_host=connections)
+            started = time.perf_counter()
+            sent = await client.warmup()
+            warmup = (time.perf_counter() - started) * 1e3
+            warm = await first_wave(client, connections)
+            print(f"  {f'warmup() -> {sent} requests':<40} {warmup:8.2f} ms")
+            print(f"  {'warmed pool, first wave':<40} {warm:8.2f} ms\n")
+
+            # Волна вдвое больше лимита: половина вызовов ждет соединение
+            await first_wave(client, connections * 2)
+            print(json.dumps(client.pool_stats(), indent=2))
+            await client.close()
+        finally:
+            proxy.close()
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10)
+    parser.add_argument("--connect-delay", type=float, default=50.0, help="задержка нового соединения, мс")
+    args = parser.parse_args()
+    asyncio.run(run(args.connections, args.connect_delay))
+
+
+if __name__ == "__main__":
+    main()
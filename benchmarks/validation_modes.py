@@ -0,0 +1,162 @@
+"""
+Бенчмарк режимов построения моделей ответа: full, construct и lazy
+
+Ответ - список заказов с глубокой вложенностью (заказ -> клиент -> адрес,
+строки -> товар -> размеры/склады). Транспорт подменяется заглушкой без сети.
+Для lazy режима дополнительно меряется чтение пары полей из каждого заказа.
+
+Запуск:
+    python -m benchmarks.validation_modes [--orders 200] [--iterations 20]
+"""
+
+import argparse
+import asyncio
+import tempfile
+
+from .common import generate_client, install_fake_transport, measure
+
+
+def _ref(name: str) -> dict:
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+def _object(title: str, properties: dict, required: list) -> dict:
+    return {"type": "object", "title": title, "properties": properties, "required": required}
+
+
+NESTED_SPEC = {
+    "openapi": "3.1.0",
+    "info": {"title": "Bench", "version": "1.0.0"},
+    "paths": {
+        "/orders": {
+            "get": {
+                "tags": ["orders"],
+                "summary": "List orders",
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"type": "array", "items": _ref("Order")}
+                            }
+                        }
+                    }
+                },
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "Address": _object(
+                "Address",
+                {"city": {"type": "string"}, "street": {"type": "string"}, "zip": {"type": "string"}},
+                ["city", "street"],
+            ),
+            "Customer": _object(
+                "Customer",
+                {"id": {"type": "integer"}, "name": {"type": "string"}, "address": _ref("Address")},
+                ["id", "name", "address"],
+            ),
+            "Dimensions": _object(
+                "Dimensions",
+                {"width": {"type": "number"}, "height": {"type": "number"}, "depth": {"type": "number"}},
+                ["width", "height", "depth"],
+            ),
+            "Stock": _object(
+                "Stock",
+                {"warehouse": {"type": "string"}, "quantity": {"type": "integer"}, "address": _ref("Address")},
+                ["warehouse", "quantity"],
+            ),
+            "Product": _object(
+                "Product",
+                {
+                    "sku": {"type": "string"},
+                    "title": {"type": "string"},
+                    "dimensions": _ref("Dimensions"),
+                    "stocks": {"type": "array", "items": _ref("Stock")},
+                },
+                ["sku", "title", "dimensions", "stocks"],
+            ),
+            "OrderLine": _object(
+                "OrderLine",
+                {"product": _ref("Product"), "quantity": {"type": "integer"}, "price": {"type": "number"}},
+                ["product", "quantity", "price"],
+            ),
+            "Order": _object(
+                "Order",
+                {
+                    "id": {"type": "integer"},
+                    "status": {"type": "string"},
+                    "customer": _ref("Customer"),
+                    "lines": {"type": "array", "items": _ref("OrderLine")},
+                },
+                ["id", "status", "customer", "lines"],
+            ),
+        }
+    },
+}
+
+
+def build_payload(orders: int) -> list:
+    address = {"city": "Moscow", "street": "Tverskaya 1", "zip": "125009"}
+    return [
+        {
+            "id": order_id,
+            "status": "paid",
+            "customer": {"id": order_id % 50, "name": f"customer-{order_id}", "address": address},
+            "lines": [
+                {
+                    "product": {
+                        "sku": f"sku-{order_id}-{line}",
+                        "title": "Product",
+                        "dimensions": {"width": 1.5, "height": 2.0, "depth": 0.5},
+                        "stocks": [
+                            {"warehouse": f"wh-{stock}", "quantity": stock * 10, "address": address}
+                            for stock in range(3)
+                        ],
+                    },
+                    "quantity": line + 1,
+                    "price": 9.99,
+                }
+                for line in range(5)
+            ],
+        }
+        for order_id in range(orders)
+    ]
+
+
+async def run(orders: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as target_dir:
+        package = generate_client(NESTED_SPEC, target_dir, "bench_validation_client")
+        client = package.ApiClient().initialize("http://bench.local")
+        install_fake_transport(client, build_payload(orders))
+        print(f"{orders} заказов, по 5 строк и 3 склада на товар:")
+
+        results = {}
+        for mode in ("full", "construct", "lazy"):
+            results[mode] = await measure(
+                f"{mode}",
+                lambda: client.orders.list_orders(validation=mode),
+                iterations,
+            )
+
+        async def lazy_touch():
+            for order in await client.orders.list_orders(validation="lazy"):
+                order.id, order.customer.name
+
+        results["lazy+touch"] = await measure("lazy + чтение id и customer.name", lazy_touch, iterations)
+
+        print("\nускорение относительно full:")
+        for mode in ("construct", "lazy", "lazy+touch"):
+            print(f"  {mode:<12} {results['full'] / results[mode]:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
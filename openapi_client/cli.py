@@ -208,6 +208,8 @@ def _generate_client_core(config: OpenApiConfig) -> Project:
         source_url=config.url,
         original_spec=original_spec,
         package_name=config.dirname,
+        codegen_mode=config.codegen_mode or "decorator",
+        sync=config.sync,
     )
     return generator.generate()
 
@@ -248,7 +250,12 @@ def _generate_client_in_existing(config: OpenApiConfig, existing_package_dir: st
     try:
         # Используем basename директории как имя пакета
         package_name = os.path.basename(existing_package_dir.rstrip("/"))
-        config_with_dirname = OpenApiConfig(url=config.url, dirname=package_name)
+        config_with_dirname = OpenApiConfig(
+            url=config.url,
+            dirname=package_name,
+            codegen_mode=config.codegen_mode,
+            sync=config.sync,
+        )
         project = _generate_client_core(config_with_dirname)
         _save_project_files(project, existing_package_dir)
 
@@ -283,6 +290,16 @@ def generate():
     parser.add_argument(
         "--force", action="store_true", help="Генерировать без подтверждения"
     )
+    parser.add_argument(
+        "--codegen-mode",
+        choices=["decorator", "inline"],
+        help="Режим генерации endpoint методов: decorator (по умолчанию) или inline",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Дополнительно сгенерировать синхронный клиент (подпакет sync/ на httpx.Client)",
+    )
 
     args = parser.parse_args()
 
@@ -296,6 +313,8 @@ def generate():
         config = OpenApiConfig(
             url=args.url,
             dirname=args.dirname or "api_client",
+            codegen_mode=args.codegen_mode,
+            sync=args.sync,
         )
         config.save_to_file()
         print("✅ Создан конфиг файл openapi.toml")
@@ -329,12 +348,23 @@ def generate():
         final_config = file_config
     elif args.url:
         # Только аргументы
-        final_config = OpenApiConfig(url=args.url, dirname=args.dirname or "api_client")
+        final_config = OpenApiConfig(
+            url=args.url,
+            dirname=args.dirname or "api_client",
+            codegen_mode=args.codegen_mode,
+            sync=args.sync,
+        )
     else:
         # Нет ни конфига ни URL
         print("❌ Ошибка: Укажите URL или создайте конфиг с --init-config")
         sys.exit(1)
 
+    # Явно переданный режим генерации важнее сохраненного в конфиге
+    if args.codegen_mode:
+        final_config.codegen_mode = args.codegen_mode
+    if args.sync:
+        final_config.sync = True
+
     # Проверка обязательных параметров
     if not final_config.url:
         print("❌ Ошибка: URL не указан ни в конфиге, ни в аргументах")
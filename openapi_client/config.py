@@ -14,6 +14,8 @@ class OpenApiConfig:
 
     url: Optional[str] = None
     dirname: Optional[str] = None
+    codegen_mode: Optional[str] = None
+    sync: bool = False
 
     @classmethod
     def from_file(
@@ -34,6 +36,8 @@ class OpenApiConfig:
             return cls(
                 url=config_data.get("url"),
                 dirname=config_data.get("dirname", "api_client"),
+                codegen_mode=config_data.get("codegen_mode"),
+                sync=bool(config_data.get("sync", False)),
             )
         except Exception:
             return None
@@ -43,6 +47,8 @@ class OpenApiConfig:
         config_data = {
             "url": self.url,
             "dirname": self.dirname,
+            "codegen_mode": self.codegen_mode,
+            "sync": self.sync,
         }
 
         with open(config_path, "w") as f:
@@ -53,4 +59,6 @@ class OpenApiConfig:
         return OpenApiConfig(
             url=args.url or self.url,
             dirname=args.dirname or self.dirname,
+            codegen_mode=args.codegen_mode or self.codegen_mode,
+            sync=args.sync or self.sync,
         )
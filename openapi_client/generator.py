@@ -17,8 +17,12 @@ class ApiClientGenerator:
         source_url: str = None,
         original_spec: Dict[str, Any] = None,
         package_name: str = None,
+        codegen_mode: str = "decorator",
+        sync: bool = False,
     ):
-        self.parser = OpenApiParser(openapi_spec, source_url, original_spec, package_name)
+        self.parser = OpenApiParser(
+            openapi_spec, source_url, original_spec, package_name, codegen_mode, sync
+        )
 
     def generate(self) -> Project:
         """Генерация проекта клиента"""
@@ -12,6 +12,7 @@ from ..types.models import (
     Variable,
 )
 from ..types.schema_resolver import SchemaNameResolver
+from ..utils.field_utils import extract_field_name_from_param
 from .templates import templates
 
 # from .http_client import aiohttp_common - moved to templates
@@ -20,20 +21,49 @@ from .templates import templates
 class ClientGenerator:
     """Генератор API клиента из OpenAPI"""
 
+    # decorator - generic декоратор поверх плана запроса,
+    # inline - тело каждого метода собирает запрос напрямую из аргументов
+    CODEGEN_MODES = ("decorator", "inline")
+
+    # Content-type ответов, для которых генерируется потоковый *_stream вариант
+    BINARY_CONTENT_TYPES = ("application/octet-stream", "application/zip")
+    NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+    # Имена query параметров и полей ответа, по которым распознается пагинация
+    PAGINATION_OFFSET_PARAMS = ("offset", "skip", "start")
+    PAGINATION_LIMIT_PARAMS = ("limit", "take", "count")
+    PAGINATION_PAGE_PARAMS = ("page", "page_number", "pageNumber")
+    PAGINATION_SIZE_PARAMS = ("per_page", "perPage", "page_size", "pageSize", "size", "limit")
+    PAGINATION_CURSOR_PARAMS = ("cursor", "after", "page_token", "pageToken", "next_token", "continuation_token")
+    PAGINATION_NEXT_FIELDS = ("next_cursor", "nextCursor", "next_page_token", "nextPageToken", "next_token", "cursor")
+    PAGINATION_ITEMS_FIELDS = ("items", "data", "results", "records", "entries")
+
     def __init__(
         self,
         openapi_dict: Dict[str, Any],
         source_url: str = None,
         original_spec: Dict[str, Any] = None,
         package_name: str = None,
+        codegen_mode: str = "decorator",
+        sync: bool = False,
     ):
+        if codegen_mode not in self.CODEGEN_MODES:
+            raise ValueError(
+                f"Неизвестный режим генерации: {codegen_mode} "
+                f"(доступны: {', '.join(self.CODEGEN_MODES)})"
+            )
+
         self.openapi_dict = openapi_dict
         self.original_spec = original_spec or openapi_dict
         self.source_url = source_url
         self.package_name = package_name or self._extract_package_name()
+        self.codegen_mode = codegen_mode
+        # Дополнительный блокирующий клиент в подпакете sync/
+        self.sync = sync
         self.project = Project(name="api")
         self.schema_resolver = SchemaNameResolver()
         self.zones = {}  # zone_name -> {endpoints_file, endpoints_class}
+        # zone_name -> имена методов операций (для имен *_stream / iter_* без совпадений)
+        self.operation_names: Dict[str, Set[str]] = defaultdict(set)
         self.used_schemas = set()  # Только используемые схемы
         self.schema_file_names = {}  # schema_name -> file_name mapping
 
@@ -188,6 +218,12 @@ class ClientGenerator:
             package_name=self.package_name,
             version=info.get("version", "0.1.0"),
             description=info.get("description", f"API client for {self.package_name}"),
+            extra_dependencies='\n    "httpx>=0.24.0",' if self.sync else "",
+            extra_packages=(
+                f', "{self.package_name}.sync", "{self.package_name}.sync.endpoints"'
+                if self.sync
+                else ""
+            ),
         )
         self.project.add_file("pyproject.toml").add_code_block(
             CodeBlock(code=pyproject_content)
@@ -197,6 +233,48 @@ class ClientGenerator:
         self.project.add_file("common.py").add_code_block(
             CodeBlock(code=templates.aiohttp_common)
         )
+        self.project.add_file("json_codecs.py").add_code_block(
+            CodeBlock(code=templates.json_codecs)
+        )
+        self.project.add_file("validation.py").add_code_block(
+            CodeBlock(code=templates.validation)
+        )
+        self.project.add_file("retry.py").add_code_block(
+            CodeBlock(code=templates.retry)
+        )
+        self.project.add_file("rate_limit.py").add_code_block(
+            CodeBlock(code=templates.rate_limit)
+        )
+        self.project.add_file("circuit_breaker.py").add_code_block(
+            CodeBlock(code=templates.circuit_breaker)
+        )
+        self.project.add_file("transport.py").add_code_block(
+            CodeBlock(code=templates.transport)
+        )
+        self.project.add_file("metrics.py").add_code_block(
+            CodeBlock(code=templates.metrics)
+        )
+        self.project.add_file("timings.py").add_code_block(
+            CodeBlock(code=templates.timings)
+        )
+        self.project.add_file("tracing.py").add_code_block(
+            CodeBlock(code=templates.tracing)
+        )
+        self.project.add_file("single_flight.py").add_code_block(
+            CodeBlock(code=templates.single_flight)
+        )
+        self.project.add_file("cache.py").add_code_block(
+            CodeBlock(code=templates.cache)
+        )
+        self.project.add_file("disk_cache.py").add_code_block(
+            CodeBlock(code=templates.disk_cache)
+        )
+        self.project.add_file("batch.py").add_code_block(
+            CodeBlock(code=templates.batch)
+        )
+        self.project.add_file("pagination.py").add_code_block(
+            CodeBlock(code=templates.pagination)
+        )
         self.project.add_file("client.py").add_code_block(
             CodeBlock(code=templates.client)
         )
@@ -215,6 +293,21 @@ class ClientGenerator:
             CodeBlock(code="# Auto-generated endpoints")
         )
 
+        if self.sync:
+            # Синхронный клиент переиспользует модели, планы запросов и политики async клиента
+            self.project.add_file("sync/common.py").add_code_block(
+                CodeBlock(code=templates.sync_common)
+            )
+            self.project.add_file("sync/utils.py").add_code_block(
+                CodeBlock(code=templates.sync_utils)
+            )
+            self.project.add_file("sync/decorators.py").add_code_block(
+                CodeBlock(code=templates.sync_decorators)
+            )
+            self.project.add_file("sync/endpoints/__init__.py").add_code_block(
+                CodeBlock(code="# Auto-generated sync endpoints")
+            )
+
         # Конфиг файл в папке клиента
         if self.source_url:
             config_content = (
@@ -337,6 +430,15 @@ class ClientGenerator:
 
     def _generate_endpoints(self):
         """Генерация endpoints по тегам"""
+        # Имена операций заранее: сгенерированные методы не должны занимать имя
+        # операции, которая встретится в спецификации позже
+        for path, path_spec in self.openapi_dict.get("paths", {}).items():
+            for method, method_spec in path_spec.items():
+                zone = self._get_endpoint_zone(method_spec)
+                self.operation_names[zone.lower()].add(
+                    self._generate_function_name(path, method, method_spec)
+                )
+
         for path, path_spec in self.openapi_dict.get("paths", {}).items():
             for method, method_spec in path_spec.items():
                 zone = self._get_endpoint_zone(method_spec)
@@ -410,6 +512,10 @@ class ClientGenerator:
             else:
                 return_type = clean_model_type
 
+        # NDJSON отдает последовательность значений - метод возвращает список
+        if self._is_ndjson_response(spec.get("responses", {})) and not return_type.startswith("List["):
+            return_type = f"List[{return_type}]"
+
         # Если есть response_models_list, но return_type не Union,
         # значит _get_return_type вернул только один тип из Union'а
         # В этом случае нужно использовать полный Union тип
@@ -419,27 +525,121 @@ class ClientGenerator:
             if full_return_type.startswith("Union[") or "Literal[" in full_return_type:
                 return_type = full_return_type
 
-        # Создаем декоратор
-        decorator_args = [f"'{path}'"]
+        # Аргументы парсинга ответа - общие для декоратора и inline режима
+        response_args = []
 
         if response_models_list:
             # Для Union типов передаем список моделей
             models_str = "[" + ", ".join(response_models_list) + "]"
-            decorator_args.append(f"response_models={models_str}")
+            response_args.append(f"response_models={models_str}")
+            # И дискриминатор, чтобы runtime валидировал ответ одним tagged union
+            response_args.extend(
+                self._get_response_discriminator_args(
+                    spec.get("responses", {}), response_models_list
+                )
+            )
         elif (
             clean_model_type != "Any"
             and clean_model_type not in ["dict", "list"]
             and not clean_model_type.startswith("Dict[")
         ):
             # Для обычных типов используем response_model, но не для generic типов (dict, list, Dict[])
-            decorator_args.append(f"response_model={clean_model_type}")
+            response_args.append(f"response_model={clean_model_type}")
+
+        # Режим построения модели ответа на один вызов (full / construct / lazy);
+        # имя, занятое параметром спецификации, получает суффикс
+        validation_arg = None
+        if response_args:
+            validation_arg = self._unique_name("validation", {param.name for param in parameters})
+            parameters.append(
+                Parameter(
+                    name=validation_arg,
+                    var_type=Variable(value="Optional[str]"),
+                    default=Variable(value="None"),
+                )
+            )
+
+        # Потоковый вариант для бинарных ответов и списков: *_stream метод с теми же параметрами
+        stream_name = None
+        responses = spec.get("responses", {})
+        if (
+            self._is_binary_response(responses)
+            or self._is_array_response(responses)
+            or self._is_ndjson_response(responses)
+        ):
+            stream_name = self._unique_name(f"{func_name}_stream", self._zone_method_names(zone))
+            imports = self.zones[zone.lower()]["endpoints_file"].imports
+            if "from ..common import AiohttpClient" in imports:
+                imports[imports.index("from ..common import AiohttpClient")] = (
+                    "from ..common import AiohttpClient, StreamingContext"
+                )
+
+        pagination = self._detect_pagination(method, spec, param_mapping)
+
+        if self.codegen_mode == "inline":
+            # Тело метода само собирает запрос - без декоратора и locals()
+            param_names = [param.name for param in parameters if param.name != "self"]
+            func = zone_class.add_function(
+                func_name,
+                parameters=parameters,
+                async_def=True,
+                response=return_type,
+                description=spec.get("description", ""),
+                decorators=["@endpoint_method"],
+                http_method=method,
+                http_path=path,
+            )
+            func.code = CodeBlock(
+                code=self._generate_inline_body(
+                    method,
+                    path,
+                    param_names,
+                    response_args,
+                    whole_body_fields,
+                    field_mapping,
+                    param_mapping,
+                    body_required,
+                    validation_arg=validation_arg,
+                    endpoint=f"{zone_class.name}.{func_name}",
+                )
+            )
+            if stream_name:
+                stream_func = zone_class.add_function(
+                    stream_name,
+                    parameters=parameters,
+                    response="StreamingContext",
+                    description=spec.get("description", ""),
+                    http_method=method,
+                    http_path=path,
+                )
+                stream_func.code = CodeBlock(
+                    code=self._generate_inline_body(
+                        method,
+                        path,
+                        param_names,
+                        response_args,
+                        whole_body_fields,
+                        field_mapping,
+                        param_mapping,
+                        body_required,
+                        validation_arg=validation_arg,
+                        stream=True,
+                        endpoint=f"{zone_class.name}.{stream_name}",
+                    )
+                )
+            if pagination:
+                self._add_pagination_method(zone, func_name, parameters, pagination, spec, method, path)
+            return
+
+        # Аргументы плана запроса - общие для обычного и потокового декоратора
+        plan_args = []
 
         if whole_body_fields:
             # Добавляем whole_body_fields если есть
             fields_str = (
                 "[" + ", ".join(f"'{field}'" for field in whole_body_fields) + "]"
             )
-            decorator_args.append(f"whole_body_fields={fields_str}")
+            plan_args.append(f"whole_body_fields={fields_str}")
 
         if field_mapping:
             # Добавляем field_mapping если есть
@@ -447,7 +647,7 @@ class ClientGenerator:
             for param_name, original_name in field_mapping.items():
                 mapping_items.append(f"'{param_name}': '{original_name}'")
             mapping_str = "{" + ", ".join(mapping_items) + "}"
-            decorator_args.append(f"field_mapping={mapping_str}")
+            plan_args.append(f"field_mapping={mapping_str}")
 
         if param_mapping:
             # Добавляем param_mapping если есть
@@ -457,12 +657,17 @@ class ClientGenerator:
                     f"'{param_name}': {{'name': '{param_info['name']}', 'type': '{param_info['type']}'}}"
                 )
             mapping_str = "{" + ", ".join(mapping_items) + "}"
-            decorator_args.append(f"param_mapping={mapping_str}")
+            plan_args.append(f"param_mapping={mapping_str}")
 
         if body_required:
             # Добавляем body_required если body обязательный
-            decorator_args.append("body_required=True")
+            plan_args.append("body_required=True")
+
+        if validation_arg and validation_arg != "validation":
+            plan_args.append(f"validation_arg={validation_arg!r}")
 
+        # Создаем декоратор
+        decorator_args = [f"'{path}'"] + response_args + plan_args
         decorator = f"@_{method}({', '.join(decorator_args)})"
 
         # Создаем функцию с декоратором
@@ -480,6 +685,368 @@ class ClientGenerator:
         # Декораторы делают всю работу - пустое тело
         func.code = CodeBlock(code="pass")
 
+        if stream_name:
+            stream_args = [f"'{path}'"] + response_args + plan_args + ["stream=True"]
+            stream_decorator = f"@_{method}({', '.join(stream_args)})"
+            stream_func = zone_class.add_function(
+                stream_name,
+                parameters=parameters,
+                response="StreamingContext",
+                description=spec.get("description", ""),
+                decorators=[stream_decorator],
+                http_method=method,
+                http_path=path,
+            )
+            stream_func.code = CodeBlock(code="pass")
+
+        if pagination:
+            self._add_pagination_method(zone, func_name, parameters, pagination, spec, method, path)
+
+    def _detect_pagination(self, method: str, spec: Dict, param_mapping: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Конфигурация пагинации endpoint'а (для PageIterator) или None
+
+        Явная конфигурация берется из расширения x-pagination (false отключает),
+        иначе стиль GET endpoint'а распознается по query параметрам и схеме ответа.
+        Имена параметров в x-pagination - как в спецификации.
+        """
+        override = spec.get("x-pagination")
+        if override is False or self._is_binary_response(spec.get("responses", {})):
+            return None
+
+        # Оригинальное имя query параметра -> имя аргумента метода
+        query = {
+            info["name"]: name for name, info in param_mapping.items() if info["type"] == "query"
+        }
+        schema = self._success_json_schema(spec.get("responses", {}))
+
+        def first(names):
+            return next((query[name] for name in names if name in query), None)
+
+        if isinstance(override, dict):
+            config = {"style": override.get("style")}
+            for key in ("limit", "offset", "page", "size", "cursor"):
+                if key in override:
+                    if override[key] not in query:
+                        return None
+                    config[key] = query[override[key]]
+            for key in ("items", "next", "total", "start"):
+                if key in override:
+                    config[key] = override[key]
+            if "items" not in config:
+                items = self._pagination_items_field(schema)
+                if items is False:
+                    return None
+                config["items"] = items
+            return config if config["style"] in ("offset", "page", "cursor") else None
+
+        if method != "get":
+            return None
+        items = self._pagination_items_field(schema)
+        if items is False:
+            return None
+        offset = first(self.PAGINATION_OFFSET_PARAMS)
+        limit = first(self.PAGINATION_LIMIT_PARAMS)
+        page = first(self.PAGINATION_PAGE_PARAMS)
+        size = first(self.PAGINATION_SIZE_PARAMS)
+        cursor = first(self.PAGINATION_CURSOR_PARAMS)
+        if offset and limit:
+            return {"style": "offset", "limit": limit, "offset": offset, "items": items}
+        if page:
+            config = {"style": "page", "page": page, "items": items}
+            if size:
+                config["size"] = size
+            return config
+        if cursor and schema.get("type") == "object":
+            properties = schema.get("properties", {})
+            next_field = next((name for name in self.PAGINATION_NEXT_FIELDS if name in properties), None)
+            if next_field and items:
+                return {"style": "cursor", "cursor": cursor, "next": next_field, "items": items}
+        return None
+
+    def _success_json_schema(self, responses: Dict) -> Dict:
+        """Схема JSON ответа 2xx (с раскрытой ссылкой на components)"""
+        for status_code, response_spec in responses.items():
+            if status_code.startswith("2"):
+                for content_type, content_spec in response_spec.get("content", {}).items():
+                    if "json" in content_type and content_type.lower() not in self.NDJSON_CONTENT_TYPES:
+                        return self._deref_schema(content_spec.get("schema", {}) or {})
+        return {}
+
+    def _deref_schema(self, schema: Dict) -> Dict:
+        ref = schema.get("$ref")
+        if ref and ref.startswith("#/components/schemas/"):
+            schemas = self.openapi_dict.get("components", {}).get("schemas", {})
+            return schemas.get(ref.split("/")[-1], {})
+        return schema
+
+    def _pagination_items_field(self, schema: Dict):
+        """Поле со списком элементов: None - ответ сам список, False - не найдено"""
+        if schema.get("type") == "array":
+            return None
+        properties = schema.get("properties", {})
+        arrays = [
+            name for name, prop in properties.items()
+            if self._deref_schema(prop or {}).get("type") == "array"
+        ]
+        for name in self.PAGINATION_ITEMS_FIELDS:
+            if name in arrays:
+                return name
+        return arrays[0] if len(arrays) == 1 else False
+
+    def _pagination_item_type(self, spec: Dict, items: Optional[str]) -> str:
+        """Тип элемента для аннотации AsyncIterator[...]"""
+        schema = self._success_json_schema(spec.get("responses", {}))
+        array = schema if items is None else self._deref_schema(schema.get("properties", {}).get(items, {}))
+        item = array.get("items") or {}
+        ref = item.get("$ref", "")
+        if ref.startswith("#/components/schemas/"):
+            return self._get_clean_schema_name(ref.split("/")[-1])
+        if item.get("type") == "object" and "title" in item:
+            # Развернутая схема после jsonref
+            return self._get_clean_schema_name(self._find_schema_by_title(item["title"]))
+        return "Any"
+
+    def _add_pagination_method(
+        self,
+        zone: str,
+        func_name: str,
+        parameters: List[Parameter],
+        pagination: Dict[str, Any],
+        spec: Dict,
+        method: str,
+        path: str,
+    ):
+        """iter_<метод>: элементы всех страниц через PageIterator с предзагрузкой"""
+        zone_info = self.zones[zone.lower()]
+        zone_class = zone_info["endpoints_class"]
+        imports = zone_info["endpoints_file"].imports
+        typing_import = "from typing import Optional, List, Any, Union, Literal, Dict"
+        if typing_import in imports:
+            imports[imports.index(typing_import)] = typing_import + ", AsyncIterator"
+        if self.codegen_mode == "inline" and "from ..pagination import PageIterator" not in imports:
+            imports.append("from ..pagination import PageIterator")
+
+        prefetch_arg = self._unique_name("prefetch", {param.name for param in parameters})
+        iter_parameters = list(parameters) + [
+            Parameter(name=prefetch_arg, var_type=Variable(value="int"), default=Variable(value="1"))
+        ]
+        item_type = self._pagination_item_type(spec, pagination.get("items"))
+        config = repr(pagination)
+        iter_name = self._unique_name(f"iter_{func_name}", self._zone_method_names(zone))
+
+        if self.codegen_mode == "inline":
+            arguments = ", ".join(
+                f"{param.name!r}: {param.name}" for param in parameters if param.name != "self"
+            )
+            iter_func = zone_class.add_function(
+                iter_name,
+                parameters=iter_parameters,
+                response=f"AsyncIterator[{item_type}]",
+                description=spec.get("description", ""),
+                http_method=method,
+                http_path=path,
+            )
+            iter_func.code = CodeBlock(
+                code=f"return PageIterator(self.{func_name}, {{{arguments}}}, {config}, prefetch={prefetch_arg})"
+            )
+            return
+
+        iter_func = zone_class.add_function(
+            iter_name,
+            parameters=iter_parameters,
+            response=f"AsyncIterator[{item_type}]",
+            description=spec.get("description", ""),
+            decorators=[
+                f"@_paginated({func_name!r}, {config})"
+                if prefetch_arg == "prefetch"
+                else f"@_paginated({func_name!r}, {config}, prefetch_arg={prefetch_arg!r})"
+            ],
+            http_method=method,
+            http_path=path,
+        )
+        iter_func.code = CodeBlock(code="pass")
+
+    def _generate_inline_body(
+        self,
+        method: str,
+        path: str,
+        param_names: List[str],
+        response_args: List[str],
+        whole_body_fields: List[str],
+        field_mapping: Dict[str, str],
+        param_mapping: Dict[str, Dict[str, str]],
+        body_required: bool,
+        validation_arg: Optional[str] = None,
+        stream: bool = False,
+        endpoint: Optional[str] = None,
+    ) -> str:
+        """Генерация тела endpoint метода для inline режима
+
+        Повторяет классификацию RequestPlan из шаблона utils, но на этапе генерации:
+        в рантайме остаются только развернутые NOTSET проверки.
+        endpoint - ключ "Класс.метод" (как RequestPlan.endpoint) для лимитов клиента.
+        validation_arg - имя аргумента режима модели ответа (как RequestPlan.validation_arg).
+        В обычный (не потоковый) вызов добавляется route="METHOD шаблон пути" (как RequestPlan.route) для метрик.
+        """
+        lines = []
+        call_args = ["self.client", f"'{method}'", self._inline_path_expression(path, param_names)]
+
+        # Query параметры
+        query_params = [name for name in param_names if "_query" in name]
+        if query_params:
+            lines.append("params = {}")
+            for name in query_params:
+                if name in param_mapping:
+                    wire_name = param_mapping[name]["name"]
+                else:
+                    wire_name = extract_field_name_from_param(name, "_query")
+                lines.append(f"if {name} is not NOTSET:")
+                lines.append(f"    params[{wire_name!r}] = serialize_query_value({name})")
+            call_args.append("params=params or None")
+
+        # Header и cookie параметры
+        header_params = [
+            name for name in param_names
+            if param_mapping.get(name, {}).get("type") == "header"
+        ]
+        cookie_params = [
+            name for name in param_names
+            if param_mapping.get(name, {}).get("type") == "cookie"
+        ]
+        if header_params or cookie_params:
+            lines.append("headers = {}")
+            for name in header_params:
+                lines.append(f"if {name} is not NOTSET:")
+                lines.append(f"    headers[{param_mapping[name]['name']!r}] = str({name})")
+            if cookie_params:
+                lines.append("cookies = {}")
+                for name in cookie_params:
+                    lines.append(f"if {name} is not NOTSET:")
+                    lines.append(f"    cookies[{param_mapping[name]['name']!r}] = str({name})")
+                lines.append("headers = merge_cookies_into_headers(headers or None, cookies)")
+            call_args.append("headers=headers or None")
+
+        # Body параметры
+        whole_params = []
+        field_params = []
+        additional_params = []
+        for name in param_names:
+            if "_body" not in name:
+                continue
+            field_name = extract_field_name_from_param(name, "_body")
+            if field_name in whole_body_fields:
+                whole_params.append(name)
+            elif name.startswith("additional_fields_body"):
+                additional_params.append(name)
+            else:
+                field_params.append((name, field_mapping.get(field_name, field_name)))
+
+        empty_body = "{}" if body_required else "None"
+        has_data = False
+        if field_params or additional_params:
+            lines.append("body = {}")
+            for name, wire_name in field_params:
+                lines.append(f"if {name} is not NOTSET:")
+                lines.append(f"    body[{wire_name!r}] = serialize_value({name})")
+            for name in additional_params:
+                lines.append(f"if isinstance({name}, dict):")
+                lines.append(f"    body.update(serialize_value({name}))")
+            fallback = "body" if body_required else "body or None"
+        else:
+            fallback = empty_body
+
+        if whole_params:
+            for index, name in enumerate(whole_params):
+                keyword = "if" if index == 0 else "elif"
+                lines.append(f"{keyword} {name} is not NOTSET:")
+                # Явный None - тело JSON null, как в RequestPlan
+                lines.append(f"    data = JSON_NULL if {name} is None else serialize_value({name})")
+            lines.append("else:")
+            lines.append(f"    data = {fallback}")
+            has_data = True
+        elif field_params or additional_params:
+            lines.append(f"data = {fallback}")
+            has_data = True
+
+        # File параметры (multipart)
+        file_params = [name for name in param_names if "_file" in name]
+        if file_params:
+            if not has_data:
+                lines.append(f"data = {empty_body}")
+                has_data = True
+            lines.append("files = {}")
+            lines.append("form_data = {}")
+            for name in file_params:
+                field_name = extract_field_name_from_param(name, "_file")
+                lines.append(f"if {name} is not NOTSET:")
+                lines.append(f"    if is_file_value({name}):")
+                lines.append(f"        files[{field_name!r}] = {name}")
+                lines.append("    else:")
+                lines.append(f"        form_data[{field_name!r}] = serialize_value({name})")
+            lines.append("data = merge_form_data(data, form_data or None)")
+            call_args.append("data=data")
+            call_args.append("files=files or None")
+        elif has_data:
+            call_args.append("data=data")
+        elif body_required:
+            call_args.append("data={}")
+
+        call_args.extend(response_args)
+        if response_args and validation_arg:
+            call_args.append(f"validation={validation_arg}")
+        if endpoint:
+            call_args.append(f"endpoint={endpoint!r}")
+        if not stream:
+            # Ключ метрик как RequestPlan.route
+            call_args.append(f"route={method.upper() + ' ' + path!r}")
+
+        lines.append("return stream_request(" if stream else "return await execute_request(")
+        lines.extend(f"    {arg}," for arg in call_args)
+        lines.append(")")
+        return "\n".join(lines)
+
+    def _inline_path_expression(self, path: str, param_names: List[str]) -> str:
+        """Выражение пути для inline режима (литералы пути и значения path параметров)"""
+        placeholders = list(re.finditer(r"\{[^}]*\}", path))
+        bindings = {}
+
+        # Та же привязка что и в RequestPlan: точное совпадение {field}, иначе первый свободный
+        for name in param_names:
+            if "_path" not in name:
+                continue
+            target = "{" + extract_field_name_from_param(name, "_path") + "}"
+            matched = [
+                index
+                for index, match in enumerate(placeholders)
+                if match.group(0) == target and index not in bindings
+            ]
+            if not matched:
+                matched = [
+                    index for index in range(len(placeholders)) if index not in bindings
+                ][:1]
+            for index in matched:
+                bindings[index] = name
+
+        if not bindings:
+            return repr(path.rstrip("/"))
+
+        # Как RequestPlan.format_path: незаданный параметр оставляет плейсхолдер,
+        # завершающий "/" срезается у всего пути
+        parts = []
+        position = 0
+        for index, match in enumerate(placeholders):
+            if index in bindings:
+                parts.append(repr(path[position : match.start()]))
+                parts.append(f"format_path_value({bindings[index]}, {match.group(0)!r})")
+                position = match.end()
+        tail = path[position:]
+        if tail.rstrip("/"):
+            parts.append(repr(tail.rstrip("/")))
+            return " + ".join(part for part in parts if part != "''")
+        if tail:
+            parts.append(repr(tail))
+        return "(" + " + ".join(part for part in parts if part != "''") + ").rstrip('/')"
+
     def _add_zone_model_references(self):
         """Добавляет ссылки на все связанные модели в каждый endpoint класс"""
         for zone_name, zone_info in self.zones.items():
@@ -510,8 +1077,8 @@ class ClientGenerator:
 
         # Проходим по всем методам зоны
         for func in zone_class.functions.values():
-            # Ищем response_model и response_models в декораторах
-            for decorator in func.decorators:
+            # Ищем response_model и response_models в декораторах (и в теле для inline режима)
+            for decorator in func.decorators + [func.code.code]:
                 if "response_model=" in decorator or "response_models=" in decorator:
                     # Извлекаем имена моделей из декоратора
                     import re
@@ -995,6 +1562,8 @@ class ClientGenerator:
 
                     # Для body параметров используем правильное разрешение типов с зоной
                     var_type = self._get_type_for_model_field(prop_spec, zone)
+                    if content_type == "multipart/form-data":
+                        var_type = self._get_file_param_type(var_type, zone)
 
                     # Устанавливаем default в зависимости от required флагов
                     field_is_required = is_required and prop_name in required_fields
@@ -1397,13 +1966,22 @@ class ClientGenerator:
         if zone_key not in self.zones:
             # endpoints/<zone>.py (всегда lowercase для консистентности)
             endpoints_file = self.project.add_file(f"endpoints/{zone.lower()}.py")
+            if self.codegen_mode == "inline":
+                endpoints_file.imports.append(
+                    "from ..utils import execute_request, stream_request, serialize_value, format_path_value, "
+                    "serialize_query_value, merge_cookies_into_headers, merge_form_data, is_file_value"
+                )
+                endpoints_file.imports.append("from ..batch import endpoint_method")
+            else:
+                endpoints_file.imports.append(
+                    "from ..decorators import _get, _post, _put, _delete, _patch, _paginated"
+                )
             endpoints_file.imports.extend(
                 [
-                    "from ..decorators import _get, _post, _put, _delete, _patch",
                     "from ..common import AiohttpClient",
                     "from typing import Optional, List, Any, Union, Literal, Dict",
                     "from datetime import datetime, date",
-                    "from ..constants import NOTSET",
+                    "from ..constants import NOTSET, JSON_NULL",
                     "from ..models import *",
                 ]
             )
@@ -1838,6 +2416,9 @@ class ClientGenerator:
         # Создаем динамический client.py с прямым доступом к зонам
         self._generate_dynamic_client()
 
+        if self.sync:
+            self._generate_sync_client()
+
     def _remove_empty_zones(self):
         """Удаление зон без endpoint методов"""
         empty_zones = []
@@ -1933,6 +2514,125 @@ class ClientGenerator:
                     )
                 break
 
+    def _generate_sync_client(self):
+        """
+        Синхронный клиент в подпакете sync/: блокирующие копии классов зон
+        с теми же сигнатурами и SyncApiClient на httpx.Client.
+
+        Потоковые (*_stream) и iter_* методы остаются только в async клиенте.
+        """
+        zone_imports = []
+        zone_assignments = []
+        client_imports = []
+
+        for zone_name, zone_info in self.zones.items():
+            zone_class = zone_info["endpoints_class"]
+            sync_file = self.project.add_file(f"sync/endpoints/{zone_name.lower()}.py")
+            sync_file.imports.extend(
+                self._sync_zone_imports(zone_info["endpoints_file"].imports)
+            )
+            sync_class = sync_file.add_class(
+                zone_class.name,
+                parameters=list(zone_class.parameters),
+                code_blocks=list(zone_class.code_blocks),
+            )
+
+            for function in zone_class.functions.values():
+                if function.name == "__init__":
+                    sync_class.add_function(
+                        "__init__",
+                        parameters=[
+                            Parameter(name="self"),
+                            Parameter(name="client", var_type=Variable(value="HttpxClient")),
+                        ],
+                        code=CodeBlock(code="self.client = client"),
+                    )
+                elif function.async_def:
+                    sync_class.add_function(
+                        function.model_copy(
+                            update={
+                                "async_def": False,
+                                "decorators": [
+                                    decorator
+                                    for decorator in function.decorators
+                                    if decorator != "@endpoint_method"
+                                ],
+                                "code": CodeBlock(
+                                    order=function.code.order,
+                                    code=function.code.code.replace(
+                                        "return await execute_request(", "return execute_request("
+                                    ),
+                                ),
+                            }
+                        )
+                    )
+
+            zone_imports.append(
+                f"    from .endpoints.{zone_name.lower()} import {zone_class.name}"
+            )
+            zone_assignments.append(
+                f'        self.{zone_name}: "{zone_class.name}" = {zone_class.name}(self)'
+            )
+            client_imports.append(
+                f"from .endpoints.{zone_name.lower()} import {zone_class.name}"
+            )
+
+        if self.source_url:
+            zone_assignments.append(f"        self._api_url: str = '{self.source_url}'")
+
+        client_file = self.project.add_file("sync/client.py")
+        client_file.imports.extend(client_imports)
+        client_file.add_code_block(
+            CodeBlock(
+                code=templates.sync_client.format(
+                    zone_imports="\n".join(zone_imports),
+                    zone_assignments="\n".join(zone_assignments),
+                )
+            )
+        )
+
+        sync_init = self.project.add_file("sync/__init__.py")
+        sync_init.imports.append("from .client import SyncApiClient")
+        sync_init.add_code_block(CodeBlock(code='__all__ = ["SyncApiClient"]'))
+
+    def _sync_zone_imports(self, imports: List[str]) -> List[str]:
+        """Импорты файла зоны sync/endpoints/ по импортам async файла зоны"""
+        sync_imports = []
+        for line in imports:
+            if line.startswith("from ..utils import execute_request"):
+                line = (
+                    "from ..utils import execute_request, serialize_value, format_path_value, "
+                    "serialize_query_value, merge_cookies_into_headers, merge_form_data, is_file_value"
+                )
+            elif line.startswith("from ..decorators import"):
+                line = "from ..decorators import _get, _post, _put, _delete, _patch"
+            elif line.startswith("from ..common import"):
+                line = "from ..common import HttpxClient"
+            elif line in ("from ..batch import endpoint_method", "from ..pagination import PageIterator"):
+                continue
+            elif line.startswith("from typing import"):
+                line = line.replace(", AsyncIterator", "")
+            elif line.startswith("from .."):
+                # Модели, константы и типы общие с async клиентом
+                line = "from ." + line[len("from "):]
+            sync_imports.append(line)
+        return sync_imports
+
+    def _zone_method_names(self, zone: str) -> Set[str]:
+        """Имена, уже занятые в классе зоны: операции спецификации и добавленные методы"""
+        zone_key = zone.lower()
+        return self.operation_names[zone_key] | set(self.zones[zone_key]["endpoints_class"].functions)
+
+    @staticmethod
+    def _unique_name(name: str, taken: Set[str]) -> str:
+        """name, а если оно занято - name_, name_2, name_3... (первое свободное)"""
+        if name not in taken:
+            return name
+        candidate, index = f"{name}_", 2
+        while candidate in taken:
+            candidate, index = f"{name}_{index}", index + 1
+        return candidate
+
     @staticmethod
     def _snake_case(name: str) -> str:
         name = name.replace("-", "_")
@@ -2547,6 +3247,41 @@ class ClientGenerator:
                             return True
         return False
 
+    def _is_binary_response(self, responses: Dict) -> bool:
+        """Проверяет, является ли успешный ответ бинарным (файл, архив, выгрузка)"""
+        for status_code, response_spec in responses.items():
+            if status_code.startswith("2"):
+                content = response_spec.get("content", {})
+                for content_type, content_spec in content.items():
+                    if content_type.lower() in self.BINARY_CONTENT_TYPES:
+                        return True
+                    schema = content_spec.get("schema", {}) or {}
+                    if schema.get("type") == "string" and schema.get("format") == "binary":
+                        return True
+        return False
+
+    def _get_file_param_type(self, var_type: Variable, zone: str) -> Variable:
+        """Бинарные поля multipart принимают не только bytes, но и пути, файлы и потоки"""
+        type_str = str(var_type)
+        if type_str not in ("bytes", "List[bytes]", "Optional[bytes]"):
+            return var_type
+
+        zone_info = self.zones.get(zone.lower()) if zone else None
+        if zone_info is not None:
+            imports = zone_info["endpoints_file"].imports
+            if "from ..utils import FileContent" not in imports:
+                imports.append("from ..utils import FileContent")
+        return Variable(value=type_str.replace("bytes", "FileContent"))
+
+    def _is_ndjson_response(self, responses: Dict) -> bool:
+        """Проверяет, отдает ли успешный ответ NDJSON / JSON Lines поток"""
+        for status_code, response_spec in responses.items():
+            if status_code.startswith("2"):
+                for content_type in response_spec.get("content", {}):
+                    if content_type.lower() in self.NDJSON_CONTENT_TYPES:
+                        return True
+        return False
+
     def _get_response_models_list(self, responses: Dict, zone: str) -> list:
         """Получение списка моделей для Union типов (для умного парсинга)"""
         if not zone or zone == "common":
@@ -2628,6 +3363,115 @@ class ClientGenerator:
                             return model_classes
         return []
 
+    def _get_response_discriminator_args(
+        self, responses: Dict, response_models_list: list
+    ) -> list:
+        """
+        Аргументы дискриминатора для Union ответа.
+
+        Используется discriminator.propertyName/mapping из спецификации.
+        Если его нет - свойство с единственным enum/const значением в каждом
+        варианте, иначе уникальное обязательное поле каждого варианта.
+        """
+        union_schema = None
+        for status_code, response_spec in responses.items():
+            if not status_code.startswith("2"):
+                continue
+            for content_spec in response_spec.get("content", {}).values():
+                schema = content_spec.get("schema", {})
+                if schema.get("anyOf") or schema.get("oneOf"):
+                    union_schema = schema
+                    break
+            if union_schema is not None:
+                break
+        if union_schema is None:
+            return []
+
+        schemas = self.original_spec.get("components", {}).get("schemas", {})
+        variants = []
+        for variant in union_schema.get("anyOf", []) + union_schema.get("oneOf", []):
+            if "$ref" in variant:
+                variants.append(schemas.get(variant["$ref"].split("/")[-1], {}))
+            elif variant.get("type") == "object" and "title" in variant:
+                variants.append(variant)
+        # Варианты сопоставляются с моделями так же, как в _get_response_models_list
+        if len(variants) != len(response_models_list):
+            return []
+        models_by_variant = list(zip(response_models_list, variants))
+
+        discriminator = union_schema.get("discriminator") or {}
+        property_name = discriminator.get("propertyName")
+        if property_name:
+            mapping = {}
+            for tag, ref in (discriminator.get("mapping") or {}).items():
+                model_name = self._get_clean_schema_name(ref.split("/")[-1])
+                if model_name in response_models_list:
+                    mapping[tag] = model_name
+            if not mapping:
+                for model_name, variant in models_by_variant:
+                    tag = self._single_literal_value(
+                        variant.get("properties", {}).get(property_name, {})
+                    )
+                    # По OpenAPI неявный тег - имя схемы
+                    mapping[model_name if tag is None else tag] = model_name
+            return [
+                f"discriminator={property_name!r}",
+                self._format_discriminator_dict("discriminator_mapping", mapping),
+            ]
+
+        # Свойство с единственным литеральным значением во всех вариантах
+        common_properties = None
+        for _, variant in models_by_variant:
+            names = set(variant.get("properties", {}).keys())
+            common_properties = (
+                names if common_properties is None else common_properties & names
+            )
+        for property_name in sorted(common_properties or ()):
+            mapping = {}
+            for model_name, variant in models_by_variant:
+                tag = self._single_literal_value(variant["properties"][property_name])
+                if tag is None or tag in mapping:
+                    break
+                mapping[tag] = model_name
+            else:
+                return [
+                    f"discriminator={property_name!r}",
+                    self._format_discriminator_dict("discriminator_mapping", mapping),
+                ]
+
+        # Обязательное поле, которого нет в остальных вариантах
+        fields = {}
+        for model_name, variant in models_by_variant:
+            other_properties = set()
+            for other_name, other in models_by_variant:
+                if other_name != model_name:
+                    other_properties |= set(other.get("properties", {}).keys())
+            unique = [
+                field
+                for field in variant.get("required", [])
+                if field not in other_properties
+            ]
+            if not unique:
+                return []
+            fields[unique[0]] = model_name
+        return [self._format_discriminator_dict("discriminator_fields", fields)]
+
+    @staticmethod
+    def _single_literal_value(schema: Dict) -> Optional[Any]:
+        """Единственное допустимое значение свойства (const или enum из одного значения)"""
+        if "const" in schema:
+            return schema["const"]
+        enum = schema.get("enum")
+        if enum and len(enum) == 1:
+            return enum[0]
+        return None
+
+    @staticmethod
+    def _format_discriminator_dict(arg_name: str, mapping: Dict[Any, str]) -> str:
+        """Рендер {значение: Модель} для аргумента декоратора"""
+        items = ", ".join(f"{key!r}: {model}" for key, model in mapping.items())
+        return f"{arg_name}={{{items}}}"
+
     def _get_clean_model_type(self, responses: Dict, zone: str) -> str:
         """Получение чистого типа модели для response_model без Optional оберток"""
         # Если нет zone или zone = "common", ищем по первому найденному title
@@ -12,59 +12,4103 @@ description = "{description}"
 requires-python = ">=3.10"
 dependencies = [
     "aiohttp>=3.8.0",
-    "pydantic>=2.0.0",
-    "simple-singleton>=1.0.0",
+    "pydantic>=2.5.0",
+    "simple-singleton>=1.0.0",{extra_dependencies}
 ]
 
+[project.optional-dependencies]
+orjson = ["orjson>=3.8.0"]
+msgspec = ["msgspec>=0.18.0"]
+http2 = ["httpx[http2]>=0.24.0"]
+otel = ["opentelemetry-api>=1.20.0"]
+
 [tool.setuptools]
-packages = ["{package_name}", "{package_name}.models", "{package_name}.endpoints"]
+packages = ["{package_name}", "{package_name}.models", "{package_name}.endpoints"{extra_packages}]
+
+[tool.setuptools.package-dir]
+{package_name} = "."
+"""
+
+    models = """from typing import Any
+
+class _NotSetType:
+    def __repr__(self) -> str:
+        return 'NOTSET'
+    
+    def __bool__(self) -> bool:
+        return False
+
+
+NOTSET = _NotSetType()
+
+
+# Тело запроса JSON null: явный None в аргументе тела целиком
+class _JsonNullType:
+    def __repr__(self) -> str:
+        return 'JSON_NULL'
+
+    def __bool__(self) -> bool:
+        return False
+
+
+JSON_NULL = _JsonNullType()
+"""
+
+    client = """from simple_singleton import Singleton
+from typing import TYPE_CHECKING
+
+from .common import AiohttpClient
+from . import constants
+
+if TYPE_CHECKING:
+{zone_imports}
+
+class ApiClient(AiohttpClient, metaclass=Singleton):
+    def __init__(self) -> None:
+        super().__init__()
+{zone_assignments}
+"""
+
+    json_codecs = """\"\"\"
+JSON кодеки для запросов и ответов (orjson / msgspec / stdlib json)
+\"\"\"
+
+import json
+from typing import Any, Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - опциональная зависимость
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - опциональная зависимость
+    msgspec = None
+
+
+class JsonCodec:
+    \"\"\"Базовый кодек: dumps -> bytes, loads(bytes) -> python объекты\"\"\"
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    # Функция stdlib как есть: JsonArrayScanner узнает ее и не декодирует элементы дважды
+    loads = staticmethod(json.loads)
+
+    def __repr__(self) -> str:
+        return f"<JsonCodec {self.name}>"
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        # Нестроковые ключи приводятся к строкам, как в stdlib json
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, raw: Union[bytes, str]) -> Any:
+        return orjson.loads(raw)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, value: Any) -> bytes:
+        return self._encoder.encode(value)
+
+    def loads(self, raw: Union[bytes, str]) -> Any:
+        return self._decoder.decode(raw)
+
+
+# Реестр кодеков: имя -> фабрика. Порядок определяет приоритет автовыбора
+_codec_factories: Dict[str, Callable[[], JsonCodec]] = {}
+_codec_available: Dict[str, bool] = {}
+
+
+def register_json_codec(name: str, factory: Callable[[], JsonCodec], available: bool = True) -> None:
+    \"\"\"Регистрация кодека под именем для initialize(json_codec=name)\"\"\"
+    _codec_factories[name] = factory
+    _codec_available[name] = available
+
+
+register_json_codec("orjson", OrjsonCodec, available=orjson is not None)
+register_json_codec("msgspec", MsgspecCodec, available=msgspec is not None)
+register_json_codec("json", JsonCodec)
+
+
+def available_json_codecs() -> list:
+    \"\"\"Имена кодеков, доступных в текущем окружении\"\"\"
+    return [name for name, available in _codec_available.items() if available]
+
+
+def get_json_codec(codec: Union[str, JsonCodec, None] = None) -> JsonCodec:
+    \"\"\"
+    Получение кодека.
+
+    None или "auto" - первый доступный из orjson, msgspec, json.
+    Строка - кодек из реестра. Объект с методами dumps/loads возвращается как есть.
+    \"\"\"
+    if codec is None or codec == "auto":
+        for name in available_json_codecs():
+            return _codec_factories[name]()
+        return JsonCodec()
+
+    if isinstance(codec, str):
+        if codec not in _codec_factories:
+            raise ValueError(f"Unknown JSON codec: {codec}")
+        if not _codec_available[codec]:
+            raise ValueError(f"JSON codec {codec} is not installed")
+        return _codec_factories[codec]()
+
+    if not (hasattr(codec, "dumps") and hasattr(codec, "loads")):
+        raise TypeError("JSON codec must provide dumps() and loads()")
+    return codec
+"""
+
+    validation = """\"\"\"
+Режимы построения моделей ответа: full, construct и lazy
+\"\"\"
+
+import copy
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from pydantic import AliasChoices, BaseModel, Discriminator, Tag, TypeAdapter
+
+VALIDATION_MODES = ("full", "construct", "lazy")
+
+# Конвертер значения поля; None - значение остается как есть
+Converter = Optional[Callable[[Any], Any]]
+
+_construct_plans: Dict[type, Tuple[Tuple[Tuple[str, ...], Callable[[Any], Any]], ...]] = {}
+_union_pickers: Dict[Any, Callable[[Any], Any]] = {}
+_field_adapters: Dict[Tuple[type, str], TypeAdapter] = {}
+_lazy_converters: Dict[Tuple[type, str], Converter] = {}
+
+
+def check_validation_mode(validation: str) -> str:
+    if validation not in VALIDATION_MODES:
+        raise ValueError(
+            f"Unknown validation mode: {validation} (available: {', '.join(VALIDATION_MODES)})"
+        )
+    return validation
+
+
+def _is_model(tp: Any) -> bool:
+    return isinstance(tp, type) and issubclass(tp, BaseModel)
+
+
+def _strip_annotated(tp: Any) -> Tuple[Any, tuple]:
+    if typing.get_origin(tp) is typing.Annotated:
+        return tp.__origin__, tp.__metadata__
+    return tp, ()
+
+
+def _union_members(tp: Any) -> Optional[tuple]:
+    origin = typing.get_origin(tp)
+    if origin is Union or (origin is not None and getattr(origin, "__name__", "") == "UnionType"):
+        return typing.get_args(tp)
+    return None
+
+
+def _pick_union_variant(tp: Any) -> Callable[[Any], Any]:
+    \"\"\"
+    Выбор модели варианта Union без валидации.
+
+    Tagged union - по функции дискриминатора, иначе первая модель,
+    все обязательные поля которой есть в данных.
+    \"\"\"
+    picker = _union_pickers.get(tp)
+    if picker is not None:
+        return picker
+
+    inner, metadata = _strip_annotated(tp)
+    members = []
+    for member in _union_members(inner) or (inner,):
+        member_type, member_metadata = _strip_annotated(member)
+        tag = next((item.tag for item in member_metadata if isinstance(item, Tag)), None)
+        members.append((member_type, tag))
+    models = [(member, tag) for member, tag in members if _is_model(member)]
+    discriminator = next((item for item in metadata if isinstance(item, Discriminator)), None)
+
+    if discriminator is not None and callable(discriminator.discriminator):
+        by_tag = {tag: model for model, tag in models if tag is not None}
+        get_tag = discriminator.discriminator
+
+        def picker(value: Any) -> Any:
+            return by_tag.get(get_tag(value)) if isinstance(value, dict) else None
+    else:
+        required = [
+            (model, frozenset(field.alias or name for name, field in model.model_fields.items() if field.is_required()))
+            for model, _ in models
+        ]
+
+        def picker(value: Any) -> Any:
+            if not isinstance(value, dict):
+                return None
+            for model, keys in required:
+                if keys.issubset(value.keys()):
+                    return model
+            return None
+
+    _union_pickers[tp] = picker
+    return picker
+
+
+def _converter_for(tp: Any, factory: Callable[[type], Callable[[Any], Any]]) -> Converter:
+    \"\"\"Конвертер для аннотации поля: модели, списки, словари, Optional/Union\"\"\"
+    inner, metadata = _strip_annotated(tp)
+    if _is_model(inner):
+        return factory(inner)
+
+    members = _union_members(inner)
+    if members is not None:
+        if not any(_is_model(_strip_annotated(member)[0]) or _converter_for(member, factory) for member in members):
+            return None
+        picker = _pick_union_variant(tp if metadata else inner)
+        converters = [_converter_for(member, factory) for member in members]
+        fallback = next((converter for converter in converters if converter is not None), None)
+
+        def convert_union(value: Any) -> Any:
+            if value is None:
+                return None
+            model = picker(value)
+            if model is not None:
+                return factory(model)(value)
+            if isinstance(value, (list, dict)) and fallback is not None:
+                return fallback(value)
+            return value
+
+        return convert_union
+
+    origin = typing.get_origin(inner)
+    args = typing.get_args(inner)
+    if origin in (list, tuple, set, frozenset) or inner in (list, tuple):
+        item_converter = _converter_for(args[0], factory) if args else None
+        if item_converter is None:
+            return None
+        return lambda value: [item_converter(item) for item in value] if isinstance(value, list) else value
+    if origin is dict and len(args) == 2:
+        value_converter = _converter_for(args[1], factory)
+        if value_converter is None:
+            return None
+        return lambda value: {key: value_converter(item) for key, item in value.items()} if isinstance(value, dict) else value
+    return None
+
+
+def _input_keys(name: str, field: Any) -> Tuple[str, ...]:
+    \"\"\"Ключи входных данных поля в порядке model_construct: alias, validation_alias, имя\"\"\"
+    keys = [field.alias] if field.alias else []
+    aliases = field.validation_alias.choices if isinstance(field.validation_alias, AliasChoices) else [field.validation_alias]
+    keys.extend(alias for alias in aliases if isinstance(alias, str))
+    keys.append(name)
+    return tuple(dict.fromkeys(keys))
+
+
+def _construct_plan(model: type) -> Tuple[Tuple[Tuple[str, ...], Callable[[Any], Any]], ...]:
+    plan = _construct_plans.get(model)
+    if plan is None:
+        # Конвертеры вложенных моделей ленивые, поэтому рекурсивные модели безопасны
+        converters = (
+            (_input_keys(name, field), _converter_for(field.annotation, _construct_factory))
+            for name, field in model.model_fields.items()
+        )
+        plan = _construct_plans[model] = tuple((keys, converter) for keys, converter in converters if converter is not None)
+    return plan
+
+
+def construct_model(model: type, data: Any) -> Any:
+    \"\"\"
+    Рекурсивный model_construct: вложенные модели, списки и словари без валидации.
+
+    Вложенные значения конвертируются по плану полей, кешированному по модели;
+    экземпляр собирает model_construct, поэтому алиасы, значения по умолчанию
+    и extra='allow' обрабатываются так же, как при полной валидации.
+    \"\"\"
+    if not isinstance(data, dict):
+        return data
+    values = dict(data)
+    for keys, converter in _construct_plan(model):
+        for key in keys:
+            if key in values:
+                if values[key] is not None:
+                    values[key] = converter(values[key])
+                break
+    instance = model.model_construct(**values)
+    extra = getattr(instance, "__pydantic_extra__", None)
+    if extra:
+        # Полная валидация считает extra поля заданными
+        instance.__pydantic_fields_set__.update(extra)
+    return instance
+
+
+def _construct_factory(model: type) -> Callable[[Any], Any]:
+    return lambda value: construct_model(model, value)
+
+
+class LazyModel:
+    \"\"\"
+    Прокси модели, валидирующий поле только при первом обращении к нему.
+
+    Вложенные модели тоже возвращаются как LazyModel. model() строит полностью
+    провалидированную модель, model_dump() возвращает исходные данные.
+    \"\"\"
+
+    __slots__ = ("_model", "_data", "_cache")
+
+    def __init__(self, model: type, data: Dict[str, Any]):
+        object.__setattr__(self, "_model", model)
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_cache", {})
+
+    def __getattr__(self, name: str) -> Any:
+        model = self._model
+        field = model.model_fields.get(name)
+        if field is None:
+            raise AttributeError(f"{model.__name__} has no field {name!r}")
+
+        cache = self._cache
+        if name in cache:
+            return cache[name]
+
+        key = field.alias or name
+        data = self._data
+        if key in data:
+            value = data[key]
+        elif name in data:
+            value = data[name]
+        elif not field.is_required():
+            value = field.get_default(call_default_factory=True)
+            cache[name] = value
+            return value
+        else:
+            # Ошибка валидации в привычном формате pydantic
+            model.model_validate(data)
+            raise AttributeError(name)
+
+        if (model, name) in _lazy_converters:
+            converter = _lazy_converters[(model, name)]
+        else:
+            converter = _lazy_converters[(model, name)] = _converter_for(field.annotation, _lazy_factory)
+        if converter is not None:
+            # Вложенные модели (и списки/словари моделей) - тоже ленивые прокси
+            result = converter(value) if value is not None else None
+        else:
+            adapter = _field_adapters.get((model, name))
+            if adapter is None:
+                adapter = _field_adapters[(model, name)] = TypeAdapter(field.annotation)
+            result = adapter.validate_python(value)
+        cache[name] = result
+        return result
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._cache[name] = value
+
+    def model(self) -> BaseModel:
+        \"\"\"Полная валидация данных в модель\"\"\"
+        return self._model.model_validate(self._data)
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return self.model().model_dump(**kwargs) if kwargs else dict(self._data)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "LazyModel":
+        clone = LazyModel(self._model, copy.deepcopy(self._data, memo))
+        object.__setattr__(clone, "_cache", copy.deepcopy(self._cache, memo))
+        return clone
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyModel):
+            return self._model is other._model and self._data == other._data
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LazyModel[{self._model.__name__}]({self._data!r})"
+
+
+def _lazy_factory(model: type) -> Callable[[Any], Any]:
+    return lambda value: LazyModel(model, value) if isinstance(value, dict) else value
+
+
+def build_response(data: Any, response_model: Any, validation: str) -> Any:
+    \"\"\"
+    Модель ответа без полной валидации (construct/lazy).
+
+    response_model - модель или Union моделей, данные - объект или список объектов.
+    \"\"\"
+    factory = _construct_factory if validation == "construct" else _lazy_factory
+    converter = _converter_for(response_model, factory)
+    if converter is None:
+        return data
+    if isinstance(data, list):
+        return [converter(item) for item in data]
+    return converter(data)
+"""
+
+    retry = """\"\"\"
+Политика повторов запросов: экспоненциальная задержка с full jitter,
+Retry-After, повтор только идемпотентных методов и общий deadline
+\"\"\"
+
+import email.utils
+import random
+import time
+import uuid
+from typing import Collection, Dict, Optional
+
+# Методы, повтор которых не меняет состояние сервера (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    \"\"\"Retry-After в секундах: число секунд или HTTP дата\"\"\"
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    \"\"\"
+    Настройки повторов запроса.
+
+    max_attempts - число попыток, включая первую. Задержка перед попыткой n
+    выбирается случайно из [0, min(backoff_max, backoff_base * 2 ** (n - 1))]
+    (full jitter), поэтому клиенты не повторяют запросы синхронно. Retry-After
+    ответа заменяет расчетную задержку, но не больше retry_after_max.
+
+    По умолчанию повторяются только идемпотентные методы. С idempotency_keys=True
+    к POST/PATCH добавляется заголовок Idempotency-Key (один на все попытки) и
+    такие запросы тоже повторяются. Запросы, которые не дошли до сервера (ошибка
+    соединения), повторяются для любого метода.
+
+    deadline - общий бюджет в секундах на все попытки вместе с паузами.
+    \"\"\"
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        retry_statuses: Collection[int] = RETRY_STATUSES,
+        retry_methods: Collection[str] = IDEMPOTENT_METHODS,
+        respect_retry_after: bool = True,
+        retry_after_max: float = 60.0,
+        idempotency_keys: bool = False,
+        deadline: Optional[float] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+        self.max_attempts = int(max_attempts)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(method.upper() for method in retry_methods)
+        self.respect_retry_after = respect_retry_after
+        self.retry_after_max = float(retry_after_max)
+        self.idempotency_keys = idempotency_keys
+        self.deadline = deadline
+
+    def prepare_headers(self, method: str, headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        \"\"\"Заголовки запроса с Idempotency-Key для POST/PATCH, если он включен\"\"\"
+        if not self.idempotency_keys or method.upper() not in ("POST", "PATCH"):
+            return headers
+        if headers and any(key.lower() == IDEMPOTENCY_KEY_HEADER.lower() for key in headers):
+            return headers
+        return {**(headers or {}), IDEMPOTENCY_KEY_HEADER: str(uuid.uuid4())}
+
+    def is_retryable(self, method: str, headers: Optional[Dict[str, str]] = None) -> bool:
+        \"\"\"Можно ли повторять запрос, дошедший до сервера\"\"\"
+        if method.upper() in self.retry_methods:
+            return True
+        # Запрос с ключом идемпотентности сервер не выполнит дважды
+        return bool(headers) and any(key.lower() == IDEMPOTENCY_KEY_HEADER.lower() for key in headers)
+
+    def should_retry_status(self, status: int) -> bool:
+        return status in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        \"\"\"Пауза после неудачной попытки attempt (нумерация с 1)\"\"\"
+        if self.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.retry_after_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def start(self, now: float) -> "RetryState":
+        return RetryState(self, None if self.deadline is None else now + self.deadline)
+
+
+class RetryState:
+    \"\"\"Состояние повторов одного вызова: номер попытки и оставшийся бюджет\"\"\"
+
+    __slots__ = ("policy", "attempt", "deadline_at")
+
+    def __init__(self, policy: RetryPolicy, deadline_at: Optional[float]):
+        self.policy = policy
+        self.attempt = 1
+        self.deadline_at = deadline_at
+
+    def remaining(self, now: float) -> Optional[float]:
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - now)
+
+    def next_delay(self, now: float, retry_after: Optional[str] = None) -> Optional[float]:
+        \"\"\"
+        Пауза перед следующей попыткой или None, если повторять нельзя:
+        попытки кончились или пауза не укладывается в deadline.
+        \"\"\"
+        if self.attempt >= self.policy.max_attempts:
+            return None
+        delay = self.policy.backoff(self.attempt, retry_after)
+        remaining = self.remaining(now)
+        if remaining is not None and delay >= remaining:
+            return None
+        self.attempt += 1
+        return delay
+"""
+
+    transport = """\"\"\"
+Транспорты запросов: интерфейс попытки запроса, HTTP/2 транспорт на httpx
+и транспорты без сети (ASGI приложение или обработчик в том же процессе)
+\"\"\"
+
+import asyncio
+import codecs
+import inspect
+import mmap
+import uuid
+from typing import IO, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlencode, urlsplit
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from .json_codecs import JsonCodec, get_json_codec
+
+
+class TransportError(Exception):
+    \"\"\"Ошибка сети или timeout в транспорте\"\"\"
+
+
+class TransportConnectError(TransportError):
+    \"\"\"Соединение не установлено - запрос не дошел до сервера, повтор безопасен\"\"\"
+
+
+class TransportRequest:
+    \"\"\"
+    Одна попытка запроса, готовая к отправке.
+
+    headers уже содержат базовые, временные и endpoint заголовки клиента
+    и Cookie. Тело задается одним из полей: content (bytes), form (поля
+    формы) или files (части multipart: (поле, имя файла, содержимое,
+    content-type), содержимое читается кусками через iter_upload()). timeout - секунды
+    на всю попытку (None - без ограничения). json_codec - кодек клиента для
+    json() ответа (None - stdlib json).
+    \"\"\"
+
+    __slots__ = ("method", "url", "params", "headers", "content", "form", "files", "timeout", "json_codec")
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[bytes] = None,
+        form: Optional[Dict[str, Any]] = None,
+        files: Optional[List[Tuple[str, str, Any, str]]] = None,
+        timeout: Optional[float] = None,
+        json_codec: Optional[JsonCodec] = None,
+    ):
+        self.method = method.upper()
+        self.url = url
+        self.params = params
+        self.headers = headers or {}
+        self.content = content
+        self.form = form
+        self.files = files
+        self.timeout = timeout
+        self.json_codec = json_codec
+
+
+class BufferedResponse:
+    \"\"\"Ответ транспорта с прочитанным телом (интерфейс как у AiohttpResponse)\"\"\"
+
+    __slots__ = ("status_code", "headers", "_content", "_json_codec")
+
+    def __init__(self, status_code: int, headers: Any, content: bytes, json_codec: JsonCodec = None):
+        self.status_code = status_code
+        self.headers = headers
+        self._content = content
+        self._json_codec = json_codec or get_json_codec("json")
+
+    async def read(self) -> bytes:
+        return self._content
+
+    async def text(self) -> str:
+        return self._content.decode(self._charset(), errors="replace")
+
+    async def json(self) -> Any:
+        return self._json_codec.loads(self._content)
+
+    async def content(self) -> bytes:
+        return self._content
+
+    @property
+    def body(self) -> bytes:
+        return self._content
+
+    def _charset(self) -> str:
+        for part in self.headers.get("content-type", "").split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                try:
+                    return codecs.lookup(value.strip('"')).name
+                except LookupError:
+                    break
+        return "utf-8"
+
+
+# Размер куска при чтении файлов загрузки
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def iter_file_object(file: IO[bytes], start: Optional[int] = None, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    \"\"\"Чтение файлового объекта кусками в thread pool, без закрытия файла\"\"\"
+    loop = asyncio.get_running_loop()
+    if start is not None:
+        await loop.run_in_executor(None, file.seek, start)
+    while True:
+        chunk = await loop.run_in_executor(None, file.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_upload(payload: Any, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    \"\"\"Содержимое части multipart кусками (bytes, memoryview, mmap, файл или async итератор)\"\"\"
+    if isinstance(payload, bytes):
+        yield payload
+    elif isinstance(payload, (bytearray, memoryview, mmap.mmap)):
+        view = memoryview(payload).cast("B")
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start:start + chunk_size])
+    elif hasattr(payload, "read"):
+        async for chunk in iter_file_object(payload, None, chunk_size):
+            yield chunk
+    else:
+        async for chunk in payload:
+            yield chunk
+
+
+async def read_upload(payload: Any) -> bytes:
+    \"\"\"Содержимое части multipart целиком\"\"\"
+    return b"".join([chunk async for chunk in iter_upload(payload)])
+
+
+def multipart_content_type(boundary: str) -> str:
+    return f"multipart/form-data; boundary={boundary}"
+
+
+async def iter_multipart(request: TransportRequest, boundary: str) -> AsyncIterator[bytes]:
+    \"\"\"Тело multipart запроса кусками: поля формы, затем файлы без чтения целиком в память\"\"\"
+    for name, value in (request.form or {}).items():
+        for item in value if isinstance(value, list) else [value]:
+            yield f'--{boundary}\\r\\nContent-Disposition: form-data; name="{name}"\\r\\n\\r\\n{item}\\r\\n'.encode()
+    for field, filename, payload, content_type in request.files or ():
+        yield (
+            f'--{boundary}\\r\\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\\r\\n'
+            f"Content-Type: {content_type}\\r\\n\\r\\n"
+        ).encode()
+        async for chunk in iter_upload(payload):
+            yield chunk
+        yield b"\\r\\n"
+    yield f"--{boundary}--\\r\\n".encode()
+
+
+async def encode_body(request: TransportRequest) -> Tuple[bytes, Optional[str]]:
+    \"\"\"Тело запроса в байтах и его content-type (multipart, форма или content)\"\"\"
+    if request.files:
+        boundary = uuid.uuid4().hex
+        body = b"".join([chunk async for chunk in iter_multipart(request, boundary)])
+        return body, multipart_content_type(boundary)
+    if request.form is not None:
+        return urlencode(request.form, doseq=True).encode(), "application/x-www-form-urlencoded"
+    return request.content or b"", None
+
+
+def _query_string(request: TransportRequest, url_query: str) -> str:
+    if not request.params:
+        return url_query
+    query = urlencode(request.params, doseq=True)
+    return f"{url_query}&{query}" if url_query else query
+
+
+class Transport:
+    \"\"\"
+    Транспорт одной попытки запроса.
+
+    Клиент сам выполняет повторы, circuit breaker, rate limiting и кеш,
+    транспорт только отправляет TransportRequest и возвращает ответ с
+    прочитанным телом (BufferedResponse или объект с тем же интерфейсом).
+    Ошибки сети оборачиваются в TransportError; если запрос не ушел на
+    сервер (соединение не установлено) - в TransportConnectError.
+
+    Потоковые методы (*_stream) всегда используют aiohttp сессию клиента.
+    \"\"\"
+
+    name = "custom"
+
+    async def send(self, request: TransportRequest) -> Any:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpxTransport(Transport):
+    \"\"\"
+    HTTP/2 транспорт на httpx.AsyncClient.
+
+    Параллельные запросы к одному хосту мультиплексируются потоками одного
+    соединения (новое открывается, когда исчерпан лимит потоков сервера),
+    поэтому параллельность не ограничена числом соединений, как в
+    HTTP/1.1. Сервер без HTTP/2 получает HTTP/1.1 (ALPN). Для h2c без TLS
+    (prior knowledge) - http1=False.
+
+    Нужен пакет httpx с поддержкой HTTP/2: pip install "httpx[http2]".
+    \"\"\"
+
+    name = "http2"
+
+    def __init__(
+        self,
+        http2: bool = True,
+        http1: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60,
+        verify: Any = True,
+        **client_kwargs: Any,
+    ):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('HttpxTransport requires httpx: pip install "httpx[http2]"') from None
+        self._httpx = httpx
+        self._client_kwargs = dict(
+            http1=http1,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            verify=verify,
+            **client_kwargs,
+        )
+        self._client = None
+
+    def _ensure_client(self):
+        if self._client is None:
+            self._client = self._httpx.AsyncClient(**self._client_kwargs)
+        return self._client
+
+    async def send(self, request: TransportRequest) -> BufferedResponse:
+        httpx = self._httpx
+        kwargs: Dict[str, Any] = {"params": request.params, "headers": request.headers}
+        if request.files:
+            # Части отправляются потоком по мере чтения, без сборки тела в памяти
+            boundary = uuid.uuid4().hex
+            headers = {name: value for name, value in request.headers.items() if name.lower() != "content-type"}
+            headers["Content-Type"] = multipart_content_type(boundary)
+            kwargs["headers"] = headers
+            kwargs["content"] = iter_multipart(request, boundary)
+        elif request.form is not None:
+            kwargs["data"] = request.form
+        elif request.content is not None:
+            kwargs["content"] = request.content
+        if request.timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(request.timeout, connect=min(10, request.timeout))
+        else:
+            kwargs["timeout"] = httpx.Timeout(None, connect=10)
+
+        try:
+            response = await self._ensure_client().request(request.method, request.url, **kwargs)
+        except httpx.ConnectError as exc:
+            raise TransportConnectError(str(exc) or type(exc).__name__) from exc
+        except httpx.TransportError as exc:
+            raise TransportError(str(exc) or type(exc).__name__) from exc
+        return BufferedResponse(response.status_code, response.headers, response.content, request.json_codec)
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class ASGITransport(Transport):
+    \"\"\"
+    Транспорт без сети: запрос передается прямо в ASGI приложение
+    (FastAPI, Starlette, ...) в том же процессе и event loop.
+
+    Нет сокетов, TLS и ядра - в замерах остаются только клиент и
+    приложение, тесты с тысячами вызовов идут за секунды. Ответ проходит
+    тот же разбор, что и сетевой. Хост и схема берутся из URL клиента
+    (initialize("http://testserver", transport=ASGITransport(app))).
+
+    Multipart загрузка передается приложению кусками через receive
+    (more_body=True) по мере чтения файлов, без сборки тела в памяти.
+    Исключение приложения пробрасывается (raise_app_exceptions=True)
+    или превращается в ответ 500. Lifespan события не отправляются.
+    \"\"\"
+
+    name = "asgi"
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        raise_app_exceptions: bool = True,
+        root_path: str = "",
+        client: Tuple[str, int] = ("127.0.0.1", 123),
+    ):
+        self.app = app
+        self.raise_app_exceptions = raise_app_exceptions
+        self.root_path = root_path
+        self.client = client
+
+    def _scope(self, request: TransportRequest, url: Any, headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+        default_port = 443 if url.scheme == "https" else 80
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": url.scheme or "http",
+            "path": unquote(url.path) or "/",
+            "raw_path": (url.path or "/").encode(),
+            "query_string": _query_string(request, url.query).encode(),
+            "root_path": self.root_path,
+            "headers": headers,
+            "client": self.client,
+            "server": (url.hostname or "testserver", url.port or default_port),
+        }
+
+    async def send(self, request: TransportRequest) -> BufferedResponse:
+        body_chunks = None
+        if request.files:
+            boundary = uuid.uuid4().hex
+            body, content_type = b"", multipart_content_type(boundary)
+            body_chunks = iter_multipart(request, boundary)
+        else:
+            body, content_type = await encode_body(request)
+        url = urlsplit(request.url)
+        headers = [(b"host", url.netloc.encode())]
+        headers.extend(
+            (name.lower().encode(), str(value).encode()) for name, value in request.headers.items()
+            if name.lower() not in ("host", "content-length")
+        )
+        if content_type is not None:
+            headers = [header for header in headers if header[0] != b"content-type"]
+            headers.append((b"content-type", content_type.encode()))
+        if body_chunks is not None:
+            # Длина тела заранее не известна
+            headers.append((b"transfer-encoding", b"chunked"))
+        elif body or request.method in ("POST", "PUT", "PATCH"):
+            headers.append((b"content-length", str(len(body)).encode()))
+
+        request_sent = False
+        response_complete = asyncio.Event()
+        status = None
+        response_headers: List[Tuple[str, str]] = []
+        chunks: List[bytes] = []
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                if body_chunks is not None:
+                    try:
+                        return {"type": "http.request", "body": await body_chunks.__anext__(), "more_body": True}
+                    except StopAsyncIteration:
+                        pass
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Повторный receive - ожидание отключения клиента
+            await response_complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.extend(
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", ())
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_complete.set()
+
+        try:
+            await self.app(self._scope(request, url, headers), receive, send)
+        except Exception:
+            if self.raise_app_exceptions:
+                raise
+            # Ответ, начатый до исключения, отдается как есть
+            if status is None:
+                status = 500
+        finally:
+            response_complete.set()
+            if body_chunks is not None:
+                # Приложение могло ответить, не дочитав тело
+                await body_chunks.aclose()
+
+        if status is None:
+            raise TransportError("ASGI application did not send a response")
+        return BufferedResponse(status, CIMultiDictProxy(CIMultiDict(response_headers)), b"".join(chunks), request.json_codec)
+
+
+HandlerResult = Union[BufferedResponse, Tuple[int, Dict[str, str], Union[bytes, str]], Any]
+
+
+class HandlerTransport(Transport):
+    \"\"\"
+    Транспорт без сети: запрос обрабатывает обычная функция Python.
+
+    handler(request: TransportRequest) - sync или async - возвращает:
+    - BufferedResponse;
+    - кортеж (status, headers, body), body - bytes или str;
+    - любые JSON данные (dict, list, ...) - ответ 200 application/json.
+
+    Удобно для заглушек в тестах и для замера накладных расходов клиента
+    без HTTP стека. Тело запроса доступно через await encode_body(request).
+    \"\"\"
+
+    name = "handler"
+
+    def __init__(self, handler: Callable[[TransportRequest], Union[HandlerResult, Awaitable[HandlerResult]]], json_codec: Union[str, JsonCodec, None] = None):
+        self.handler = handler
+        self._json_codec = get_json_codec(json_codec)
+
+    async def send(self, request: TransportRequest) -> BufferedResponse:
+        result = self.handler(request)
+        if inspect.isawaitable(result):
+            result = await result
+        if isinstance(result, BufferedResponse):
+            return result
+        if isinstance(result, tuple) and len(result) == 3 and isinstance(result[0], int):
+            status, headers, body = result
+            if isinstance(body, str):
+                body = body.encode()
+            return BufferedResponse(status, CIMultiDictProxy(CIMultiDict(headers or {})), body, request.json_codec)
+        return BufferedResponse(
+            200,
+            CIMultiDictProxy(CIMultiDict({"content-type": "application/json"})),
+            self._json_codec.dumps(result),
+            request.json_codec,
+        )
+
+
+_transport_factories = {
+    "http2": HttpxTransport,
+}
+
+
+def get_transport(transport: Union[str, Transport, None]) -> Optional[Transport]:
+    \"\"\"
+    Транспорт по имени или объекту.
+
+    None или "aiohttp" - встроенная aiohttp сессия клиента (HTTP/1.1),
+    "http2" - HttpxTransport. Объект с методом send возвращается как есть.
+    \"\"\"
+    if transport is None or transport == "aiohttp":
+        return None
+    if isinstance(transport, str):
+        if transport not in _transport_factories:
+            raise ValueError(
+                f"Unknown transport: {transport} (available: aiohttp, {', '.join(_transport_factories)})"
+            )
+        return _transport_factories[transport]()
+    if not hasattr(transport, "send"):
+        raise TypeError("Transport must provide send(request)")
+    return transport
+"""
+
+    sync_common = """\"\"\"
+Синхронный HTTP клиент на базе httpx.Client с пулом соединений
+\"\"\"
+
+import contextvars
+import logging
+import mimetypes
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+from .. import constants
+from ..circuit_breaker import CircuitBreaker, CircuitOpen
+from ..common import CircuitOpenError, SendRequestError
+from ..json_codecs import JsonCodec, get_json_codec
+from ..retry import RetryPolicy
+from ..utils import FileUpload, drop_overridden_cookies
+from ..validation import check_validation_mode
+
+logger = logging.getLogger(__name__)
+
+
+class HttpxResponse:
+    \"\"\"Response объект с прочитанным телом (синхронный аналог AiohttpResponse)\"\"\"
+
+    __slots__ = ("status_code", "headers", "_response", "_json_codec")
+
+    def __init__(self, httpx_response: httpx.Response, json_codec: JsonCodec = None):
+        self.status_code = httpx_response.status_code
+        self.headers = httpx_response.headers
+        self._response = httpx_response
+        self._json_codec = json_codec or get_json_codec("json")
+
+    def read(self) -> bytes:
+        return self._response.content
+
+    def text(self) -> str:
+        # Декодирование с определением charset средствами httpx
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._json_codec.loads(self._response.content)
+
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def body(self) -> bytes:
+        return self._response.content
+
+
+class _UploadFile:
+    \"\"\"
+    Один файл multipart запроса (синхронные источники).
+
+    Пути открываются на каждую попытку, файловые объекты возвращаются к
+    исходной позиции перед повтором; файл без seek можно отправить один раз.
+    \"\"\"
+
+    __slots__ = ("field_name", "content", "filename", "content_type", "start", "replayable", "_opened")
+
+    def __init__(self, field_name: str, value: Any, default_filename: str):
+        filename = content_type = None
+        if isinstance(value, FileUpload):
+            filename, content_type, value = value.filename, value.content_type, value.content
+
+        self.field_name = field_name
+        self.start = None
+        self.replayable = True
+        self._opened = None
+
+        if isinstance(value, os.PathLike):
+            filename = filename or os.path.basename(os.fspath(value))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value) if not isinstance(value, bytes) else value
+        elif hasattr(value, "read"):
+            name = getattr(value, "name", None)
+            if filename is None and isinstance(name, str):
+                filename = os.path.basename(name)
+            try:
+                self.start = value.tell() if value.seekable() else None
+            except (AttributeError, OSError):
+                self.start = None
+            self.replayable = self.start is not None
+        else:
+            raise TypeError(f"Unsupported file value for '{field_name}': {type(value).__name__}")
+
+        self.content = value
+        self.filename = filename or default_filename
+        self.content_type = (
+            content_type
+            or mimetypes.guess_type(self.filename)[0]
+            or "application/octet-stream"
+        )
+
+    def payload(self) -> tuple:
+        \"\"\"Кортеж (имя, содержимое, content-type) для очередной попытки\"\"\"
+        content = self.content
+        if isinstance(content, os.PathLike):
+            self.close()
+            content = self._opened = open(content, "rb")
+        elif self.start is not None:
+            content.seek(self.start)
+        return self.filename, content, self.content_type
+
+    def close(self) -> None:
+        if self._opened is not None:
+            self._opened.close()
+            self._opened = None
+
+
+def _prepare_upload_files(files: Optional[Dict[str, Any]]) -> Optional[List[_UploadFile]]:
+    if not files:
+        return None
+    parts = []
+    for field_name, file_data in files.items():
+        if isinstance(file_data, list):
+            for i, single_file in enumerate(file_data):
+                parts.append(_UploadFile(field_name, single_file, f"{field_name}_{i}.bin"))
+        else:
+            parts.append(_UploadFile(field_name, file_data, f"{field_name}.bin"))
+    return parts
+
+
+class HttpxClient:
+    \"\"\"
+    Синхронный HTTP клиент на базе httpx.Client с connection pooling.
+
+    Один httpx.Client (и его пул keep-alive соединений) живет все время
+    работы клиента и безопасно используется из нескольких потоков: вызов
+    endpoint'а не создает ни сессию, ни соединение, если в пуле есть
+    свободное. Повторы и circuit breaker работают как в async клиенте.
+    \"\"\"
+
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._client_pid: Optional[int] = None
+        self._client_lock = threading.Lock()
+        self._api_url: Optional[str] = None
+        self._base_headers: Dict[str, str] = {}
+        self._base_cookies: Dict[str, str] = {}
+        # Временные headers/cookies видны только в своем потоке (контексте)
+        self._temp_headers: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar(
+            f"sync_temp_headers_{id(self)}", default={}
+        )
+        self._temp_cookies: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar(
+            f"sync_temp_cookies_{id(self)}", default={}
+        )
+        self._timeout: int = 30
+        self._retries: int = 3
+        self._retry_policy = RetryPolicy(max_attempts=self._retries)
+        self._limits = httpx.Limits(max_connections=100, max_keepalive_connections=10, keepalive_expiry=60)
+        self._circuit_breaker: Optional[CircuitBreaker] = None
+        self._json_codec: JsonCodec = get_json_codec()
+        self._validation: str = "full"
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        \"\"\"Получение текущих заголовков (базовые + временные текущего контекста)\"\"\"
+        return {**self._base_headers, **self._temp_headers.get()}
+
+    @headers.setter
+    def headers(self, value: Dict[str, str]):
+        self._base_headers = dict(value) if value else {}
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        \"\"\"Получение текущих куков (базовые + временные текущего контекста)\"\"\"
+        return {**self._base_cookies, **self._temp_cookies.get()}
+
+    @cookies.setter
+    def cookies(self, value: Dict[str, str]):
+        self._base_cookies = dict(value) if value else {}
+
+    def update_headers(self, **headers):
+        \"\"\"Обновление заголовков\"\"\"
+        self._base_headers = {**self._base_headers, **headers}
+        return self
+
+    def update_cookies(self, **cookies):
+        \"\"\"Обновление куков\"\"\"
+        self._base_cookies = {**self._base_cookies, **cookies}
+        return self
+
+    @contextmanager
+    def with_headers(self, **temp_headers):
+        \"\"\"Контекстный менеджер для временных заголовков (не виден другим потокам)\"\"\"
+        token = self._temp_headers.set({**self._temp_headers.get(), **temp_headers})
+        try:
+            yield self
+        finally:
+            self._temp_headers.reset(token)
+
+    @contextmanager
+    def with_cookies(self, **temp_cookies):
+        \"\"\"Контекстный менеджер для временных куков (аналогично with_headers)\"\"\"
+        token = self._temp_cookies.set({**self._temp_cookies.get(), **temp_cookies})
+        try:
+            yield self
+        finally:
+            self._temp_cookies.reset(token)
+
+    def _request_headers(self, headers: Dict[str, str] = None) -> Dict[str, str]:
+        \"\"\"Заголовки одного запроса: базовые < временные < заголовки endpoint'а\"\"\"
+        temp = self._temp_headers.get()
+        if not temp and not headers:
+            return self._base_headers
+        return {**self._base_headers, **temp, **(headers or {})}
+
+    def _request_cookies(self) -> Dict[str, str]:
+        temp = self._temp_cookies.get()
+        return {**self._base_cookies, **temp} if temp else self._base_cookies
+
+    def _ensure_client(self) -> httpx.Client:
+        client = self._client
+        if client is not None and self._client_pid == os.getpid():
+            return client
+        with self._client_lock:
+            if self._client is None or self._client_pid != os.getpid():
+                # После fork (prefork воркеры) сокеты родителя не переиспользуются:
+                # у процесса свой пул, родительский не закрывается
+                self._client = httpx.Client(
+                    timeout=httpx.Timeout(self._timeout, connect=10),
+                    limits=self._limits,
+                )
+                self._client_pid = os.getpid()
+            return self._client
+
+    def _encode_json_body(self, data: Any, files: dict = None, content_type: str = None) -> Optional[bytes]:
+        \"\"\"JSON body кодируется один раз для всех попыток\"\"\"
+        if data is constants.JSON_NULL:
+            return self._json_codec.dumps(None)
+        if not files and content_type != "application/x-www-form-urlencoded":
+            if isinstance(data, (dict, list, int, float, bool)):
+                return self._json_codec.dumps(data)
+        return None
+
+    def _build_request_kwargs(
+        self,
+        method: str,
+        full_url: str,
+        params: dict = None,
+        data: Union[dict, list, str] = None,
+        files: Optional[List[_UploadFile]] = None,
+        headers: Dict[str, str] = None,
+        json_body: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        \"\"\"Аргументы httpx.Client.request для одной попытки\"\"\"
+        headers = dict(self._request_headers(headers))
+        cookies = drop_overridden_cookies(self._request_cookies(), headers.get("Cookie"))
+        if cookies:
+            # Cookie заголовок вместо cookie jar: клиент общий для всех потоков
+            cookie_header = "; ".join(f"{name}={value}" for name, value in cookies.items())
+            endpoint_cookies = headers.get("Cookie")
+            headers["Cookie"] = f"{cookie_header}; {endpoint_cookies}" if endpoint_cookies else cookie_header
+
+        request_kwargs = {
+            "method": method,
+            "url": full_url,
+            "params": params,
+        }
+
+        if files:
+            request_kwargs["files"] = [(part.field_name, part.payload()) for part in files]
+            if data:
+                form = {}
+                for key, value in data.items():
+                    form[key] = [str(item) for item in value] if isinstance(value, list) else str(value)
+                request_kwargs["data"] = form
+        elif json_body is not None:
+            request_kwargs["content"] = json_body
+            if not any(key.lower() == "content-type" for key in headers):
+                headers["Content-Type"] = "application/json"
+        elif isinstance(data, dict):
+            request_kwargs["data"] = data
+        elif isinstance(data, str):
+            request_kwargs["content"] = data
+
+        if headers:
+            request_kwargs["headers"] = headers
+        return request_kwargs
+
+    def _acquire_circuits(self, endpoint: Optional[str], path: str):
+        \"\"\"Цепи circuit breaker для попытки; открытая цепь - CircuitOpenError сразу\"\"\"
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return None
+        try:
+            return breaker.acquire(self._api_url, endpoint)
+        except CircuitOpen as exc:
+            raise CircuitOpenError(str(exc), path=path, key=exc.key, retry_in=exc.retry_in) from None
+
+    def _send_request(
+        self,
+        method: str,
+        path: str,
+        content_type: str = None,
+        params: dict = None,
+        files: dict = None,
+        data: Union[dict, list, str] = None,
+        headers: Dict[str, str] = None,
+        endpoint: Optional[str] = None,
+    ) -> HttpxResponse:
+
+        if not self._api_url:
+            raise SendRequestError(
+                "API URL is empty",
+                path=path,
+                status_code=400,
+            )
+
+        full_url = f"{self._api_url.rstrip('/')}{path}"
+        policy = self._retry_policy
+        headers = policy.prepare_headers(method, headers)
+        # Повтор запроса, дошедшего до сервера, - только для идемпотентных
+        retryable = policy.is_retryable(method, headers)
+        replayable = True
+        json_body = self._encode_json_body(data, files, content_type)
+        upload_files = _prepare_upload_files(files)
+        if upload_files and not all(part.replayable for part in upload_files):
+            replayable = retryable = False
+
+        state = policy.start(time.monotonic())
+        breaker = self._circuit_breaker
+        client = self._ensure_client()
+
+        while True:
+            delay = None
+            circuits = self._acquire_circuits(endpoint, path)
+            started = time.monotonic()
+            try:
+                logger.debug(f"Making {method} request to {full_url}")
+
+                request_kwargs = self._build_request_kwargs(
+                    method, full_url, params, data, upload_files, headers, json_body
+                )
+                remaining = state.remaining(time.monotonic())
+                if remaining is not None and remaining < self._timeout:
+                    # Timeout попытки не выходит за общий deadline повторов
+                    request_kwargs["timeout"] = httpx.Timeout(remaining, connect=min(10, remaining))
+
+                try:
+                    response = client.request(**request_kwargs)
+                finally:
+                    for part in upload_files or ():
+                        part.close()
+
+                logger.debug(f"Response status: {response.status_code}")
+                if circuits:
+                    breaker.record(circuits, breaker.is_failure(response.status_code), time.monotonic() - started)
+                    circuits = None
+
+                if retryable and policy.should_retry_status(response.status_code):
+                    delay = state.next_delay(time.monotonic(), response.headers.get("Retry-After"))
+                if delay is None:
+                    return HttpxResponse(response, self._json_codec)
+                logger.warning(
+                    f"Response {response.status_code}, retry {state.attempt} in {delay:.2f}s"
+                )
+
+            except (httpx.InvalidURL, httpx.UnsupportedProtocol) as exc:
+                raise SendRequestError(str(exc), path=path, status_code=400)
+
+            except httpx.TransportError as exc:
+                if circuits:
+                    breaker.record(circuits, True, time.monotonic() - started)
+                    circuits = None
+
+                # Ошибка соединения - запрос не дошел до сервера, повтор безопасен
+                if retryable or (replayable and isinstance(exc, httpx.ConnectError)):
+                    delay = state.next_delay(time.monotonic())
+                if delay is None:
+                    raise SendRequestError(str(exc), path=path, status_code=503)
+                logger.warning(f"Request failed, retry {state.attempt} in {delay:.2f}s: {exc}")
+
+            except Exception as exc:
+                logger.error(f"Unexpected error: {exc}")
+                raise SendRequestError(str(exc), path=path, status_code=500)
+
+            finally:
+                if circuits:
+                    # Попытка прервана до ответа (KeyboardInterrupt и т.п.) - не учитывается
+                    breaker.release(circuits)
+
+            time.sleep(delay)
+
+    def initialize(
+        self,
+        api_url: str,
+        headers: Dict[str, str] = None,
+        cookies: Dict[str, str] = None,
+        timeout: int = 30,
+        retries: int = 3,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60,
+        json_codec: Union[str, JsonCodec, None] = None,
+        validation: str = "full",
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> "HttpxClient":
+        \"\"\"Инициализация клиента с настройками
+
+        max_connections - предел соединений пула, max_keepalive_connections -
+        сколько простаивающих соединений держать открытыми для повторного
+        использования, keepalive_expiry - сколько секунд они живут.
+        Остальные параметры - как у async ApiClient.initialize.
+        \"\"\"
+        self._api_url = str(api_url).rstrip("/")
+        self._json_codec = get_json_codec(json_codec)
+        self._validation = check_validation_mode(validation)
+
+        if headers:
+            self.headers = headers
+        if cookies:
+            self.cookies = cookies
+
+        self._timeout = int(timeout) if timeout else 30
+        self._retries = int(retries) if retries else 3
+        self._retry_policy = retry_policy or RetryPolicy(max_attempts=self._retries)
+        if circuit_breaker is not None:
+            self._circuit_breaker = circuit_breaker
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Пул с новыми настройками создается при следующем запросе
+        self.close()
+        return self
+
+    def close(self):
+        \"\"\"Закрытие пула соединений (клиент можно использовать дальше - пул создастся заново)\"\"\"
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None and self._client_pid == os.getpid():
+            client.close()
+
+    def health_check(self) -> bool:
+        \"\"\"Проверка здоровья API\"\"\"
+        try:
+            request_kwargs = self._build_request_kwargs("GET", f"{self._api_url}/health")
+            response = self._ensure_client().request(**request_kwargs)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def set_retry_policy(self, retry_policy: RetryPolicy):
+        \"\"\"Установка политики повторов запросов\"\"\"
+        self._retry_policy = retry_policy
+        self._retries = retry_policy.max_attempts
+        return self
+
+    def set_circuit_breaker(self, circuit_breaker: Optional[CircuitBreaker]):
+        \"\"\"Установка circuit breaker (None - отключить)\"\"\"
+        self._circuit_breaker = circuit_breaker
+        return self
+
+    def circuit_state(self) -> Dict[str, Dict[str, Any]]:
+        \"\"\"Состояние цепей circuit breaker: {ключ: {state, calls, failures, ...}}\"\"\"
+        return self._circuit_breaker.snapshot() if self._circuit_breaker is not None else {}
+
+    def set_auth_token(self, token: str):
+        \"\"\"Установка Bearer токена авторизации\"\"\"
+        return self.update_headers(Authorization=f"Bearer {token}")
+
+    def remove_auth(self):
+        \"\"\"Удаление авторизации\"\"\"
+        self._base_headers = {
+            key: value for key, value in self._base_headers.items() if key != "Authorization"
+        }
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+"""
+
+    sync_utils = """\"\"\"
+Выполнение запросов синхронного клиента: планы и парсинг ответа общие с async
+\"\"\"
+
+from typing import Any, Dict
+
+from ..utils import (
+    RequestPlan,
+    format_path_value,
+    get_union_type,
+    is_ndjson_content_type,
+    merge_form_data,
+    parse_ndjson,
+    serialize_query_value,
+    serialize_value,
+    merge_cookies_into_headers,
+    is_file_value,
+    validate_json_bytes,
+    validate_python_data,
+)
+from ..validation import check_validation_mode
+
+
+def execute_plan(client, plan: RequestPlan, values: Dict[str, Any], response_model=None, response_models=None, discriminator=None, discriminator_mapping=None, discriminator_fields=None) -> Any:
+    \"\"\"Выполнение запроса по скомпилированному плану\"\"\"
+    data = plan.build_body(values) if plan.body_slots or plan.body_required else None
+    files = None
+    if plan.file_slots:
+        files, form_data = plan.build_files(values)
+        data = merge_form_data(data, form_data)
+
+    return execute_request(
+        client,
+        plan.method,
+        plan.format_path(values),
+        params=plan.build_params(values) if plan.query_slots else None,
+        data=data,
+        files=files,
+        headers=plan.build_headers(values) if plan.header_slots or plan.cookie_slots else None,
+        response_model=response_model,
+        response_models=response_models,
+        discriminator=discriminator,
+        discriminator_mapping=discriminator_mapping,
+        discriminator_fields=discriminator_fields,
+        validation=values.get(plan.validation_arg) if plan.validation_arg else None,
+        endpoint=plan.endpoint,
+    )
+
+
+def execute_request(client, method: str, path: str, params=None, data=None, files=None, headers=None, response_model=None, response_models=None, discriminator=None, discriminator_mapping=None, discriminator_fields=None, validation=None, endpoint=None, route=None) -> Any:
+    \"\"\"
+    Отправка подготовленного запроса и парсинг response модели (блокирующий вызов).
+
+    route (ключ метрик async клиента) принимается для общего с async кодом вызова.
+    \"\"\"
+    validation = check_validation_mode(validation) if validation else client._validation
+    if response_models is not None:
+        response_model = get_union_type(response_models, discriminator, discriminator_mapping, discriminator_fields)
+
+    response = client._send_request(
+        method=method,
+        path=path,
+        params=params,
+        data=data,
+        files=files,
+        headers=headers,
+        endpoint=endpoint,
+    )
+    return _parse_response(client, response, response_model, validation)
+
+
+def _parse_response(client, response, response_model, validation: str) -> Any:
+    \"\"\"Разбор ответа по content-type и построение модели\"\"\"
+    if not hasattr(response, 'status_code'):
+        return response
+
+    content_type = response.headers.get('content-type', '').lower()
+
+    try:
+        if 'application/json' in content_type:
+            raw = response.read()
+            if response_model is not None and validation == "full":
+                # Быстрый путь: bytes -> модель одним вызовом без промежуточных dict
+                return validate_json_bytes(raw, response_model, client._json_codec.loads)
+            response_data = client._json_codec.loads(raw)
+        elif is_ndjson_content_type(content_type):
+            response_data = parse_ndjson(response.read(), client._json_codec.loads)
+        elif content_type.startswith('text/') or 'application/xml' in content_type:
+            response_data = response.text()
+        elif 'application/octet-stream' in content_type or 'application/zip' in content_type:
+            response_data = response.read()
+        else:
+            # Универсальная попытка JSON, fallback на text
+            try:
+                response_data = response.json()
+            except Exception:
+                try:
+                    response_data = response.text()
+                except Exception:
+                    response_data = response.read()
+
+    except Exception:
+        return response
+
+    if response_model is not None and isinstance(response_data, (dict, list)):
+        try:
+            return validate_python_data(response_data, response_model, validation)
+        except Exception:
+            pass
+
+    return response_data
+"""
+
+    sync_decorators = """\"\"\"
+HTTP декораторы для синхронных endpoints
+\"\"\"
+
+from functools import wraps
+from typing import Any, Callable, TypeVar
+
+from ..utils import RequestPlan, get_union_type
+from .utils import execute_plan
+
+DecoratedCallable = TypeVar("DecoratedCallable", bound=Callable[..., Any])
+
+
+def http_method(
+    method: str, path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, validation_arg="validation"
+) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    \"\"\"Базовый декоратор для HTTP методов (блокирующий вызов)\"\"\"
+
+    def decorator(func: DecoratedCallable) -> DecoratedCallable:
+        plan = RequestPlan(
+            func,
+            method,
+            path,
+            whole_body_fields=whole_body_fields,
+            field_mapping=field_mapping,
+            param_mapping=param_mapping,
+            body_required=body_required,
+            validation_arg=validation_arg,
+        )
+        parse_model = response_model
+        if response_models is not None:
+            parse_model = get_union_type(response_models, discriminator, discriminator_mapping, discriminator_fields)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            return execute_plan(
+                self.client,
+                plan,
+                plan.bind(args, kwargs),
+                response_model=parse_model,
+            )
+
+        wrapper._http_method = method
+        wrapper._http_path = path
+        wrapper._response_model = response_model
+        wrapper._original_func = func
+        wrapper._request_plan = plan
+        return wrapper
+    return decorator
+
+
+def _get(path: str, *args, **kwargs) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    return http_method("get", path, *args, **kwargs)
+
+
+def _post(path: str, *args, **kwargs) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    return http_method("post", path, *args, **kwargs)
+
+
+def _put(path: str, *args, **kwargs) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    return http_method("put", path, *args, **kwargs)
+
+
+def _delete(path: str, *args, **kwargs) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    return http_method("delete", path, *args, **kwargs)
+
+
+def _patch(path: str, *args, **kwargs) -> Callable[[DecoratedCallable], DecoratedCallable]:
+    return http_method("patch", path, *args, **kwargs)
+"""
+
+    sync_client = """from simple_singleton import Singleton
+from typing import TYPE_CHECKING
+
+from .common import HttpxClient
+
+if TYPE_CHECKING:
+{zone_imports}
+
+class SyncApiClient(HttpxClient, metaclass=Singleton):
+    def __init__(self) -> None:
+        super().__init__()
+{zone_assignments}
+"""
+
+    pagination = """\"\"\"
+Автопагинация: async итераторы по элементам всех страниц с предзагрузкой
+\"\"\"
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .constants import NOTSET
+
+STYLES = ("offset", "page", "cursor")
+
+_MISSING = object()
+
+
+def get_field(obj: Any, path: Optional[str]) -> Any:
+    \"\"\"
+    Значение поля ответа по пути "a.b" (dict, модель или атрибут).
+
+    Для pydantic моделей путь может содержать имя поля в JSON (alias).
+    \"\"\"
+    if not path:
+        return obj
+    for name in path.split("."):
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            obj = obj.get(name)
+            continue
+        value = getattr(obj, name, _MISSING)
+        if value is _MISSING:
+            fields = getattr(type(obj), "model_fields", {})
+            value = next(
+                (getattr(obj, field) for field, info in fields.items() if getattr(info, "alias", None) == name),
+                None,
+            )
+        obj = value
+    return obj
+
+
+class PageIterator:
+    \"\"\"
+    Элементы всех страниц endpoint'а одним async итератором.
+
+    config описывает пагинацию (генерируется из параметров endpoint'а или
+    расширения x-pagination):
+    - style: "offset" (limit/offset), "page" (page/size) или "cursor";
+    - limit, offset, page, size, cursor - имена аргументов метода страницы;
+    - items - путь к списку элементов в ответе (None - ответ сам список);
+    - next - путь к следующему курсору в ответе (для cursor);
+    - total - путь к общему числу элементов (необязательно);
+    - start - номер первой страницы (для page, по умолчанию 1).
+
+    prefetch - сколько следующих страниц загружается, пока потребляется
+    текущая. Для page запросы идут параллельно. Для offset смещение
+    следующей страницы - число реально полученных элементов, поэтому
+    параллельно страницы грузятся, только пока сервер отдает полные страницы
+    запрошенного размера; после неполной страницы предзагруженные отменяются
+    и загрузка продолжается с фактического смещения. Для cursor (и offset без
+    размера) следующую страницу можно запросить только после получения
+    текущей, поэтому предзагружается одна.
+
+    Итерация останавливается на пустой странице, пустом курсоре или при
+    достижении total. Неполная страница концом не считается: сервер мог
+    ограничить размер страницы меньше запрошенного. Лишние предзагруженные
+    страницы отменяются; aclose() / выход из async with отменяет все.
+    \"\"\"
+
+    def __init__(self, fetch: Callable[..., Awaitable[Any]], arguments: Dict[str, Any], config: Dict[str, Any], prefetch: int = 1):
+        style = config.get("style")
+        if style not in STYLES:
+            raise ValueError(f"Unknown pagination style: {style} (available: {', '.join(STYLES)})")
+        self._fetch = fetch
+        self._arguments = dict(arguments)
+        self._config = config
+        self.prefetch = max(0, int(prefetch))
+        self._size = self._page_size()
+        self._pending: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._buffer: Deque[Any] = deque()
+        self._next_page = 0
+        self._received = 0
+        # Смещение следующей запланированной offset страницы от начального
+        self._next_offset = 0
+        # Последняя offset страница была полной - размер подтвержден сервером
+        self._full_pages = False
+        self._cursor: Any = NOTSET
+        self._done = False
+        self.pages = 0
+        self.items = 0
+
+    def _page_size(self) -> Optional[int]:
+        name = self._config.get("limit") or self._config.get("size")
+        value = self._arguments.get(name, NOTSET) if name else NOTSET
+        return value if isinstance(value, int) and value > 0 else None
+
+    def _independent(self) -> bool:
+        \"\"\"Аргументы следующих страниц известны заранее - можно грузить параллельно\"\"\"
+        style = self._config["style"]
+        return style == "page" or (style == "offset" and self._full_pages)
+
+    def _page_arguments(self, number: int) -> Dict[str, Any]:
+        arguments = dict(self._arguments)
+        config = self._config
+        style = config["style"]
+        if style == "page":
+            first = arguments.get(config["page"], NOTSET)
+            arguments[config["page"]] = (config.get("start", 1) if first is NOTSET else first) + number
+        elif style == "offset":
+            arguments[config["offset"]] = self._arguments_offset() + self._next_offset
+            if self._independent():
+                # Следующая страница - сразу за этой, если и эта придет полной
+                self._next_offset += self._size
+        elif self._cursor is not NOTSET:
+            arguments[config["cursor"]] = self._cursor
+        return arguments
+
+    def _schedule(self, ahead: int) -> None:
+        \"\"\"Запуск загрузки следующих страниц, пока в очереди меньше ahead\"\"\"
+        if self._done:
+            return
+        if not self._independent():
+            # Следующая страница зависит от текущей
+            ahead = min(ahead, 1)
+        while len(self._pending) < ahead:
+            number = self._next_page
+            self._next_page += 1
+            self._pending.append((number, asyncio.ensure_future(self._fetch(**self._page_arguments(number)))))
+
+    def _cancel_pending(self) -> None:
+        while self._pending:
+            _, future = self._pending.popleft()
+            if future.done() and not future.cancelled():
+                # Ошибка лишней страницы не нужна - помечаем полученной
+                future.exception()
+            future.cancel()
+
+    def _accept(self, page: Any) -> List[Any]:
+        config = self._config
+        items = get_field(page, config.get("items"))
+        items = list(items) if items is not None else []
+        self.pages += 1
+        self._received += len(items)
+        last = not items
+        if config["style"] == "offset":
+            self._full_pages = self._size is not None and len(items) >= self._size
+            if not self._full_pages:
+                # Смещения предзагруженных страниц рассчитаны на полную страницу
+                self._cancel_pending()
+            if not self._pending:
+                self._next_offset = self._received
+        elif config["style"] == "cursor":
+            cursor = get_field(page, config.get("next"))
+            if cursor in (None, "") or cursor == self._cursor:
+                last = True
+            self._cursor = cursor
+        total = get_field(page, config["total"]) if config.get("total") else None
+        if isinstance(total, int) and self._received + self._arguments_offset() >= total:
+            last = True
+        if last:
+            self._done = True
+            self._cancel_pending()
+        return items
+
+    def _arguments_offset(self) -> int:
+        if self._config["style"] != "offset":
+            return 0
+        first = self._arguments.get(self._config["offset"], NOTSET)
+        return 0 if first is NOTSET else first
+
+    def __aiter__(self) -> "PageIterator":
+        return self
+
+    async def __anext__(self) -> Any:
+        while not self._buffer:
+            if self._done:
+                raise StopAsyncIteration
+            # Ожидаемая страница и prefetch следующих
+            self._schedule(self.prefetch + 1)
+            _, future = self._pending.popleft()
+            try:
+                page = await future
+            except BaseException:
+                self._done = True
+                self._cancel_pending()
+                raise
+            items = self._accept(page)
+            # Следующие страницы грузятся, пока потребитель разбирает эту
+            self._schedule(self.prefetch)
+            self._buffer.extend(items)
+        self.items += 1
+        return self._buffer.popleft()
+
+    async def collect(self) -> List[Any]:
+        \"\"\"Все элементы всех страниц списком\"\"\"
+        return [item async for item in self]
+
+    async def aclose(self) -> None:
+        \"\"\"Отмена предзагрузки\"\"\"
+        self._done = True
+        pending = [future for _, future in self._pending]
+        self._cancel_pending()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def __aenter__(self) -> "PageIterator":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+"""
+
+    batch = """\"\"\"
+Пакетный вызов endpoint'ов: .map() с ограничением параллельности
+\"\"\"
+
+import asyncio
+import functools
+import time
+from array import array
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Deque, Dict, Iterable, Optional, Tuple, Union
+
+DEFAULT_CONCURRENCY = 10
+
+ProgressCallback = Callable[["BatchStats"], None]
+
+
+def _call_arguments(item: Any) -> Tuple[tuple, Dict[str, Any]]:
+    \"\"\"Элемент входа .map(): dict - kwargs, tuple - позиционные аргументы, иначе один аргумент\"\"\"
+    if isinstance(item, dict):
+        return (), item
+    if isinstance(item, tuple):
+        return item, {}
+    return (item,), {}
+
+
+class BatchStats:
+    \"\"\"
+    Прогресс и задержки пакетного вызова.
+
+    Объект живой: on_progress получает один и тот же экземпляр после каждого
+    завершенного вызова. Перцентили считаются при обращении.
+    \"\"\"
+
+    __slots__ = ("submitted", "completed", "failed", "in_flight", "started_at", "finished_at", "_latencies")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self._latencies = array("d")
+
+    def _record(self, latency: float, failed: bool) -> None:
+        self._latencies.append(latency)
+        self.completed += 1
+        self.in_flight -= 1
+        if failed:
+            self.failed += 1
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        \"\"\"Завершенных вызовов в секунду\"\"\"
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        \"\"\"Задержка вызова (секунды) для перцентиля q в [0, 100]\"\"\"
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+    def snapshot(self) -> Dict[str, float]:
+        latencies = self._latencies
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50": self.percentile(50),
+            "latency_p95": self.percentile(95),
+            "latency_p99": self.percentile(99),
+            "latency_max": max(latencies) if latencies else 0.0,
+        }
+
+    def __repr__(self) -> str:
+        return f"BatchStats({self.completed}/{self.submitted} done, {self.failed} failed, {self.in_flight} in flight)"
+
+
+class BatchMap:
+    \"\"\"
+    Асинхронный итератор результатов пакетного вызова.
+
+    Одновременно выполняется не больше concurrency вызовов. Вход читается
+    лениво: следующий элемент берется, только когда освободился слот, поэтому
+    вход может быть большим генератором или async итератором. При ordered=True
+    результаты отдаются в порядке входа: вызовы в работе и готовые, но еще
+    не отданные результаты вместе занимают окно из window мест (по умолчанию
+    2 * concurrency). Пока первый по порядку вызов не завершен, остальные
+    продолжают запускаться в пределах окна; медленный потребитель
+    останавливает новые вызовы (backpressure). window = concurrency - строгая
+    граница памяти ценой простоя слотов за медленным вызовом. При
+    ordered=False результаты отдаются по мере готовности, новые вызовы
+    запускаются только после того, как готовые результаты отданы.
+
+    Исключение вызова при return_exceptions=False отменяет остальные вызовы
+    и пробрасывается из итерации; при True - отдается как результат.
+    Выход из async with (или aclose(), или отмена потребителя) отменяет
+    все незавершенные вызовы.
+    \"\"\"
+
+    def __init__(
+        self,
+        call: Callable[..., Any],
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        return_exceptions: bool = False,
+        ordered: bool = True,
+        on_progress: Optional[ProgressCallback] = None,
+        window: Optional[int] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        if window is None:
+            window = concurrency * 2
+        elif window < concurrency:
+            raise ValueError("window must be >= concurrency")
+        self._call = call
+        if hasattr(items, "__aiter__"):
+            self._source: Any = items.__aiter__()
+            self._async_source = True
+        else:
+            self._source = iter(items)
+            self._async_source = False
+        self.concurrency = concurrency
+        self.return_exceptions = return_exceptions
+        self.ordered = ordered
+        self.window = window
+        self._on_progress = on_progress
+        self._running: Dict[asyncio.Task, int] = {}
+        # ordered: индекс -> (успех, значение); иначе очередь готовых (индекс, успех, значение)
+        self._ready: Dict[int, Tuple[bool, Any]] = {}
+        self._queue: Deque[Tuple[int, bool, Any]] = deque()
+        self._next_index = 0
+        self._exhausted = False
+        self._closed = False
+        self.stats = BatchStats()
+
+    # --- запуск вызовов ---
+
+    async def _next_item(self) -> Tuple[bool, Any]:
+        try:
+            if self._async_source:
+                return True, await self._source.__anext__()
+            return True, next(self._source)
+        except (StopIteration, StopAsyncIteration):
+            self._exhausted = True
+            return False, None
+
+    def _pending(self) -> int:
+        return len(self._running) + (len(self._ready) if self.ordered else 0)
+
+    async def _fill(self) -> None:
+        # В ordered режиме готовые, но не отданные результаты тоже занимают окно
+        limit = self.window if self.ordered else self.concurrency
+        while not self._exhausted and len(self._running) < self.concurrency and self._pending() < limit:
+            has_item, item = await self._next_item()
+            if not has_item:
+                break
+            index = self.stats.submitted
+            self.stats.submitted += 1
+            self.stats.in_flight += 1
+            self._running[asyncio.ensure_future(self._invoke(item))] = index
+
+    async def _invoke(self, item: Any) -> Tuple[float, bool, Any]:
+        args, kwargs = _call_arguments(item)
+        started = time.perf_counter()
+        try:
+            result = await self._call(*args, **kwargs)
+        except Exception as exc:
+            return time.perf_counter() - started, False, exc
+        return time.perf_counter() - started, True, result
+
+    def _collect(self, task: asyncio.Task) -> None:
+        index = self._running.pop(task)
+        latency, ok, value = task.result()
+        self.stats._record(latency, not ok)
+        if self.ordered:
+            self._ready[index] = (ok, value)
+        else:
+            self._queue.append((index, ok, value))
+        if self._on_progress is not None:
+            self._on_progress(self.stats)
+
+    # --- итерация ---
+
+    def _take(self) -> Optional[Tuple[int, bool, Any]]:
+        if self.ordered:
+            outcome = self._ready.pop(self._next_index, None)
+            if outcome is None:
+                return None
+            index = self._next_index
+            self._next_index += 1
+            return (index, *outcome)
+        return self._queue.popleft() if self._queue else None
+
+    async def _next_outcome(self) -> Tuple[int, Any]:
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            while True:
+                taken = self._take()
+                if taken is not None:
+                    index, ok, value = taken
+                    if not ok and not self.return_exceptions:
+                        raise value
+                    return index, value
+                await self._fill()
+                if not self._running:
+                    self._finish()
+                    raise StopAsyncIteration
+                done, _ = await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    self._collect(task)
+        except StopAsyncIteration:
+            raise
+        except BaseException:
+            # Ошибка, отмена потребителя или входа - незавершенные вызовы отменяются
+            await self.aclose()
+            raise
+
+    def __aiter__(self) -> "BatchMap":
+        return self
+
+    async def __anext__(self) -> Any:
+        return (await self._next_outcome())[1]
+
+    async def indexed(self) -> AsyncIterator[Tuple[int, Any]]:
+        \"\"\"Пары (индекс элемента входа, результат) - для ordered=False\"\"\"
+        while True:
+            try:
+                yield await self._next_outcome()
+            except StopAsyncIteration:
+                return
+
+    async def collect(self) -> list:
+        \"\"\"Все результаты списком (в порядке входа при ordered=True)\"\"\"
+        return [value async for value in self]
+
+    def _finish(self) -> None:
+        self._closed = True
+        if self.stats.finished_at is None:
+            self.stats.finished_at = time.perf_counter()
+
+    async def aclose(self) -> None:
+        \"\"\"Отмена незавершенных вызовов и ожидание их остановки\"\"\"
+        self._finish()
+        running = list(self._running)
+        self._running.clear()
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+            self.stats.in_flight -= len(running)
+        if self._async_source and hasattr(self._source, "aclose"):
+            await self._source.aclose()
+
+    async def __aenter__(self) -> "BatchMap":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+
+class BoundEndpoint(functools.partial):
+    \"\"\"Endpoint, привязанный к экземпляру класса endpoints: вызов + .map()\"\"\"
+
+    def map(
+        self,
+        items: Union[Iterable[Any], AsyncIterable[Any]],
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+        ordered: bool = True,
+        on_progress: Optional[ProgressCallback] = None,
+        window: Optional[int] = None,
+    ) -> BatchMap:
+        \"\"\"
+        Вызов endpoint'а для каждого элемента items (dict - именованные
+        аргументы, tuple - позиционные) не больше чем concurrency вызовами
+        одновременно. По умолчанию concurrency равен лимиту соединений пула
+        на хост; window - окно ordered режима (см. BatchMap). Возвращает
+        BatchMap - async итератор результатов со статистикой в .stats:
+
+            async with client.users.get_user.map({"user_id": i} for i in ids) as results:
+                async for user in results:
+                    ...
+        \"\"\"
+        if concurrency is None:
+            pool = getattr(getattr(self.args[0], "client", None), "_connection_pool", None)
+            concurrency = getattr(pool, "max_connections_per_host", None) or DEFAULT_CONCURRENCY
+        return BatchMap(self, items, concurrency, return_exceptions, ordered, on_progress, window)
+
+
+class EndpointMethod:
+    \"\"\"
+    Метод endpoint'а с поддержкой .map().
+
+    При первом обращении через экземпляр привязанный endpoint кешируется
+    в __dict__ экземпляра, поэтому обычный вызов не проходит через
+    дескриптор и стоит как вызов functools.partial.
+    \"\"\"
+
+    def __init__(self, func: Callable[..., Any]):
+        self.func = func
+        self.name = func.__name__
+        functools.update_wrapper(self, func)
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        bound = BoundEndpoint(self.func, instance)
+        bound.__name__ = self.name
+        bound.__doc__ = self.func.__doc__
+        bound.__wrapped__ = self.func
+        instance.__dict__[self.name] = bound
+        return bound
+
+    def __getattr__(self, name: str) -> Any:
+        # Метаданные декоратора (_http_method, _request_plan, ...) остаются доступны
+        return getattr(self.__dict__["func"], name)
+
+
+def endpoint_method(func: Callable[..., Any]) -> EndpointMethod:
+    \"\"\"Декоратор метода endpoint'а: добавляет .map()\"\"\"
+    return EndpointMethod(func)
+"""
+
+    disk_cache = """\"\"\"
+Постоянный кеш GET ответов в sqlite, общий для нескольких процессов
+\"\"\"
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from .cache import CacheEntry, ParseFunc, ResponseCache
+from .json_codecs import JsonCodec, get_json_codec
+
+_SCHEMA = \"\"\"
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_url ON responses (url);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+\"\"\"
+
+# Заголовки тела в том виде, как оно шло по сети: на диске лежит уже
+# раскодированное тело, и восстановленный ответ не должен их повторять
+_UNSTORED_HEADERS = frozenset(("content-encoding", "content-length"))
+
+
+def _stable(value: Any) -> Any:
+    \"\"\"Представление ключа, одинаковое во всех процессах (без hash seed и id объектов)\"\"\"
+    if isinstance(value, frozenset):
+        return sorted((_stable(item) for item in value), key=repr)
+    if isinstance(value, (tuple, list)):
+        return [_stable(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def storage_key(key: Hashable) -> str:
+    \"\"\"
+    Ключ записи на диске.
+
+    В хранилище лежат сырые ответы, поэтому учитывается только часть ключа
+    запроса (метод, URL, query, headers, cookies), без модели ответа и режима
+    валидации - разобрать bytes можно в любую модель.
+    \"\"\"
+    request_part = key[:5] if isinstance(key, tuple) else key
+    return hashlib.sha256(json.dumps(_stable(request_part)).encode()).hexdigest()
+
+
+class CachedResponse:
+    \"\"\"Ответ, восстановленный из хранилища: интерфейс AiohttpResponse для разбора\"\"\"
+
+    __slots__ = ("status_code", "headers", "_content", "_json_codec")
+
+    def __init__(self, status_code: int, headers: List[Tuple[str, str]], content: bytes, json_codec: JsonCodec = None):
+        self.status_code = status_code
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._content = content
+        self._json_codec = json_codec or get_json_codec()
+
+    async def read(self) -> bytes:
+        return self._content
+
+    async def content(self) -> bytes:
+        return self._content
+
+    async def text(self) -> str:
+        charset = "utf-8"
+        for part in self.headers.get("Content-Type", "").split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                charset = value.strip('"')
+        return self._content.decode(charset, errors="replace")
+
+    async def json(self) -> Any:
+        return self._json_codec.loads(self._content)
+
+    @property
+    def body(self) -> bytes:
+        return self._content
+
+
+class DiskResponseCache(ResponseCache):
+    \"\"\"
+    Кеш GET ответов на диске (sqlite) поверх кеша в памяти.
+
+    На диске хранятся сырые тела ответов с заголовками, ETag / Last-Modified
+    и сроками свежести, поэтому после перезапуска свежие записи отдаются без
+    запросов к серверу, а устаревшие проверяются условным запросом. Один файл
+    можно использовать из нескольких процессов: sqlite блокирует файл на время
+    записи (WAL журнал, ожидание блокировки до busy_timeout секунд).
+
+    max_bytes - предел размера тел на диске (вытесняются давно не читанные),
+    memory_bytes - предел разобранных ответов в памяти процесса, json_codec -
+    кодек для json() восстановленных ответов (имя из реестра или объект, как
+    json_codec клиента). Остальные параметры - как у ResponseCache.
+    \"\"\"
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, memory_bytes: int = 16 * 1024 * 1024, busy_timeout: float = 30.0, json_codec: Union[str, JsonCodec, None] = None, **kwargs):
+        super().__init__(max_bytes=memory_bytes, **kwargs)
+        self.path = os.fspath(path)
+        self._json_codec = get_json_codec(json_codec)
+        self.disk_max_bytes = int(max_bytes)
+        self.busy_timeout = busy_timeout
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        # Один поток - операции с файлом идут по порядку и не блокируют event loop
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+
+    # --- sqlite (только в потоке executor) ---
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _read(self, disk_key: str) -> Optional[tuple]:
+        db = self._db()
+        row = db.execute(
+            "SELECT status, headers, body, etag, last_modified, expires_at, stale_until, size FROM responses WHERE key = ?",
+            (disk_key,),
+        ).fetchone()
+        if row is not None:
+            db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), disk_key))
+        return row
+
+    def _write(self, disk_key: str, url: str, response: Optional[Tuple[int, str, bytes]], entry: CacheEntry) -> int:
+        db = self._db()
+        now = time.time()
+        # BEGIN IMMEDIATE сразу берет блокировку записи файла
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if response is None:
+                db.execute(
+                    "UPDATE responses SET expires_at = ?, stale_until = ?, accessed_at = ? WHERE key = ?",
+                    (entry.expires_at, entry.stale_until, now, disk_key),
+                )
+                db.execute("COMMIT")
+                return 0
+            status, headers, body = response
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (disk_key, url, status, headers, body, entry.etag, entry.last_modified, entry.expires_at, entry.stale_until, len(body), now),
+            )
+            evicted = self._evict(db)
+            db.execute("COMMIT")
+            return evicted
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total <= self.disk_max_bytes:
+            return evicted
+        for disk_key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (disk_key,))
+            evicted += 1
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+        return evicted
+
+    def _delete(self, column: str, value: Optional[str]) -> None:
+        db = self._db()
+        if value is None:
+            db.execute("DELETE FROM responses")
+        else:
+            db.execute(f"DELETE FROM responses WHERE {column} = ?", (value,))
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # --- точки расширения ResponseCache ---
+
+    async def _load(self, key: Hashable, url: str, parse: ParseFunc) -> Optional[CacheEntry]:
+        row = await self._run(self._read, storage_key(key))
+        if row is None:
+            return None
+        status, headers, body, etag, last_modified, expires_at, stale_until, size = row
+        value = await parse(CachedResponse(status, json.loads(headers), body, self._json_codec))
+        entry = CacheEntry(value, etag, last_modified, expires_at, stale_until, size, url)
+        self.disk_hits += 1
+        self._put(key, entry)
+        return entry
+
+    async def _persist(self, key: Hashable, entry: Optional[CacheEntry], response: Any) -> None:
+        disk_key = storage_key(key)
+        if entry is None:
+            await self._run(self._delete, "key", disk_key)
+            return
+        raw = None
+        if response is not None:
+            headers = [(name, value) for name, value in response.headers.items() if name.lower() not in _UNSTORED_HEADERS]
+            raw = (response.status_code, json.dumps(headers), bytes(response.body))
+        self.disk_evictions += await self._run(self._write, disk_key, entry.url, raw, entry)
+
+    async def invalidate_url(self, url: str) -> None:
+        await super().invalidate_url(url)
+        await self._run(self._delete, "url", url)
+
+    async def clear(self) -> None:
+        await super().clear()
+        await self._run(self._delete, "url", None)
+
+    async def close(self) -> None:
+        \"\"\"
+        Закрытие файла кеша: дожидается очереди операций и останавливает поток.
+
+        Следующее обращение к кешу снова откроет файл.
+        \"\"\"
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+
+        def close_connection():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        await asyncio.get_running_loop().run_in_executor(executor, close_connection)
+        executor.shutdown()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_evictions"] = self.disk_evictions
+        return stats
+"""
+
+    cache = """\"\"\"
+Кеш GET ответов: Cache-Control, ETag / Last-Modified, LRU по размеру
+и stale-while-revalidate
+\"\"\"
+
+import asyncio
+import copy
+import email.utils
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Collection, Dict, Hashable, Mapping, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# send(дополнительные headers) -> ответ с status_code/headers/body, parse(ответ) -> значение
+SendFunc = Callable[[Dict[str, str]], Awaitable[Any]]
+ParseFunc = Callable[[Any], Awaitable[Any]]
+# coalesce(ключ, фабрика) - объединение одинаковых запросов к серверу (SingleFlight.do)
+CoalesceFunc = Callable[[Hashable, Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    \"\"\"Cache-Control: директивы в нижнем регистре -> значение (или None)\"\"\"
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class CacheEntry:
+    \"\"\"Сохраненный ответ: разобранное значение, валидаторы и сроки свежести\"\"\"
+
+    __slots__ = ("value", "etag", "last_modified", "expires_at", "stale_until", "size", "url")
+
+    def __init__(self, value: Any, etag: Optional[str], last_modified: Optional[str], expires_at: float, stale_until: float, size: int, url: str):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.url = url
+
+
+class ResponseCache:
+    \"\"\"
+    Кеш разобранных ответов GET endpoint'ов в памяти процесса.
+
+    Срок свежести берется из Cache-Control max-age (или Expires), endpoint_ttl
+    задает его явно для "Класс.метод", default_ttl - для ответов без этих
+    заголовков. no-store не сохраняется, no-cache сохраняется, но каждый раз
+    проверяется на сервере. Устаревшая запись с ETag / Last-Modified
+    проверяется условным запросом, и 304 отдает сохраненное значение.
+
+    В окне stale-while-revalidate (директива ответа или параметр) устаревшая
+    запись отдается сразу, а обновление идет в фоне. Размер ограничен
+    max_bytes (по размеру тела ответа) с вытеснением по LRU. Запросы
+    остальными методами на тот же URL сбрасывают его записи.
+
+    Каждый вызов, в том числе объединенный SingleFlight, получает свою копию
+    значения (copy.deepcopy), поэтому изменения модели не попадают в кеш и к
+    другим вызовам. copy_values=False отдает сохраненный объект без
+    копирования: быстрее для больших ответов, но он общий для всех вызовов и
+    изменять его на месте нельзя.
+    \"\"\"
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 0.0,
+        endpoint_ttl: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: float = 0.0,
+        methods: Collection[str] = ("GET",),
+        copy_values: bool = True,
+    ):
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = float(default_ttl)
+        self.endpoint_ttl = dict(endpoint_ttl or {})
+        self.stale_while_revalidate = float(stale_while_revalidate)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.copy_values = copy_values
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._by_url: Dict[str, Set[Hashable]] = {}
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def accepts(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    # --- хранилище ---
+
+    def _get(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: Hashable, entry: CacheEntry) -> None:
+        self._remove(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._by_url.setdefault(entry.url, set()).add(key)
+        self.bytes += entry.size
+        self.stores += 1
+        while self.bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        keys = self._by_url.get(entry.url)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_url[entry.url]
+
+    async def invalidate_url(self, url: str) -> None:
+        \"\"\"Сброс всех записей URL (все варианты query/headers)\"\"\"
+        for key in list(self._by_url.get(url, ())):
+            self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._by_url.clear()
+        self.bytes = 0
+
+    async def close(self) -> None:
+        \"\"\"Освобождение ресурсов хранилища (вызывается из close() клиента)\"\"\"
+
+    # --- свежесть ---
+
+    def _lifetime(self, headers: Mapping[str, str], endpoint: Optional[str], now: float):
+        \"\"\"(можно ли сохранять, ttl, окно stale-while-revalidate)\"\"\"
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in directives:
+            return False, 0.0, 0.0
+        ttl = None
+        if endpoint is not None and endpoint in self.endpoint_ttl:
+            ttl = self.endpoint_ttl[endpoint]
+        elif "no-cache" in directives:
+            ttl = 0.0
+        elif "max-age" in directives:
+            ttl = _seconds(directives["max-age"])
+        elif headers.get("Expires"):
+            try:
+                ttl = max(0.0, email.utils.parsedate_to_datetime(headers["Expires"]).timestamp() - now)
+            except (TypeError, ValueError):
+                ttl = 0.0
+        if ttl is None:
+            ttl = self.default_ttl
+        stale = _seconds(directives.get("stale-while-revalidate"))
+        return True, ttl, self.stale_while_revalidate if stale is None else stale
+
+    def _apply_lifetime(self, entry: CacheEntry, headers: Mapping[str, str], endpoint: Optional[str], now: float) -> bool:
+        storable, ttl, stale = self._lifetime(headers, endpoint, now)
+        entry.expires_at = now + ttl
+        entry.stale_until = entry.expires_at + stale
+        return storable
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # --- запрос через кеш ---
+
+    async def fetch(self, key: Hashable, url: str, endpoint: Optional[str], send: SendFunc, parse: ParseFunc, coalesce: Optional[CoalesceFunc] = None) -> Any:
+        \"\"\"Значение из кеша или с сервера (с условным запросом, если есть валидаторы)\"\"\"
+        entry = self._get(key)
+        if entry is None:
+            entry = await self._load(key, url, parse)
+        now = time.time()
+        if entry is not None:
+            if now < entry.expires_at:
+                self.hits += 1
+                return self._copy(entry.value)
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._refresh_in_background(key, url, endpoint, send, parse, entry)
+                return self._copy(entry.value)
+        self.misses += 1
+        if coalesce is not None:
+            # Результат один на всех ожидающих: копию получает каждый
+            value = await coalesce(key, lambda: self._revalidate(key, url, endpoint, send, parse, entry, copy_value=False))
+            return self._copy(value)
+        return await self._revalidate(key, url, endpoint, send, parse, entry)
+
+    async def _revalidate(self, key: Hashable, url: str, endpoint: Optional[str], send: SendFunc, parse: ParseFunc, entry: Optional[CacheEntry], copy_value: bool = True) -> Any:
+        response = await send(self._conditional_headers(entry))
+        now = time.time()
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            if self._apply_lifetime(entry, response.headers, endpoint, now):
+                if key not in self._entries:
+                    self._put(key, entry)
+                await self._persist(key, entry, None)
+            else:
+                self._remove(key)
+                await self._persist(key, None, None)
+            return self._copy(entry.value) if copy_value else entry.value
+
+        value = await parse(response)
+        if response.status_code == 200:
+            stored = self._store(key, url, endpoint, response, value, now)
+            await self._persist(key, stored, response)
+            if stored is not None and copy_value:
+                return self._copy(stored.value)
+        return value
+
+    def _copy(self, value: Any) -> Any:
+        return copy.deepcopy(value) if self.copy_values else value
+
+    # --- точки расширения для постоянного хранилища (DiskResponseCache) ---
+
+    async def _load(self, key: Hashable, url: str, parse: ParseFunc) -> Optional[CacheEntry]:
+        \"\"\"Запись из постоянного хранилища при промахе в памяти\"\"\"
+        return None
+
+    async def _persist(self, key: Hashable, entry: Optional[CacheEntry], response: Any) -> None:
+        \"\"\"Сохранение записи (response=None - только новые сроки, entry=None - удаление)\"\"\"
+
+    def _store(self, key: Hashable, url: str, endpoint: Optional[str], response: Any, value: Any, now: float) -> Optional[CacheEntry]:
+        headers = response.headers
+        entry = CacheEntry(
+            value,
+            headers.get("ETag"),
+            headers.get("Last-Modified"),
+            now,
+            now,
+            len(response.body),
+            url,
+        )
+        if not self._apply_lifetime(entry, headers, endpoint, now):
+            self._remove(key)
+            return None
+        if entry.stale_until <= now and not (entry.etag or entry.last_modified):
+            # Без срока свежести и валидаторов запись бесполезна
+            self._remove(key)
+            return None
+        self._put(key, entry)
+        return entry
+
+    def _refresh_in_background(self, key: Hashable, url: str, endpoint: Optional[str], send: SendFunc, parse: ParseFunc, entry: CacheEntry) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(self._revalidate(key, url, endpoint, send, parse, entry, copy_value=False))
+        self._refreshing[key] = task
+
+        def done(finished: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.warning(f"Background revalidation of {url} failed: {finished.exception()}")
+
+        task.add_done_callback(done)
+
+    def stats(self) -> Dict[str, int]:
+        \"\"\"Счетчики кеша: hits, stale_hits, misses, revalidated (304), stores, evictions, bytes, entries\"\"\"
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes": self.bytes,
+            "entries": len(self._entries),
+        }
+"""
+
+    single_flight = """\"\"\"
+Single-flight: объединение одинаковых конкурентных запросов в один HTTP вызов
+\"\"\"
+
+import asyncio
+from typing import Any, Awaitable, Callable, Collection, Dict, Hashable, Mapping, Optional
+
+
+class _LeaderCancelled(Exception):
+    \"\"\"Задача, выполнявшая общий запрос, отменена - ожидающие повторяют сами\"\"\"
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def request_key(
+    method: str,
+    url: str,
+    params: Optional[Mapping[str, Any]],
+    headers: Optional[Mapping[str, str]],
+    cookies: Optional[Mapping[str, str]],
+    *extra: Hashable,
+) -> Hashable:
+    \"\"\"Ключ запроса для объединения и кеша: метод, URL, query, headers, cookies\"\"\"
+    return (
+        method.upper(),
+        url,
+        _freeze(params or {}),
+        frozenset((key.lower(), value) for key, value in (headers or {}).items()),
+        frozenset((cookies or {}).items()),
+        extra,
+    )
+
+
+class SingleFlight:
+    \"\"\"
+    Пока запрос с тем же ключом выполняется, новые вызовы не идут в сеть,
+    а ждут его результат: один HTTP запрос, один разбор ответа, общий результат
+    или исключение для всех ожидающих.
+
+    Ключ - метод, базовый URL, путь, отсортированные query параметры, итоговые
+    headers/cookies запроса, модель ответа и режим валидации. Объединяются
+    только методы из methods (по умолчанию GET и HEAD) без тела.
+
+    Результат - один и тот же объект для всех ожидающих: изменять его на месте
+    не следует.
+    \"\"\"
+
+    def __init__(self, methods: Collection[str] = ("GET", "HEAD")):
+        self.methods = frozenset(method.upper() for method in methods)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def accepts(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    make_key = staticmethod(request_key)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        \"\"\"Выполнение call() или ожидание уже идущего вызова с тем же ключом\"\"\"
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.shared += 1
+            try:
+                # shield: отмена одного ожидающего не отменяет общий запрос
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.calls += 1
+        try:
+            result = await call()
+        except BaseException as exc:
+            future.set_exception(_LeaderCancelled() if isinstance(exc, asyncio.CancelledError) else exc)
+            # Исключение помечается полученным - без warning, если ожидающих нет
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        \"\"\"calls - реальные HTTP вызовы, shared - вызовы, получившие чужой результат\"\"\"
+        return {"calls": self.calls, "shared": self.shared, "inflight": len(self._inflight)}
+"""
+
+    circuit_breaker = """\"\"\"
+Circuit breaker для запросов клиента: closed / open / half-open
+
+Цепь ведется на базовый URL и, опционально, на каждый endpoint ("Класс.метод").
+Доля ошибок и медленных вызовов считается в скользящем временном окне.
+\"\"\"
+
+import time
+from collections import deque
+from typing import Callable, Collection, Deque, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+
+StateListener = Callable[[str, str, str], None]
+
+
+class CircuitOpen(Exception):
+    \"\"\"Цепь открыта - запрос отклонен без обращения к серверу\"\"\"
+
+    def __init__(self, key: str, state: str, retry_in: float):
+        super().__init__(f"Circuit {key} is {state}, retry in {retry_in:.1f}s")
+        self.key = key
+        self.state = state
+        self.retry_in = retry_in
+
+
+class _Window:
+    \"\"\"Скользящее окно из buckets временных корзин: O(1) на запись\"\"\"
+
+    __slots__ = ("size", "span", "buckets", "calls", "failures", "slow")
+
+    def __init__(self, size: float, buckets: int = 10):
+        self.size = size
+        self.span = size / buckets
+        # [начало корзины, вызовы, ошибки, медленные]
+        self.buckets: Deque[List[float]] = deque()
+        self.calls = 0
+        self.failures = 0
+        self.slow = 0
+
+    def _expire(self, now: float) -> None:
+        while self.buckets and self.buckets[0][0] <= now - self.size:
+            _, calls, failures, slow = self.buckets.popleft()
+            self.calls -= calls
+            self.failures -= failures
+            self.slow -= slow
+
+    def add(self, now: float, failed: bool, slow: bool) -> None:
+        self._expire(now)
+        if not self.buckets or now - self.buckets[-1][0] >= self.span:
+            self.buckets.append([now, 0, 0, 0])
+        bucket = self.buckets[-1]
+        bucket[1] += 1
+        self.calls += 1
+        if failed:
+            bucket[2] += 1
+            self.failures += 1
+        if slow:
+            bucket[3] += 1
+            self.slow += 1
+
+    def counts(self, now: float):
+        self._expire(now)
+        return self.calls, self.failures, self.slow
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.calls = self.failures = self.slow = 0
+
+
+class Circuit:
+    \"\"\"Состояние одной цепи\"\"\"
+
+    __slots__ = ("key", "breaker", "state", "window", "opened_at", "probes", "probe_successes", "transitions")
+
+    def __init__(self, key: str, breaker: "CircuitBreaker"):
+        self.key = key
+        self.breaker = breaker
+        self.state = CLOSED
+        self.window = _Window(breaker.window)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        self.transitions = 0
+
+    def _set_state(self, state: str, now: float) -> None:
+        previous, self.state = self.state, state
+        self.transitions += 1
+        if state == OPEN:
+            self.opened_at = now
+        elif state == HALF_OPEN:
+            self.probes = self.probe_successes = 0
+        else:
+            self.window.clear()
+        self.breaker._notify(self.key, previous, state)
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.opened_at + self.breaker.open_timeout - now) if self.state == OPEN else 0.0
+
+    def try_acquire(self, now: float) -> bool:
+        if self.state == OPEN:
+            if now - self.opened_at < self.breaker.open_timeout:
+                return False
+            self._set_state(HALF_OPEN, now)
+        if self.state == HALF_OPEN:
+            if self.probes >= self.breaker.half_open_max_calls:
+                return False
+            self.probes += 1
+        return True
+
+    def release(self) -> None:
+        \"\"\"Попытка не состоялась (отмена) - слот пробы освобождается\"\"\"
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def record(self, now: float, failed: bool, duration: float) -> None:
+        breaker = self.breaker
+        slow = breaker.slow_call_duration is not None and duration >= breaker.slow_call_duration
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._set_state(OPEN, now)
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= breaker.half_open_max_calls:
+                self._set_state(CLOSED, now)
+            return
+        if self.state == OPEN:
+            # Ответ на запрос, начатый до открытия цепи
+            return
+
+        self.window.add(now, failed, slow)
+        calls, failures, slow_calls = self.window.counts(now)
+        if calls < breaker.min_calls:
+            return
+        if failures / calls >= breaker.failure_rate or (
+            breaker.slow_call_rate is not None and slow_calls / calls >= breaker.slow_call_rate
+        ):
+            self._set_state(OPEN, now)
+
+    def snapshot(self, now: float) -> Dict[str, float]:
+        calls, failures, slow = self.window.counts(now)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failures": failures,
+            "slow_calls": slow,
+            "failure_rate": failures / calls if calls else 0.0,
+            "retry_in": self.retry_in(now),
+            "transitions": self.transitions,
+        }
+
+
+class CircuitBreaker:
+    \"\"\"
+    Набор цепей клиента.
+
+    Цепь открывается, если за последние window секунд было не меньше min_calls
+    вызовов и доля ошибок (исключения и failure_statuses) достигла failure_rate
+    или доля вызовов дольше slow_call_duration достигла slow_call_rate.
+    Открытая цепь сразу отклоняет запросы open_timeout секунд, затем пропускает
+    до half_open_max_calls пробных запросов: все успешны - цепь закрывается,
+    любой неуспешный - снова открывается.
+
+    per_endpoint=True добавляет к цепи базового URL цепь на каждый endpoint.
+    \"\"\"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        open_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate: Optional[float] = None,
+        failure_statuses: Collection[int] = FAILURE_STATUSES,
+        per_endpoint: bool = False,
+    ):
+        if slow_call_duration is not None and slow_call_rate is None:
+            slow_call_rate = 1.0
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, int(min_calls))
+        self.window = float(window)
+        self.open_timeout = float(open_timeout)
+        self.half_open_max_calls = max(1, int(half_open_max_calls))
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.failure_statuses = frozenset(failure_statuses)
+        self.per_endpoint = per_endpoint
+        self._circuits: Dict[str, Circuit] = {}
+        self._listeners: List[StateListener] = []
+
+    def add_listener(self, listener: StateListener) -> None:
+        \"\"\"listener(key, old_state, new_state) вызывается при смене состояния цепи\"\"\"
+        self._listeners.append(listener)
+
+    def _notify(self, key: str, previous: str, state: str) -> None:
+        for listener in self._listeners:
+            listener(key, previous, state)
+
+    def _circuit(self, key: str) -> Circuit:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = Circuit(key, self)
+        return circuit
+
+    def keys_for(self, base_url: str, endpoint: Optional[str] = None) -> List[str]:
+        if self.per_endpoint and endpoint:
+            return [base_url, f"{base_url} {endpoint}"]
+        return [base_url]
+
+    def acquire(self, base_url: str, endpoint: Optional[str] = None) -> List[Circuit]:
+        \"\"\"Разрешение на попытку; при открытой цепи - CircuitOpen\"\"\"
+        now = time.monotonic()
+        acquired = []
+        for key in self.keys_for(base_url, endpoint):
+            circuit = self._circuit(key)
+            if not circuit.try_acquire(now):
+                for taken in acquired:
+                    taken.release()
+                raise CircuitOpen(key, circuit.state, circuit.retry_in(now))
+            acquired.append(circuit)
+        return acquired
+
+    def is_failure(self, status: int) -> bool:
+        return status in self.failure_statuses
+
+    def record(self, circuits: List[Circuit], failed: bool, duration: float) -> None:
+        now = time.monotonic()
+        for circuit in circuits:
+            circuit.record(now, failed, duration)
+
+    def release(self, circuits: List[Circuit]) -> None:
+        for circuit in circuits:
+            circuit.release()
+
+    def state(self, base_url: str, endpoint: Optional[str] = None) -> str:
+        \"\"\"Состояние цепи: closed / open / half_open\"\"\"
+        key = self.keys_for(base_url, endpoint)[-1]
+        circuit = self._circuits.get(key)
+        return circuit.state if circuit is not None else CLOSED
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        \"\"\"Состояние и счетчики всех цепей (для экспорта в мониторинг)\"\"\"
+        now = time.monotonic()
+        return {key: circuit.snapshot(now) for key, circuit in self._circuits.items()}
+
+    def reset(self) -> None:
+        \"\"\"Сброс всех цепей в closed\"\"\"
+        self._circuits.clear()
+"""
+
+    rate_limit = """\"\"\"
+Клиентский ограничитель частоты запросов (token bucket)
+
+Лимиты задаются на весь клиент, на зону (класс endpoints, например "Items")
+и на endpoint ("Items.list_items"). Ограничитель подстраивается под ответы
+сервера: X-RateLimit-Remaining / X-RateLimit-Reset и 429.
+\"\"\"
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from .retry import parse_retry_after
+
+# Лимит: запросов в секунду или (запросов в секунду, размер пачки)
+RateLimit = Union[float, Tuple[float, int]]
+
+ADAPTIVE_SCOPES = ("global", "zone", "endpoint")
+GLOBAL_KEY = "*"
+
+
+class TokenBucket:
+    \"\"\"
+    Token bucket с резервированием.
+
+    reserve() сразу забирает токен (баланс может уйти в минус) и возвращает,
+    сколько ждать до его появления. Каждый вызывающий спит ровно один раз,
+    без опроса в цикле, а порядок ожидающих сохраняется.
+    \"\"\"
+
+    __slots__ = ("rate", "capacity", "tokens", "updated", "factor")
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, tokens: Optional[float] = None, now: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity if tokens is None else float(tokens)
+        self.updated = time.monotonic() if now is None else now
+        # Множитель скорости, снижается после 429
+        self.factor = 1.0
+
+    def reserve(self, now: float, amount: float = 1.0) -> float:
+        rate = self.rate * self.factor
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / rate
+
+
+def _bucket(limit: RateLimit) -> TokenBucket:
+    if isinstance(limit, (tuple, list)):
+        rate, burst = limit
+        return TokenBucket(rate, burst)
+    return TokenBucket(limit)
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class RateLimiter:
+    \"\"\"
+    Ограничитель частоты запросов клиента.
+
+    rate/burst - лимит на весь клиент, zones - по имени класса endpoints,
+    endpoints - по "Класс.метод". Запрос ждет токен во всех подходящих корзинах.
+
+    adaptive=True включает подстройку под сервер (adaptive_scope - к какому
+    уровню относить серверный лимит):
+    - X-RateLimit-Remaining / X-RateLimit-Reset (и RateLimit-* без X-):
+      оставшиеся запросы равномерно распределяются до сброса окна;
+    - 429: пауза до Retry-After / Reset, скорость затронутых корзин
+      снижается вдвое и восстанавливается на recovery за успешный ответ.
+    \"\"\"
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        zones: Optional[Dict[str, RateLimit]] = None,
+        endpoints: Optional[Dict[str, RateLimit]] = None,
+        adaptive: bool = True,
+        adaptive_scope: str = "global",
+        min_factor: float = 0.1,
+        recovery: float = 0.05,
+        default_pause: float = 1.0,
+    ):
+        if adaptive_scope not in ADAPTIVE_SCOPES:
+            raise ValueError(f"Unknown adaptive scope: {adaptive_scope} (available: {', '.join(ADAPTIVE_SCOPES)})")
+        self._buckets: Dict[str, TokenBucket] = {}
+        if rate is not None:
+            self._buckets[GLOBAL_KEY] = TokenBucket(rate, burst)
+        for zone, limit in (zones or {}).items():
+            self._buckets[zone] = _bucket(limit)
+        for endpoint, limit in (endpoints or {}).items():
+            self._buckets[endpoint] = _bucket(limit)
+        self.adaptive = adaptive
+        self.adaptive_scope = adaptive_scope
+        self.min_factor = min_factor
+        self.recovery = recovery
+        self.default_pause = default_pause
+        # Лимиты, пришедшие от сервера: ключ -> (корзина, момент сброса окна)
+        self._server_buckets: Dict[str, Tuple[TokenBucket, float]] = {}
+        self._paused_until: Dict[str, float] = {}
+
+    @staticmethod
+    def _keys(endpoint: Optional[str]) -> List[str]:
+        if not endpoint:
+            return [GLOBAL_KEY]
+        zone = endpoint.split(".", 1)[0]
+        return [GLOBAL_KEY, zone, endpoint] if zone != endpoint else [GLOBAL_KEY, zone]
+
+    def _scope_key(self, endpoint: Optional[str]) -> str:
+        keys = self._keys(endpoint)
+        return keys[min(ADAPTIVE_SCOPES.index(self.adaptive_scope), len(keys) - 1)]
+
+    def _reserve(self, keys: Iterable[str], now: float) -> float:
+        wait = 0.0
+        for key in keys:
+            pause = self._paused_until.get(key)
+            if pause is not None:
+                if pause > now:
+                    wait = max(wait, pause - now)
+                else:
+                    del self._paused_until[key]
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                wait = max(wait, bucket.reserve(now))
+            server = self._server_buckets.get(key)
+            if server is not None:
+                if server[1] > now:
+                    wait = max(wait, server[0].reserve(now))
+                else:
+                    del self._server_buckets[key]
+        return wait
+
+    async def acquire(self, endpoint: Optional[str] = None) -> float:
+        \"\"\"Ожидание разрешения на запрос; возвращает время ожидания в секундах\"\"\"
+        keys = self._keys(endpoint)
+        waited = 0.0
+        wait = self._reserve(keys, time.monotonic())
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            # Пауза после 429 могла появиться, пока мы ждали
+            now = time.monotonic()
+            wait = max((self._paused_until.get(key, now) - now for key in keys), default=0.0)
+        return waited
+
+    def observe(self, endpoint: Optional[str], status: int, headers: Mapping[str, str]) -> None:
+        \"\"\"Учет ответа сервера для адаптивного режима\"\"\"
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        scope = self._scope_key(endpoint)
+        reset_in = self._reset_in(_header(headers, "X-RateLimit-Reset", "RateLimit-Reset"))
+
+        if status == 429:
+            pause = parse_retry_after(_header(headers, "Retry-After"))
+            if pause is None:
+                pause = reset_in if reset_in is not None else self.default_pause
+            self._paused_until[scope] = max(self._paused_until.get(scope, 0.0), now + pause)
+            for key in self._keys(endpoint):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.factor = max(self.min_factor, bucket.factor / 2)
+            return
+
+        for key in self._keys(endpoint):
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket.factor < 1.0:
+                bucket.factor = min(1.0, bucket.factor + self.recovery)
+
+        remaining = _header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        if remaining is None or reset_in is None:
+            return
+        try:
+            remaining = max(0.0, float(remaining))
+        except ValueError:
+            return
+        if remaining < 1:
+            self._paused_until[scope] = now + reset_in
+            self._server_buckets.pop(scope, None)
+        elif reset_in > 0:
+            self._server_buckets[scope] = (
+                TokenBucket(remaining / reset_in, capacity=remaining, tokens=remaining, now=now),
+                now + reset_in,
+            )
+
+    @staticmethod
+    def _reset_in(value: Optional[str]) -> Optional[float]:
+        \"\"\"X-RateLimit-Reset: секунды до сброса или unix время сброса\"\"\"
+        if value is None:
+            return None
+        try:
+            reset = float(value)
+        except ValueError:
+            return parse_retry_after(value)
+        if reset > 1e9:
+            reset -= time.time()
+        return max(0.0, reset)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        \"\"\"Текущее состояние корзин (токены и множитель скорости)\"\"\"
+        return {
+            key: {"rate": bucket.rate * bucket.factor, "tokens": bucket.tokens, "factor": bucket.factor}
+            for key, bucket in self._buckets.items()
+        }
+"""
+
+    metrics = """\"\"\"
+Метрики клиента по endpoint'ам: счетчики, классы статусов, повторы, байты,
+время разбора ответа и гистограмма задержек в стиле HDR
+\"\"\"
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Гистограмма в микросекундах: точные корзины до 2 ** (SUB_BITS + 1) мкс, дальше
+# каждая степень двойки делится на 2 ** SUB_BITS корзин - относительная
+# погрешность не больше 1 / 2 ** SUB_BITS (~6%) на всем диапазоне
+SUB_BITS = 4
+_SUB_COUNT = 1 << SUB_BITS
+_LINEAR = _SUB_COUNT << 1
+_TOP_BITS = SUB_BITS + 1
+# Значения больше ~12.7 суток попадают в последнюю корзину
+MAX_MICROS = (1 << 40) - 1
+_BUCKETS = ((40 - _TOP_BITS) << SUB_BITS) + _LINEAR
+
+# Границы корзин Prometheus гистограммы, секунды
+DEFAULT_PROMETHEUS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+def metrics_key(method: str, path: str, route: Optional[str] = None) -> str:
+    \"\"\"
+    Ключ метрик: "METHOD шаблон пути" из декоратора (route), а не
+    отформатированный путь - число ключей ограничено числом endpoint'ов
+    \"\"\"
+    return route if route is not None else f"{method.upper()} {path}"
+
+
+def _bucket_index(micros: int) -> int:
+    if micros < _LINEAR:
+        return micros if micros > 0 else 0
+    if micros > MAX_MICROS:
+        micros = MAX_MICROS
+    shift = micros.bit_length() - _TOP_BITS
+    return (shift << SUB_BITS) + (micros >> shift)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    \"\"\"Границы корзины [lower, upper) в микросекундах\"\"\"
+    if index < _LINEAR:
+        return index, index + 1
+    shift = (index >> SUB_BITS) - 1
+    mantissa = (index & (_SUB_COUNT - 1)) + _SUB_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    \"\"\"
+    Гистограмма задержек с логарифмически-линейными корзинами (как HdrHistogram):
+    запись - одно вычисление индекса и инкремент элемента списка, память
+    фиксирована (~600 корзин) при диапазоне от микросекунд до суток.
+    \"\"\"
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        # _bucket_index без вызова функции - запись идет на каждый запрос
+        index = int(seconds * 1e6)
+        if index >= _LINEAR:
+            if index > MAX_MICROS:
+                index = MAX_MICROS
+            shift = index.bit_length() - _TOP_BITS
+            index = (shift << SUB_BITS) + (index >> shift)
+        elif index < 0:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        \"\"\"Значение перцентиля в секундах (середина корзины, не больше max)\"\"\"
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if bucket:
+                seen += bucket
+                if seen >= target:
+                    lower, upper = _bucket_bounds(index)
+                    return min(max((lower + upper) / 2e6, self.min), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[int]:
+        \"\"\"Накопленные счетчики для границ bounds (секунды) - корзины Prometheus\"\"\"
+        limits = [bound * 1e6 for bound in bounds]
+        result = [0] * len(limits)
+        for index, bucket in enumerate(self.counts):
+            if bucket:
+                lower, upper = _bucket_bounds(index)
+                middle = (lower + upper) / 2
+                for position, limit in enumerate(limits):
+                    if middle <= limit:
+                        result[position] += bucket
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+
+class EndpointMetrics:
+    \"\"\"
+    Счетчики одного endpoint'а. Обновляются из одного event loop без
+    блокировок: каждое изменение - инкремент атрибута между await.
+    \"\"\"
+
+    __slots__ = (
+        "key", "count", "statuses", "errors", "retries", "request_bytes", "response_bytes",
+        "decode_count", "decode_time", "pool_waits", "pool_wait_time", "latency",
+    )
+
+    def __init__(self, key: str):
+        self.key = key
+        self.count = 0
+        # Индекс - status // 100 (0 - нестандартный статус)
+        self.statuses = [0] * 6
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.decode_count = 0
+        self.decode_time = 0.0
+        self.pool_waits = 0
+        self.pool_wait_time = 0.0
+        self.latency = LatencyHistogram()
+
+    def observe(self, status: int, response_bytes: int, duration: float) -> None:
+        \"\"\"Завершенный вызов (со всеми повторами), получивший ответ\"\"\"
+        self.count += 1
+        self.statuses[status // 100 if 100 <= status < 600 else 0] += 1
+        self.response_bytes += response_bytes
+        self.latency.record(duration)
+
+    def observe_error(self, duration: float) -> None:
+        \"\"\"Вызов, завершившийся исключением без ответа\"\"\"
+        self.count += 1
+        self.errors += 1
+        self.latency.record(duration)
+
+    def observe_decode(self, duration: float) -> None:
+        self.decode_count += 1
+        self.decode_time += duration
+
+    def observe_pool_wait(self, duration: float) -> None:
+        self.pool_waits += 1
+        self.pool_wait_time += duration
+
+    def snapshot(self) -> Dict[str, Any]:
+        statuses = {
+            name: count for name, count in zip(_STATUS_CLASSES, self.statuses[1:]) if count
+        }
+        if self.statuses[0]:
+            statuses["other"] = self.statuses[0]
+        return {
+            "count": self.count,
+            "status": statuses,
+            "errors": self.errors,
+            "retries": self.retries,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "decode": {"count": self.decode_count, "sum": self.decode_time},
+            "pool_wait": {"count": self.pool_waits, "sum": self.pool_wait_time},
+            "latency": self.latency.snapshot(),
+        }
+
+
+class ClientMetrics:
+    \"\"\"
+    Метрики клиента: EndpointMetrics по ключу "METHOD шаблон пути".
+
+    client = ApiClient().initialize(url, metrics=True)
+    ...
+    client.metrics.snapshot()
+    {"GET /items/{item_id}": {"count": 10, "status": {"2xx": 10}, "latency": {"p99": ...}, ...}}
+
+    latency - полное время вызова с повторами и паузами между ними, decode -
+    разбор ответа в модель, pool_wait - ожидание свободного соединения пула
+    aiohttp (только попытки, которые ждали). Потоковые *_stream вызовы не
+    учитываются.
+    \"\"\"
+
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, key: str) -> EndpointMetrics:
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints.setdefault(key, EndpointMetrics(key))
+        return metrics
+
+    def __iter__(self):
+        return iter(list(self._endpoints.values()))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {key: metrics.snapshot() for key, metrics in list(self._endpoints.items())}
+
+    def reset(self) -> None:
+        self._endpoints = {}
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\\\", "\\\\\\\\").replace('"', '\\\\"').replace("\\n", "\\\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def prometheus_text(
+    metrics: ClientMetrics,
+    prefix: str = "openapi_client",
+    buckets: Iterable[float] = DEFAULT_PROMETHEUS_BUCKETS,
+) -> str:
+    \"\"\"
+    Метрики в текстовом формате Prometheus (exposition format 0.0.4).
+
+    Метки - method и path (шаблон пути). Гистограмма задержек сводится из
+    HDR корзин к границам buckets с той же точностью (~6%).
+    \"\"\"
+    buckets = sorted(buckets)
+    endpoints = list(metrics)
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> str:
+        full_name = f"{prefix}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        return full_name
+
+    def labels(item: EndpointMetrics, **extra: str) -> str:
+        method, _, path = item.key.partition(" ")
+        pairs = {"method": method, "path": path, **extra}
+        return ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs.items())
+
+    name = family("requests_total", "counter", "Completed calls by status class")
+    for item in endpoints:
+        for status_class, count in item.snapshot()["status"].items():
+            lines.append(f"{name}{{{labels(item, status_class=status_class)}}} {count}")
+
+    counters = (
+        ("request_errors_total", "errors", "Calls failed without a response"),
+        ("retries_total", "retries", "Retried attempts"),
+        ("request_bytes_total", "request_bytes", "Request body bytes sent"),
+        ("response_bytes_total", "response_bytes", "Response body bytes received"),
+    )
+    for metric, attribute, help_text in counters:
+        name = family(metric, "counter", help_text)
+        for item in endpoints:
+            lines.append(f"{name}{{{labels(item)}}} {getattr(item, attribute)}")
+
+    summaries = (
+        ("decode_seconds", "decode_time", "decode_count", "Response decode time"),
+        ("pool_wait_seconds", "pool_wait_time", "pool_waits", "Connection pool wait time"),
+    )
+    for metric, total, count, help_text in summaries:
+        name = family(metric, "summary", help_text)
+        for item in endpoints:
+            lines.append(f"{name}_sum{{{labels(item)}}} {getattr(item, total)!r}")
+            lines.append(f"{name}_count{{{labels(item)}}} {getattr(item, count)}")
+
+    name = family("request_duration_seconds", "histogram", "Call latency including retries")
+    for item in endpoints:
+        histogram = item.latency
+        for bound, count in zip(buckets, histogram.cumulative(buckets)):
+            lines.append(f"{name}_bucket{{{labels(item, le=_format_bound(bound))}}} {count}")
+        lines.append(f'{name}_bucket{{{labels(item, le="+Inf")}}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels(item)}}} {histogram.total!r}")
+        lines.append(f"{name}_count{{{labels(item)}}} {histogram.count}")
+
+    return "\\n".join(lines) + "\\n"
+"""
+
+    timings = """\"\"\"
+Трассировка фаз запроса: ожидание пула, DNS, соединение, время до первого
+байта, чтение тела и разбор ответа - по выборке запросов в подключаемый sink
+\"\"\"
+
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from aiohttp import TraceConfig
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("pool_wait", "dns", "connect", "ttfb", "download", "decode", "total")
+
+
+class RequestTiming:
+    \"\"\"
+    Фазы одной попытки запроса в секундах (None - фаза не выполнялась):
+
+    pool_wait - ожидание свободного соединения пула;
+    dns - разрешение имени (None при попадании в DNS кеш коннектора);
+    connect - новое соединение без DNS: TCP и TLS handshake (aiohttp не
+    сообщает TLS отдельно); None, если соединение взято из пула (reused);
+    ttfb - от отправки заголовков до заголовков ответа: отправка тела и
+    время сервера;
+    download - чтение тела ответа;
+    decode - разбор ответа в модель (только у итоговой попытки вызова);
+    total - от начала попытки до прочитанного тела.
+    \"\"\"
+
+    __slots__ = (
+        "method", "url", "route", "attempt", "status", "error", "reused", "dns_cache_hit",
+        "pool_wait", "dns", "connect", "ttfb", "download", "decode", "total",
+        "started", "_queued_at", "_dns_at", "_connect_at", "_sent_at", "_headers_at",
+    )
+
+    def __init__(self, method: str, url: str, route: Optional[str] = None, attempt: int = 1):
+        self.method = method.upper()
+        self.url = url
+        self.route = route
+        self.attempt = attempt
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.reused = False
+        self.dns_cache_hit = False
+        self.pool_wait: Optional[float] = None
+        self.dns: Optional[float] = None
+        self.connect: Optional[float] = None
+        self.ttfb: Optional[float] = None
+        self.download: Optional[float] = None
+        self.decode: Optional[float] = None
+        self.total: Optional[float] = None
+        self.started = time.perf_counter()
+        self._queued_at = self._dns_at = self._connect_at = self._sent_at = self._headers_at = None
+
+    def finish(self, status: Optional[int] = None, error: Optional[BaseException] = None) -> None:
+        \"\"\"Конец попытки: тело прочитано или запрос завершился ошибкой\"\"\"
+        now = time.perf_counter()
+        self.status = status
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._headers_at is not None:
+            self.download = now - self._headers_at
+        self.total = now - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "url": self.url,
+            "route": self.route,
+            "attempt": self.attempt,
+            "status": self.status,
+            "error": self.error,
+            "reused": self.reused,
+            "dns_cache_hit": self.dns_cache_hit,
+            **{phase: getattr(self, phase) for phase in PHASES},
+        }
+
+    def __repr__(self) -> str:
+        values = ((phase, getattr(self, phase)) for phase in PHASES)
+        phases = " ".join(f"{phase}={value * 1e3:.2f}ms" for phase, value in values if value is not None)
+        outcome = self.error or self.status
+        return f"<RequestTiming {self.route or self.method + ' ' + self.url} #{self.attempt} {outcome} {phases}>"
+
+
+# Sink - любой callable, принимающий RequestTiming
+TimingSink = Callable[[RequestTiming], Any]
+
+
+class LoggingSink:
+    \"\"\"Sink в logging: одна строка с фазами на попытку\"\"\"
+
+    def __init__(self, log: Optional[logging.Logger] = None, level: int = logging.INFO):
+        self.logger = log or logger
+        self.level = level
+
+    def __call__(self, timing: RequestTiming) -> None:
+        self.logger.log(self.level, "%r", timing)
+
 
-[tool.setuptools.package-dir]
-{package_name} = "."
-"""
+class MemorySink:
+    \"\"\"Sink в память: последние maxlen записей (для тестов и отладки)\"\"\"
 
-    models = """from typing import Any
+    def __init__(self, maxlen: Optional[int] = 10000):
+        self.timings: Deque[RequestTiming] = deque(maxlen=maxlen)
 
-class _NotSetType:
-    def __repr__(self) -> str:
-        return 'NOTSET'
-    
-    def __bool__(self) -> bool:
-        return False
+    def __call__(self, timing: RequestTiming) -> None:
+        self.timings.append(timing)
 
+    def __len__(self) -> int:
+        return len(self.timings)
 
-NOTSET = _NotSetType()
+    def percentiles(self, phase: str, percents=(50, 90, 99)) -> Dict[str, float]:
+        \"\"\"Перцентили фазы по сохраненным записям (попытки без фазы пропускаются)\"\"\"
+        values: List[float] = sorted(
+            value for value in (getattr(timing, phase) for timing in self.timings) if value is not None
+        )
+        if not values:
+            return {}
+        return {f"p{percent}": values[min(len(values) - 1, int(len(values) * percent / 100))] for percent in percents}
+
+    def clear(self) -> None:
+        self.timings.clear()
+
+
+class TimingTracer:
+    \"\"\"
+    Трассировка фаз запросов aiohttp сессии клиента.
+
+    client.initialize(url, timing_tracer=TimingTracer(sink=LoggingSink(), sample_rate=0.01))
+
+    sample_rate - доля трассируемых вызовов (решение принимается на вызов,
+    все его попытки попадают в выборку вместе). Каждая попытка отдается в
+    sink как RequestTiming; итоговая - после разбора ответа, с decode.
+    Ошибки sink логируются и не влияют на запрос.
+
+    Фазы пишутся сигналами aiohttp TraceConfig, поэтому трассируются только
+    запросы через встроенную aiohttp сессию (не через Transport) и кроме
+    потоковых *_stream вызовов.
+    \"\"\"
+
+    def __init__(self, sink: Optional[TimingSink] = None, sample_rate: float = 1.0, rng: Callable[[], float] = random.random):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be within [0, 1]")
+        self.sink = sink if sink is not None else LoggingSink()
+        self.sample_rate = sample_rate
+        self._rng = rng
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1.0 or (self.sample_rate > 0.0 and self._rng() < self.sample_rate)
+
+    def emit(self, timing: RequestTiming) -> None:
+        try:
+            self.sink(timing)
+        except Exception as exc:
+            logger.warning(f"Timing sink failed: {exc}")
+
+
+def timing_trace_config() -> TraceConfig:
+    \"\"\"TraceConfig фаз для ClientSession; trace_request_ctx запроса - {"timing": RequestTiming}\"\"\"
+
+    def timing_of(context) -> Optional[RequestTiming]:
+        request_ctx = context.trace_request_ctx
+        return request_ctx.get("timing") if request_ctx else None
+
+    async def on_queued_start(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing._queued_at = time.perf_counter()
+
+    async def on_queued_end(session, context, params):
+        timing = timing_of(context)
+        if timing is not None and timing._queued_at is not None:
+            timing.pool_wait = time.perf_counter() - timing._queued_at
+
+    async def on_reuse(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing.reused = True
+
+    async def on_create_start(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing._connect_at = time.perf_counter()
+
+    async def on_create_end(session, context, params):
+        timing = timing_of(context)
+        if timing is not None and timing._connect_at is not None:
+            timing.connect = time.perf_counter() - timing._connect_at - (timing.dns or 0.0)
+
+    async def on_dns_start(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing._dns_at = time.perf_counter()
+
+    async def on_dns_end(session, context, params):
+        timing = timing_of(context)
+        if timing is not None and timing._dns_at is not None:
+            timing.dns = time.perf_counter() - timing._dns_at
+
+    async def on_dns_cache_hit(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing.dns_cache_hit = True
+
+    async def on_headers_sent(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing._sent_at = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        timing = timing_of(context)
+        if timing is not None:
+            timing._headers_at = time.perf_counter()
+            if timing._sent_at is not None:
+                timing.ttfb = timing._headers_at - timing._sent_at
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_queued_start.append(on_queued_start)
+    trace_config.on_connection_queued_end.append(on_queued_end)
+    trace_config.on_connection_reuseconn.append(on_reuse)
+    trace_config.on_connection_create_start.append(on_create_start)
+    trace_config.on_connection_create_end.append(on_create_end)
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_request_headers_sent.append(on_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
 """
 
-    client = """from simple_singleton import Singleton
-from typing import TYPE_CHECKING
+    tracing = """\"\"\"
+Трассировка вызовов endpoint'ов в OpenTelemetry: span на вызов и W3C traceparent
+в заголовках запроса
 
-from .common import AiohttpClient
-from . import constants
+Модуль не импортирует opentelemetry, пока трассировка не включена.
+\"\"\"
 
-if TYPE_CHECKING:
-{zone_imports}
+from typing import Any, Dict, Optional
 
-class ApiClient(AiohttpClient, metaclass=Singleton):
-    def __init__(self) -> None:
-        super().__init__()
-{zone_assignments}
+# Атрибуты по семантическим соглашениям OpenTelemetry для HTTP
+ATTR_METHOD = "http.request.method"
+ATTR_URL_TEMPLATE = "url.template"
+ATTR_URL_FULL = "url.full"
+ATTR_STATUS_CODE = "http.response.status_code"
+ATTR_RESEND_COUNT = "http.request.resend_count"
+ATTR_REQUEST_BODY_SIZE = "http.request.body.size"
+ATTR_RESPONSE_BODY_SIZE = "http.response.body.size"
+
+
+class OpenTelemetryTracing:
+    \"\"\"
+    Span на каждый вызов endpoint'а: имя - "Класс.метод" (Items.get_item),
+    вид CLIENT, атрибуты - метод, шаблон пути, статус, номер повтора и
+    размеры тела. Span охватывает все попытки и разбор ответа, исключение
+    вызова записывается в span. Контекст span'а передается серверу
+    заголовком traceparent (propagator по умолчанию - глобальный, W3C).
+
+    client.initialize(url, tracing=True)  # глобальный TracerProvider
+
+    # Тесты без сети: спаны в памяти
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    client.set_tracing(OpenTelemetryTracing(tracer_provider=provider))
+
+    Потоковые *_stream вызовы не трассируются.
+    \"\"\"
+
+    def __init__(self, tracer_provider: Any = None, propagator: Any = None, tracer_name: str = __package__ or "openapi_client"):
+        try:
+            from opentelemetry import propagate, trace
+        except ImportError as exc:
+            raise ImportError(
+                "OpenTelemetry tracing requires opentelemetry-api: pip install opentelemetry-api"
+            ) from exc
+
+        self._trace = trace
+        self.tracer = trace.get_tracer(tracer_name, tracer_provider=tracer_provider)
+        self.propagator = propagator if propagator is not None else propagate.get_global_textmap()
+        self._client_kind = trace.SpanKind.CLIENT
+        self._error = trace.StatusCode.ERROR
+
+    def span(self, name: str, method: str, route: Optional[str] = None):
+        \"\"\"Текущий span вызова (context manager); route - "METHOD шаблон пути" \"\"\"
+        attributes = {ATTR_METHOD: method.upper()}
+        if route is not None:
+            attributes[ATTR_URL_TEMPLATE] = route.partition(" ")[2]
+        return self.tracer.start_as_current_span(name, kind=self._client_kind, attributes=attributes)
+
+    def current_span(self) -> Any:
+        \"\"\"Записывающий span текущего контекста или None\"\"\"
+        span = self._trace.get_current_span()
+        # Завершенный span (фоновое обновление кеша после вызова) не изменяется
+        return span if span.is_recording() else None
+
+    def inject(self, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        \"\"\"Копия headers с traceparent (и tracestate) текущего контекста\"\"\"
+        carrier = dict(headers) if headers else {}
+        self.propagator.inject(carrier)
+        return carrier
+
+    def record_request(self, span: Any, url: str, body_size: int) -> None:
+        span.set_attribute(ATTR_URL_FULL, url)
+        if body_size:
+            span.set_attribute(ATTR_REQUEST_BODY_SIZE, body_size)
+
+    def record_attempt(self, span: Any, attempt: int) -> None:
+        \"\"\"Номер попытки: resend_count - число повторов перед ней\"\"\"
+        span.set_attribute(ATTR_RESEND_COUNT, attempt - 1)
+
+    def record_response(self, span: Any, status: int, body_size: int) -> None:
+        span.set_attribute(ATTR_STATUS_CODE, status)
+        span.set_attribute(ATTR_RESPONSE_BODY_SIZE, body_size)
+        if status >= 400:
+            # Для CLIENT span'а ошибкой считаются и 4xx
+            span.set_status(self._error)
+
+
+def get_tracing(tracing: Any) -> Optional[OpenTelemetryTracing]:
+    \"\"\"True - OpenTelemetryTracing с глобальными настройками, False/None - выключено\"\"\"
+    if tracing is True:
+        return OpenTelemetryTracing()
+    return tracing or None
 """
 
     aiohttp_common = """import asyncio
+import contextvars
 import json
 import logging
-from typing import Optional, Union, Dict, Any
+import mimetypes
+import mmap
+import os
+import time
+import urllib.request
+from typing import Optional, Union, Dict, Any, AsyncContextManager, AsyncIterator, IO, List, Tuple
 from contextlib import asynccontextmanager
 
 import aiohttp
-from aiohttp import ClientError, ClientTimeout, ClientSession, TCPConnector
+from aiohttp import ClientConnectorError, ClientError, ClientTimeout, ClientSession, TCPConnector, TraceConfig
 from pydantic import BaseModel
+from yarl import URL
 
 from . import constants
+from .cache import ResponseCache
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .json_codecs import JsonCodec, get_json_codec
+from .metrics import ClientMetrics, LatencyHistogram, metrics_key
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+from .single_flight import SingleFlight
+from .timings import RequestTiming, TimingTracer, timing_trace_config
+from .tracing import OpenTelemetryTracing, get_tracing
+from .transport import Transport, TransportConnectError, TransportError, TransportRequest, get_transport, iter_file_object
+from .utils import FileUpload, drop_overridden_cookies, iter_json_items
+from .validation import check_validation_mode
 
 logger = logging.getLogger(__name__)
 
+# Размер куска по умолчанию для потоковых ответов
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Поля TCPConnector, из которых ConnectionPool.stats() читает состояние пула:
+# публичного API у aiohttp нет. Чтение включено только для проверенных версий
+# aiohttp [от, до); на других acquired / idle / waiting - None
+_CONNECTOR_STATE_FIELDS = ("_conns", "_acquired", "_acquired_per_host", "_waiters")
+_CONNECTOR_STATE_VERSIONS = ((3, 8), (4, 0))
+
+
+def _connector_state_supported(version: str) -> bool:
+    \"\"\"Версия aiohttp (строка __version__) из _CONNECTOR_STATE_VERSIONS\"\"\"
+    try:
+        major, minor = (int(part) for part in version.split(".")[:2])
+    except ValueError:
+        return False
+    low, high = _CONNECTOR_STATE_VERSIONS
+    return low <= (major, minor) < high
+
+
+def _env_proxy(url: URL) -> Tuple[Optional[URL], Optional[aiohttp.BasicAuth]]:
+    \"\"\"
+    HTTP прокси из окружения (HTTP(S)_PROXY, NO_PROXY) для url - тот же, что
+    выбирает сессия с trust_env=True, чтобы соединения прогрева совпали с ее
+    ключами пула. Учетные данные берутся из URL прокси (без .netrc).
+    \"\"\"
+    if url.host is None or urllib.request.proxy_bypass(url.host):
+        return None, None
+    proxy = urllib.request.getproxies().get(url.scheme)
+    if not proxy:
+        return None, None
+    proxy_url = URL(proxy)
+    if proxy_url.scheme not in ("http", "ws"):
+        return None, None  # HTTPS прокси aiohttp не поддерживает
+    if proxy_url.user is None:
+        return proxy_url, None
+    return proxy_url.with_user(None), aiohttp.BasicAuth(proxy_url.user, proxy_url.password or "")
+
 
 class SendRequestError(Exception):
     def __init__(self, message, path, status_code, response_data=None):
@@ -75,13 +4119,225 @@ class SendRequestError(Exception):
         super().__init__(f"[{status_code}] {path}: {message}")
 
 
+class CircuitOpenError(SendRequestError):
+    \"\"\"Запрос отклонен открытой цепью circuit breaker без обращения к серверу\"\"\"
+
+    def __init__(self, message, path, key: str, retry_in: float):
+        super().__init__(message, path=path, status_code=503)
+        self.key = key
+        self.retry_in = retry_in
+
+
+class AiohttpResponse:
+    \"\"\"Response объект для совместимости: тело читается один раз и хранится как bytes\"\"\"
+
+    __slots__ = ("status_code", "headers", "timing", "_response", "_content", "_json_codec")
+
+    def __init__(self, aiohttp_response, json_codec: JsonCodec = None):
+        self.status_code = aiohttp_response.status
+        self.headers = aiohttp_response.headers
+        # RequestTiming итоговой попытки, если вызов попал в выборку TimingTracer
+        self.timing: Optional[RequestTiming] = None
+        self._response = aiohttp_response
+        self._content = None
+        self._json_codec = json_codec or get_json_codec("json")
+
+    async def read(self) -> bytes:
+        if self._content is None:
+            self._content = await self._response.read()
+        return self._content
+
+    async def text(self) -> str:
+        # Декодирование с определением charset, без кэширования копии тела
+        return await self._response.text()
+
+    async def json(self) -> Any:
+        # JSON декодируется прямо из bytes, без промежуточной строки
+        return self._json_codec.loads(await self.read())
+
+    async def content(self) -> bytes:
+        return await self.read()
+
+    @property
+    def body(self) -> bytes:
+        \"\"\"Прочитанное тело ответа (пустое, если еще не прочитано)\"\"\"
+        return self._content or b""
+
+
+class StreamingResponse:
+    \"\"\"Потоковый ответ: тело читается кусками и не держится в памяти целиком\"\"\"
+
+    __slots__ = ("status_code", "headers", "response_model", "validation", "_response", "_json_codec")
+
+    def __init__(self, aiohttp_response, json_codec: JsonCodec = None, response_model=None, validation: str = "full"):
+        self.status_code = aiohttp_response.status
+        self.headers = aiohttp_response.headers
+        self.response_model = response_model
+        self.validation = validation
+        self._response = aiohttp_response
+        self._json_codec = json_codec or get_json_codec("json")
+
+    @property
+    def content_length(self) -> Optional[int]:
+        return self._response.content_length
+
+    async def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        \"\"\"Куски тела не больше chunk_size байт\"\"\"
+        async for chunk in self._response.content.iter_chunked(chunk_size):
+            yield chunk
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.iter_chunks()
+
+    def iter_items(self, batch_size: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Any]:
+        \"\"\"
+        Элементы JSON массива или NDJSON строки по мере получения тела.
+
+        С response_model элементы валидируются в модели, с batch_size
+        возвращаются списками по batch_size элементов.
+        \"\"\"
+        return iter_json_items(
+            self.iter_chunks(chunk_size),
+            self.headers.get("content-type", ""),
+            response_model=self.response_model,
+            batch_size=batch_size,
+            loads=self._json_codec.loads,
+            validation=self.validation,
+        )
+
+    async def save(self, target: Union[str, os.PathLike, int, IO[bytes]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        \"\"\"
+        Запись тела в файл (путь), файловый дескриптор или бинарный файловый объект.
+
+        В памяти одновременно находится не больше одного куска. Возвращает число байт.
+        \"\"\"
+        written = 0
+        if isinstance(target, int):
+            async for chunk in self.iter_chunks(chunk_size):
+                view = memoryview(chunk)
+                while view:
+                    view = view[os.write(target, view):]
+                written += len(chunk)
+            return written
+
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "wb") as file:
+                return await self.save(file, chunk_size)
+
+        async for chunk in self.iter_chunks(chunk_size):
+            target.write(chunk)
+            written += len(chunk)
+        return written
+
+    async def read(self) -> bytes:
+        \"\"\"Чтение всего тела (для небольших ответов)\"\"\"
+        return await self._response.read()
+
+
+# Тип, который возвращают *_stream методы endpoints
+StreamingContext = AsyncContextManager[StreamingResponse]
+
+
+class _UploadPart:
+    \"\"\"
+    Один файл multipart запроса.
+
+    Содержимое не читается в память: пути открываются на каждую попытку,
+    файловые объекты читаются кусками (с возвратом к исходной позиции при повторе),
+    memoryview/mmap передаются без копирования. Async итераторы и файлы без seek
+    можно отправить только один раз.
+    \"\"\"
+
+    __slots__ = ("field_name", "content", "filename", "content_type", "start", "replayable", "streamed", "_opened")
+
+    def __init__(self, field_name: str, value: Any, default_filename: str):
+        filename = content_type = None
+        if isinstance(value, FileUpload):
+            filename, content_type, value = value.filename, value.content_type, value.content
+
+        self.field_name = field_name
+        self.start = None
+        self.replayable = True
+        self.streamed = True
+        self._opened = None
+
+        if isinstance(value, os.PathLike):
+            filename = filename or os.path.basename(os.fspath(value))
+        elif isinstance(value, (bytes, bytearray, memoryview, mmap.mmap)):
+            value = value if isinstance(value, bytes) else memoryview(value)
+            self.streamed = False
+        elif hasattr(value, "read"):
+            name = getattr(value, "name", None)
+            if filename is None and isinstance(name, str):
+                filename = os.path.basename(name)
+            try:
+                self.start = value.tell() if value.seekable() else None
+            except (AttributeError, OSError):
+                self.start = None
+            self.replayable = self.start is not None
+        else:
+            # async итератор bytes
+            self.replayable = False
+
+        self.content = value
+        self.filename = filename or default_filename
+        self.content_type = (
+            content_type
+            or mimetypes.guess_type(self.filename)[0]
+            or "application/octet-stream"
+        )
+
+    def payload(self) -> Any:
+        \"\"\"Свежий источник содержимого для очередной попытки запроса\"\"\"
+        if isinstance(self.content, os.PathLike):
+            self._opened = open(self.content, "rb")
+            return self._opened
+        if hasattr(self.content, "read"):
+            return iter_file_object(self.content, self.start, DEFAULT_CHUNK_SIZE)
+        return self.content
+
+    def close(self) -> None:
+        if self._opened is not None:
+            self._opened.close()
+            self._opened = None
+
+
+def _prepare_upload_parts(files: Optional[Dict[str, Any]]) -> Optional[List[_UploadPart]]:
+    \"\"\"Файлы запроса в виде частей multipart с именами и content-type\"\"\"
+    if not files:
+        return None
+    parts = []
+    for field_name, file_data in files.items():
+        if isinstance(file_data, list):
+            # Список файлов - добавляем каждый отдельно
+            for i, single_file in enumerate(file_data):
+                parts.append(_UploadPart(field_name, single_file, f"{field_name}_{i}.bin"))
+        else:
+            parts.append(_UploadPart(field_name, file_data, f"{field_name}.bin"))
+    return parts
+
+
 class ConnectionPool:
-    \"\"\"Пул соединений для эффективного управления ресурсами\"\"\"
+    \"\"\"
+    Пул соединений для эффективного управления ресурсами.
 
-    def __init__(self, max_connections: int = 100, max_connections_per_host: int = 10):
+    Пул считает выдачи соединений (новые и из keep-alive) и время ожидания
+    свободного соединения при исчерпании лимитов - через trace_config()
+    сессии клиента. stats() дополняет их текущим состоянием TCPConnector
+    на проверенных версиях aiohttp (см. _CONNECTOR_STATE_VERSIONS).
+    \"\"\"
+
+    def __init__(self, max_connections: int = 100, max_connections_per_host: int = 10, keepalive_timeout: float = 60):
         self.max_connections = max_connections
         self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
         self._connector: Optional[TCPConnector] = None
+        # Ожидание на каждую выдачу соединения (0 - соединение выдано сразу)
+        self.wait_times = LatencyHistogram()
+        self.created = 0
+        self.reused = 0
+        self.waited = 0
+        self._state_warned = False
 
     def get_connector(self) -> TCPConnector:
         if self._connector is None or self._connector.closed:
@@ -90,15 +4346,113 @@ class ConnectionPool:
                 limit_per_host=self.max_connections_per_host,
                 ttl_dns_cache=30,
                 use_dns_cache=True,
-                keepalive_timeout=60,
+                keepalive_timeout=self.keepalive_timeout,
                 enable_cleanup_closed=True,
             )
         return self._connector
 
+    def owns(self, connector) -> bool:
+        return connector is not None and connector is self._connector
+
     async def close(self):
         if self._connector and not self._connector.closed:
             await self._connector.close()
 
+    def trace_config(self) -> TraceConfig:
+        \"\"\"
+        Трассировка выдачи соединений сессии: статистика пула и ожидание
+        в метриках endpoint'а (trace_request_ctx запроса - {"metrics": EndpointMetrics})
+        \"\"\"
+
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+
+        async def on_queued_end(session, context, params):
+            context.pool_wait = time.perf_counter() - context.queued_at
+            self.waited += 1
+            record = context.trace_request_ctx.get("metrics") if context.trace_request_ctx else None
+            if record is not None:
+                record.observe_pool_wait(context.pool_wait)
+
+        async def on_created(session, context, params):
+            self.created += 1
+            self.wait_times.record(getattr(context, "pool_wait", 0.0))
+
+        async def on_reused(session, context, params):
+            self.reused += 1
+            self.wait_times.record(getattr(context, "pool_wait", 0.0))
+
+        trace_config = TraceConfig()
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_created)
+        trace_config.on_connection_reuseconn.append(on_reused)
+        return trace_config
+
+    def _connector_state(self) -> Optional[TCPConnector]:
+        \"\"\"Открытый connector, если версия aiohttp позволяет читать его состояние, иначе None\"\"\"
+        connector = self._connector
+        if connector is None or connector.closed:
+            return None
+        if not _connector_state_supported(aiohttp.__version__) or not all(
+            hasattr(connector, field) for field in _CONNECTOR_STATE_FIELDS
+        ):
+            if not self._state_warned:
+                self._state_warned = True
+                logger.warning(f"aiohttp {aiohttp.__version__} connector state is unknown, pool counters are unavailable")
+            return None
+        return connector
+
+    def stats(self) -> Dict[str, Any]:
+        \"\"\"
+        Состояние и статистика пула: acquired / idle / waiting - соединения
+        в работе, свободные keep-alive и запросы в очереди за соединением
+        (всего и по хостам); created / reused - выдачи новых и повторно
+        используемых соединений; wait - перцентили ожидания на выдачу
+        (секунды, включая выдачи без ожидания), waited - выдачи с ожиданием.
+
+        limit / limit_per_host - публичные лимиты connector'а. acquired / idle /
+        waiting и hosts читаются из внутреннего состояния connector'а только на
+        проверенных версиях aiohttp, на остальных - None и {}; created / reused /
+        wait считаются своей трассировкой.
+        \"\"\"
+        hosts: Dict[str, Dict[str, int]] = {}
+        acquired = idle = waiting = 0
+        connector = self._connector_state()
+        if connector is not None:
+            def host_stats(key) -> Dict[str, int]:
+                return hosts.setdefault(f"{key.host}:{key.port}", {"acquired": 0, "idle": 0, "waiting": 0})
+
+            for key, connections in connector._conns.items():
+                if connections:
+                    host_stats(key)["idle"] += len(connections)
+                    idle += len(connections)
+            for key, connections in connector._acquired_per_host.items():
+                if connections:
+                    host_stats(key)["acquired"] += len(connections)
+            for key, waiters in connector._waiters.items():
+                if waiters:
+                    host_stats(key)["waiting"] += len(waiters)
+                    waiting += len(waiters)
+            acquired = len(connector._acquired)
+        elif self._connector is not None and not self._connector.closed:
+            acquired = idle = waiting = None
+
+        wait = self.wait_times.snapshot()
+        limits = self._connector if self._connector is not None and not self._connector.closed else None
+        return {
+            "limit": limits.limit if limits is not None else self.max_connections,
+            "limit_per_host": limits.limit_per_host if limits is not None else self.max_connections_per_host,
+            "acquired": acquired,
+            "idle": idle,
+            "waiting": waiting,
+            "created": self.created,
+            "reused": self.reused,
+            "waited": self.waited,
+            "wait": {name: wait[name] for name in ("count", "mean", "p50", "p90", "p99", "max")},
+            "hosts": hosts,
+        }
+
 
 class AiohttpClient:
     \"\"\"Продвинутый HTTP клиент на базе aiohttp с connection pooling\"\"\"
@@ -108,79 +4462,114 @@ class AiohttpClient:
         self._api_url: Optional[str] = None
         self._base_headers: Dict[str, str] = {}
         self._base_cookies: Dict[str, str] = {}
-        self._temp_headers: Dict[str, str] = {}
-        self._temp_cookies: Dict[str, str] = {}
+        # Временные headers/cookies видны только в своей задаче (и ее дочерних)
+        self._temp_headers: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar(
+            f"temp_headers_{id(self)}", default={}
+        )
+        self._temp_cookies: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar(
+            f"temp_cookies_{id(self)}", default={}
+        )
         self._timeout: int = 30
         self._retries: int = 3
+        self._retry_policy = RetryPolicy(max_attempts=self._retries)
         self._connection_pool = ConnectionPool()
-        self._rate_limiter = None
+        self._rate_limiter: Optional[RateLimiter] = None
+        self._circuit_breaker: Optional[CircuitBreaker] = None
+        self._single_flight: Optional[SingleFlight] = None
+        self._response_cache: Optional[ResponseCache] = None
+        # None - встроенная aiohttp сессия, иначе Transport (например HTTP/2)
+        self._transport: Optional[Transport] = None
+        self._metrics: Optional[ClientMetrics] = None
+        self._timing_tracer: Optional[TimingTracer] = None
+        self._tracing: Optional[OpenTelemetryTracing] = None
+        # Прогрев пула из initialize (ждет event loop) и фоновое поддержание min_idle
+        self._pending_warmup = 0
+        self._min_idle = 0
+        self._pool_task: Optional[asyncio.Task] = None
+        # Сессия пересоздается только при смене настроек initialize, не при смене headers
         self._session_dirty = False
         self._session_lock = asyncio.Lock()
+        self._json_codec: JsonCodec = get_json_codec()
+        self._validation: str = "full"
 
     @property
     def headers(self) -> Dict[str, str]:
-        \"\"\"Получение текущих заголовков\"\"\"
-        return {**self._base_headers, **self._temp_headers}
+        \"\"\"Получение текущих заголовков (базовые + временные текущей задачи)\"\"\"
+        return {**self._base_headers, **self._temp_headers.get()}
 
     @headers.setter  
     def headers(self, value: Dict[str, str]):
-        \"\"\"Установка заголовков с обновлением сессии\"\"\"
+        \"\"\"Установка базовых заголовков (применяются со следующего запроса)\"\"\"
         self._base_headers = dict(value) if value else {}
-        self._session_dirty = True
 
     @property
     def cookies(self) -> Dict[str, str]:
-        \"\"\"Получение текущих куков\"\"\"
-        return {**self._base_cookies, **self._temp_cookies}
+        \"\"\"Получение текущих куков (базовые + временные текущей задачи)\"\"\"
+        return {**self._base_cookies, **self._temp_cookies.get()}
 
     @cookies.setter
     def cookies(self, value: Dict[str, str]):
-        \"\"\"Установка куков с обновлением сессии\"\"\"
+        \"\"\"Установка базовых куков (применяются со следующего запроса)\"\"\"
         self._base_cookies = dict(value) if value else {}
-        self._session_dirty = True
 
     def update_headers(self, **headers):
         \"\"\"Обновление заголовков\"\"\"
-        self._base_headers.update(headers)
-        self._session_dirty = True
+        self._base_headers = {**self._base_headers, **headers}
         return self
 
     def update_cookies(self, **cookies):
         \"\"\"Обновление куков\"\"\"
-        self._base_cookies.update(cookies)
-        self._session_dirty = True
+        self._base_cookies = {**self._base_cookies, **cookies}
         return self
 
     @asynccontextmanager
     async def with_headers(self, **temp_headers):
-        \"\"\"Контекстный менеджер для временных заголовков\"\"\"
-        old_temp = self._temp_headers.copy()
+        \"\"\"
+        Контекстный менеджер для временных заголовков.
+
+        Заголовки хранятся в contextvars: конкурентные задачи со своими
+        with_headers не видят заголовки друг друга, сессия не пересоздается.
+        \"\"\"
+        token = self._temp_headers.set({**self._temp_headers.get(), **temp_headers})
         try:
-            self._temp_headers.update(temp_headers)
-            self._session_dirty = True
             yield self
         finally:
-            self._temp_headers = old_temp
-            self._session_dirty = True
+            self._temp_headers.reset(token)
 
     @asynccontextmanager
     async def with_cookies(self, **temp_cookies):
-        \"\"\"Контекстный менеджер для временных куков\"\"\"
-        old_temp = self._temp_cookies.copy()
+        \"\"\"Контекстный менеджер для временных куков (аналогично with_headers)\"\"\"
+        token = self._temp_cookies.set({**self._temp_cookies.get(), **temp_cookies})
         try:
-            self._temp_cookies.update(temp_cookies)
-            self._session_dirty = True
             yield self
         finally:
-            self._temp_cookies = old_temp
-            self._session_dirty = True
+            self._temp_cookies.reset(token)
+
+    def _request_headers(self, headers: Dict[str, str] = None) -> Dict[str, str]:
+        \"\"\"Заголовки одного запроса: базовые < временные < заголовки endpoint'а\"\"\"
+        temp = self._temp_headers.get()
+        if not temp and not headers:
+            return self._base_headers
+        return {**self._base_headers, **temp, **(headers or {})}
+
+    def _request_cookies(self) -> Dict[str, str]:
+        temp = self._temp_cookies.get()
+        return {**self._base_cookies, **temp} if temp else self._base_cookies
+
+    async def _close_session(self):
+        \"\"\"Закрытие сессии; общий connector пула при этом не закрывается\"\"\"
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            connector = session.connector
+            await session.close()
+            if connector is not None and not self._connection_pool.owns(connector):
+                # Connector от предыдущего initialize больше никому не нужен
+                await connector.close()
 
     async def refresh_session(self):
-        \"\"\"Принудительное обновление сессии\"\"\"
+        \"\"\"Принудительное обновление сессии (пул соединений сохраняется)\"\"\"
         async with self._session_lock:
-            if self._session and not self._session.closed:
-                await self._session.close()
-            self._session = None
+            await self._close_session()
             self._session_dirty = False
 
     @asynccontextmanager
@@ -212,28 +4601,179 @@ class AiohttpClient:
                 return self._session
 
             # Закрываем старую сессию
-            if self._session and not self._session.closed:
-                await self._session.close()
+            await self._close_session()
                 
-            timeout = ClientTimeout(
-                total=self._timeout, connect=10, sock_read=10, sock_connect=10
-            )
-
-            # Объединяем базовые и временные headers/cookies
-            current_headers = self.headers
-            current_cookies = self.cookies
+            timeout = self._session_timeout()
 
+            # headers/cookies не зашиваются в сессию - они добавляются к каждому
+            # запросу, поэтому их смена не сбрасывает keep-alive/TLS соединения
             self._session = ClientSession(
                 connector=self._connection_pool.get_connector(),
+                connector_owner=False,
                 timeout=timeout,
-                headers=current_headers,
-                cookies=current_cookies,
                 trust_env=True,  # Использовать системные прокси
+                trace_configs=self._trace_configs(),
             )
             self._session_dirty = False
+            # initialize(warmup=...) вне event loop - прогрев стартует с первой сессией
+            self._start_pool_task()
 
         return self._session
 
+    def _trace_configs(self) -> List[TraceConfig]:
+        \"\"\"Трассировка сессии: статистика пула (и ожидание для метрик), фазы для TimingTracer\"\"\"
+        trace_configs = [self._connection_pool.trace_config()]
+        if self._timing_tracer is not None:
+            trace_configs.append(timing_trace_config())
+        return trace_configs
+
+    def _encode_json_body(self, data: Any, files: dict = None, content_type: str = None) -> Optional[bytes]:
+        \"\"\"JSON body кодируется один раз для всех попыток\"\"\"
+        if data is constants.JSON_NULL:
+            return self._json_codec.dumps(None)
+        if not files and content_type != "application/x-www-form-urlencoded":
+            if isinstance(data, (dict, list, int, float, bool)):
+                return self._json_codec.dumps(data)
+        return None
+
+    def _session_timeout(self) -> ClientTimeout:
+        return ClientTimeout(total=self._timeout, connect=10, sock_read=10, sock_connect=10)
+
+    @staticmethod
+    def _clamp_timeout(timeout: ClientTimeout, remaining: Optional[float]) -> ClientTimeout:
+        \"\"\"Timeout попытки, не выходящий за общий deadline повторов\"\"\"
+        if remaining is None or (timeout.total is not None and timeout.total <= remaining):
+            return timeout
+        return ClientTimeout(
+            total=remaining,
+            connect=timeout.connect,
+            sock_read=timeout.sock_read,
+            sock_connect=timeout.sock_connect,
+        )
+
+    def _streaming_timeout(self) -> ClientTimeout:
+        \"\"\"Timeout для потоковых запросов: ограничены только паузы, а не общее время\"\"\"
+        return ClientTimeout(total=None, connect=10, sock_connect=10, sock_read=self._timeout)
+
+    def _build_request_kwargs(
+        self,
+        method: str,
+        full_url: str,
+        params: dict = None,
+        data: Union[dict, list, str] = None,
+        files: Optional[List[_UploadPart]] = None,
+        headers: Dict[str, str] = None,
+        json_body: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        \"\"\"Аргументы session.request для одной попытки (FormData нельзя переиспользовать)\"\"\"
+        request_kwargs = {
+            "method": method,
+            "url": full_url,
+            "params": params,
+        }
+
+        # Базовые, временные и кастомные headers/cookies сливаются на каждый запрос
+        headers = self._request_headers(headers)
+        if headers:
+            request_kwargs["headers"] = headers
+        # Cookie параметр endpoint'а важнее одноименного cookie клиента
+        cookies = drop_overridden_cookies(self._request_cookies(), headers.get("Cookie") if headers else None)
+        if cookies:
+            request_kwargs["cookies"] = cookies
+
+        # Обработка файлов (files - части из _prepare_upload_parts)
+        if files:
+            form_data = aiohttp.FormData()
+            for part in files:
+                form_data.add_field(
+                    part.field_name,
+                    part.payload(),
+                    filename=part.filename,
+                    content_type=part.content_type,
+                )
+            if any(part.streamed for part in files):
+                # Загрузка большого файла не ограничена общим timeout сессии
+                request_kwargs["timeout"] = self._streaming_timeout()
+            if data:
+                for key, value in data.items():
+                    if isinstance(value, list):
+                        # Для списков добавляем каждый элемент отдельно
+                        for item in value:
+                            form_data.add_field(key, str(item))
+                    else:
+                        form_data.add_field(key, str(value))
+            request_kwargs["data"] = form_data
+        elif json_body is not None:
+            # dict/list и примитивы отправляем как JSON через кодек клиента
+            request_kwargs["data"] = json_body
+            if not any(key.lower() == "content-type" for key in headers or ()):
+                request_kwargs["headers"] = {
+                    **(headers or {}),
+                    "Content-Type": "application/json",
+                }
+        elif isinstance(data, (dict, list, str)):
+            # form-urlencoded или готовая строка
+            request_kwargs["data"] = data
+
+        return request_kwargs
+
+    def _build_transport_request(
+        self,
+        method: str,
+        full_url: str,
+        params: dict = None,
+        data: Union[dict, list, str] = None,
+        files: Optional[List[_UploadPart]] = None,
+        headers: Dict[str, str] = None,
+        json_body: Optional[bytes] = None,
+        remaining: Optional[float] = None,
+    ) -> TransportRequest:
+        \"\"\"Попытка запроса для Transport: те же заголовки, cookies и тело, что и для aiohttp\"\"\"
+        headers = dict(self._request_headers(headers))
+        cookies = drop_overridden_cookies(self._request_cookies(), headers.get("Cookie"))
+        if cookies:
+            cookie_header = "; ".join(f"{name}={value}" for name, value in cookies.items())
+            endpoint_cookies = headers.get("Cookie")
+            headers["Cookie"] = f"{cookie_header}; {endpoint_cookies}" if endpoint_cookies else cookie_header
+
+        timeout = self._timeout
+        request = TransportRequest(method, full_url, params=params, headers=headers, json_codec=self._json_codec)
+        if files:
+            request.files = [
+                (part.field_name, part.filename, part.payload(), part.content_type) for part in files
+            ]
+            if data:
+                request.form = {
+                    key: [str(item) for item in value] if isinstance(value, list) else str(value)
+                    for key, value in data.items()
+                }
+            if any(part.streamed for part in files):
+                # Загрузка большого файла не ограничена общим timeout
+                timeout = None
+        elif json_body is not None:
+            request.content = json_body
+            if not any(key.lower() == "content-type" for key in headers):
+                headers["Content-Type"] = "application/json"
+        elif isinstance(data, dict):
+            request.form = data
+        elif isinstance(data, str):
+            request.content = data.encode()
+
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        request.timeout = timeout
+        return request
+
+    def _acquire_circuits(self, endpoint: Optional[str], path: str):
+        \"\"\"Цепи circuit breaker для попытки; открытая цепь - CircuitOpenError сразу\"\"\"
+        breaker = self._circuit_breaker
+        if breaker is None:
+            return None
+        try:
+            return breaker.acquire(self._api_url, endpoint)
+        except CircuitOpen as exc:
+            raise CircuitOpenError(str(exc), path=path, key=exc.key, retry_in=exc.retry_in) from None
+
     async def _send_request(
         self,
         method: str,
@@ -243,6 +4783,8 @@ class AiohttpClient:
         files: dict = None,
         data: Union[dict, list, str] = None,
         headers: Dict[str, str] = None,
+        endpoint: Optional[str] = None,
+        route: Optional[str] = None,
     ) -> Any:
 
         if not self._api_url:
@@ -253,133 +4795,263 @@ class AiohttpClient:
             )
 
         full_url = f"{self._api_url.rstrip('/')}{path}"
-        _retries = self._retries
+        tracing = self._tracing
+        span = None
+        if tracing is not None:
+            # Span вызова открыт в execute_request; ключи single-flight и кеша
+            # посчитаны до добавления traceparent
+            span = tracing.current_span()
+            headers = tracing.inject(headers)
+        policy = self._retry_policy
+        headers = policy.prepare_headers(method, headers)
+        # Повтор запроса, дошедшего до сервера, - только для идемпотентных
+        retryable = policy.is_retryable(method, headers)
+        replayable = True
+        json_body = self._encode_json_body(data, files, content_type)
+        upload_parts = _prepare_upload_parts(files)
+        if upload_parts and not all(part.replayable for part in upload_parts):
+            # Async итератор или файл без seek нельзя отправить повторно
+            replayable = retryable = False
+
+        loop = asyncio.get_running_loop()
+        state = policy.start(loop.time())
+        rate_limiter = self._rate_limiter
+        breaker = self._circuit_breaker
+
+        metrics = self._metrics
+        record = None
+        if metrics is not None or span is not None:
+            if json_body is not None:
+                body_size = len(json_body)
+            elif isinstance(data, (str, bytes)):
+                body_size = len(data.encode() if isinstance(data, str) else data)
+            else:
+                body_size = 0
+        if metrics is not None:
+            # Метрики по шаблону пути ("GET /items/{item_id}"), а не по пути запроса
+            record = metrics.endpoint(metrics_key(method, path, route))
+            call_started = time.perf_counter()
+        if span is not None:
+            tracing.record_request(span, full_url, body_size)
 
-        async with self._session_context() as session:
-            while _retries:
+        transport = self._transport
+        # Транспорт заменяет только aiohttp сессию; повторы, лимиты и breaker общие
+        session = await self._ensure_session() if transport is None else None
+        tracer = self._timing_tracer
+        # Выборка решается на вызов: все попытки вызова трассируются вместе
+        sampled = transport is None and tracer is not None and tracer.sample()
+        try:
+            while True:
+                delay = None
+                timing = None
+                if span is not None and state.attempt > 1:
+                    tracing.record_attempt(span, state.attempt)
+                if rate_limiter is not None:
+                    # Каждая попытка (включая повторы) расходует токен
+                    await rate_limiter.acquire(endpoint)
+                circuits = self._acquire_circuits(endpoint, path)
+                started = loop.time()
+                if record is not None:
+                    record.request_bytes += body_size
                 try:
                     logger.debug(f"Making {method} request to {full_url}")
+                    remaining = state.remaining(loop.time())
 
-                    # Подготовка данных для отправки
-                    request_kwargs = {
-                        "method": method,
-                        "url": full_url,
-                        "params": params,
-                    }
-
-                    # Добавление кастомных headers
-                    if headers:
-                        request_kwargs["headers"] = headers
-
-                    # Обработка файлов
-                    if files:
-                        form_data = aiohttp.FormData()
-                        for field_name, file_data in files.items():
-                            if isinstance(file_data, list):
-                                # Список файлов - добавляем каждый отдельно
-                                for i, single_file in enumerate(file_data):
-                                    form_data.add_field(
-                                        field_name,
-                                        single_file,
-                                        filename=f"{field_name}_{i}.bin",
-                                    )
-                            else:
-                                # Один файл
-                                form_data.add_field(
-                                    field_name, file_data, filename=f"{field_name}.bin"
+                    try:
+                        if transport is None:
+                            request_kwargs = self._build_request_kwargs(
+                                method, full_url, params, data, upload_parts, headers, json_body
+                            )
+                            if remaining is not None:
+                                request_kwargs["timeout"] = self._clamp_timeout(
+                                    request_kwargs.get("timeout") or session.timeout, remaining
                                 )
-                        if data:
-                            for key, value in data.items():
-                                if isinstance(value, list):
-                                    # Для списков добавляем каждый элемент отдельно
-                                    for item in value:
-                                        form_data.add_field(key, str(item))
-                                else:
-                                    form_data.add_field(key, str(value))
-                        request_kwargs["data"] = form_data
-                    else:
-                        # Обработка JSON или form data
-                        if isinstance(data, (dict, list)):
-                            # По умолчанию отправляем JSON для словарей и списков
-                            if content_type == "application/x-www-form-urlencoded":
-                                request_kwargs["data"] = data
-                            else:
-                                request_kwargs["json"] = data
-                        elif isinstance(data, str):
-                            request_kwargs["data"] = data
-                        elif isinstance(data, (int, float, bool)) or data is None:
-                            # Примитивные типы и None отправляем как JSON
-                            request_kwargs["json"] = data
-
-                    async with session.request(**request_kwargs) as response:
-                        logger.debug(f"Response status: {response.status}")
-
-                        # Создаем response объект для совместимости
-                        class AiohttpResponse:
-                            def __init__(self, aiohttp_response):
-                                self.status_code = aiohttp_response.status
-                                self._response = aiohttp_response
-                                self._content = None
-                                self._text = None
-                                self._json = None
-                                self.headers = aiohttp_response.headers
-
-                            async def read(self):
-                                if self._content is None:
-                                    self._content = await self._response.read()
-                                return self._content
-
-                            async def text(self):
-                                if self._text is None:
-                                    self._text = await self._response.text()
-                                return self._text
-
-                            async def json(self):
-                                if self._json is None:
-                                    content = await self.text()
-                                    self._json = json.loads(content)
-                                return self._json
-
-                            async def content(self):
-                                return await self.read()
-
-                        wrapped_response = AiohttpResponse(response)
-                        await wrapped_response.read()  # Читаем контент заранее
-                        return wrapped_response
-
-                except (ClientError, asyncio.TimeoutError) as exc:
-                    _retries -= 1
-                    logger.warning(f"Request failed (retries left: {_retries}): {exc}")
+                            if sampled:
+                                timing = RequestTiming(method, full_url, route, state.attempt)
+                            if record is not None or timing is not None:
+                                request_kwargs["trace_request_ctx"] = {"metrics": record, "timing": timing}
+                            try:
+                                async with session.request(**request_kwargs) as raw_response:
+                                    response = AiohttpResponse(raw_response, self._json_codec)
+                                    await response.read()  # Читаем контент заранее
+                            except BaseException as exc:
+                                if timing is not None:
+                                    timing.finish(error=exc)
+                                    tracer.emit(timing)
+                                raise
+                            if timing is not None:
+                                timing.finish(response.status_code)
+                                # Итоговая попытка отдается в sink после разбора ответа (с decode)
+                                response.timing = timing
+                        else:
+                            response = await transport.send(
+                                self._build_transport_request(
+                                    method, full_url, params, data, upload_parts, headers, json_body, remaining
+                                )
+                            )
+                    finally:
+                        for part in upload_parts or ():
+                            part.close()
+
+                    logger.debug(f"Response status: {response.status_code}")
+                    if rate_limiter is not None:
+                        rate_limiter.observe(endpoint, response.status_code, response.headers)
+                    if circuits:
+                        breaker.record(circuits, breaker.is_failure(response.status_code), loop.time() - started)
+                        circuits = None
 
+                    if retryable and policy.should_retry_status(response.status_code):
+                        delay = state.next_delay(loop.time(), response.headers.get("Retry-After"))
+                    if delay is None:
+                        if record is not None:
+                            record.observe(response.status_code, len(response.body), time.perf_counter() - call_started)
+                        if span is not None:
+                            tracing.record_response(span, response.status_code, len(response.body))
+                        return response
+                    logger.warning(
+                        f"Response {response.status_code}, retry {state.attempt} in {delay:.2f}s"
+                    )
+                    if timing is not None:
+                        tracer.emit(timing)
+
+                except (ClientError, asyncio.TimeoutError, TransportError) as exc:
                     if isinstance(exc, ValueError):
                         raise SendRequestError(str(exc), path=path, status_code=400)
+                    if circuits:
+                        breaker.record(circuits, True, loop.time() - started)
+                        circuits = None
 
-                    if not _retries:
-                        if isinstance(exc, (ClientError, asyncio.TimeoutError)):
-                            raise SendRequestError(str(exc), path=path, status_code=503)
-
-                    await asyncio.sleep(0.5)  # Небольшая пауза перед повтором
+                    # Ошибка соединения - запрос не дошел до сервера, повтор безопасен
+                    if retryable or (replayable and isinstance(exc, (ClientConnectorError, TransportConnectError))):
+                        delay = state.next_delay(loop.time())
+                    if delay is None:
+                        raise SendRequestError(str(exc), path=path, status_code=503)
+                    logger.warning(f"Request failed, retry {state.attempt} in {delay:.2f}s: {exc}")
 
                 except Exception as exc:
                     logger.error(f"Unexpected error: {exc}")
 
-                    # Специальная обработка для закрытой сессии
-                    if "Session is closed" in str(exc) or "RuntimeError" in str(
+                    # Специальная обработка для закрытой сессии: запрос не отправлен
+                    if transport is None and ("Session is closed" in str(exc) or "RuntimeError" in str(
                         type(exc).__name__
-                    ):
-                        _retries -= 1
-                        if _retries > 0:
-                            logger.warning(
-                                f"Session closed, recreating (retries left: {_retries})"
-                            )
+                    )):
+                        delay = state.next_delay(loop.time()) if replayable else None
+                        if delay is not None:
+                            logger.warning(f"Session closed, recreating (retry {state.attempt})")
                             # Принудительно обновляем сессию
                             await self.refresh_session()
-                            await asyncio.sleep(
-                                1.0
-                            )  # Больше времени для восстановления
-                            continue
+                            session = await self._ensure_session()
+
+                    if delay is None:
+                        raise SendRequestError(str(exc), path=path, status_code=500)
+
+                finally:
+                    if circuits:
+                        # Попытка прервана (отмена, ошибка до отправки) - не учитывается
+                        breaker.release(circuits)
+
+                if record is not None:
+                    record.retries += 1
+                await asyncio.sleep(delay)
+        except Exception:
+            if record is not None:
+                # Вызов завершился без ответа: ошибка отправки, открытая цепь, лимит
+                record.observe_error(time.perf_counter() - call_started)
+            raise
+
+    @asynccontextmanager
+    async def _stream_request(
+        self,
+        method: str,
+        path: str,
+        params: dict = None,
+        files: dict = None,
+        data: Union[dict, list, str] = None,
+        headers: Dict[str, str] = None,
+        response_model=None,
+        validation: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ):
+        \"\"\"
+        Запрос без буферизации тела ответа.
+
+        Повторы выполняются только до получения заголовков ответа. Общий timeout
+        сессии не применяется - длинная загрузка ограничена только паузами чтения.
+        Соединение возвращается в пул при выходе из контекста.
+        \"\"\"
+        if not self._api_url:
+            raise SendRequestError(
+                "API URL is empty",
+                path=path,
+                status_code=400,
+            )
+
+        full_url = f"{self._api_url.rstrip('/')}{path}"
+        policy = self._retry_policy
+        headers = policy.prepare_headers(method, headers)
+        retryable = policy.is_retryable(method, headers)
+        replayable = True
+        json_body = self._encode_json_body(data, files)
+        upload_parts = _prepare_upload_parts(files)
+        if upload_parts and not all(part.replayable for part in upload_parts):
+            replayable = retryable = False
+
+        loop = asyncio.get_running_loop()
+        state = policy.start(loop.time())
+        rate_limiter = self._rate_limiter
+        breaker = self._circuit_breaker
+        session = await self._ensure_session()
+        while True:
+            delay = None
+            if rate_limiter is not None:
+                await rate_limiter.acquire(endpoint)
+            circuits = self._acquire_circuits(endpoint, path)
+            started = loop.time()
+            try:
+                logger.debug(f"Streaming {method} request to {full_url}")
+                request_kwargs = self._build_request_kwargs(
+                    method, full_url, params, data, upload_parts, headers, json_body
+                )
+                # deadline ограничивает только получение заголовков ответа
+                request_kwargs["timeout"] = self._clamp_timeout(
+                    self._streaming_timeout(), state.remaining(loop.time())
+                )
+                try:
+                    response = await session.request(**request_kwargs)
+                finally:
+                    for part in upload_parts or ():
+                        part.close()
+                if rate_limiter is not None:
+                    rate_limiter.observe(endpoint, response.status, response.headers)
+                if circuits:
+                    breaker.record(circuits, breaker.is_failure(response.status), loop.time() - started)
+                    circuits = None
+                if retryable and policy.should_retry_status(response.status):
+                    delay = state.next_delay(loop.time(), response.headers.get("Retry-After"))
+                if delay is None:
+                    break
+                response.release()
+                logger.warning(f"Stream response {response.status}, retry {state.attempt} in {delay:.2f}s")
+            except (ClientError, asyncio.TimeoutError) as exc:
+                if circuits:
+                    breaker.record(circuits, True, loop.time() - started)
+                    circuits = None
+                if retryable or (replayable and isinstance(exc, ClientConnectorError)):
+                    delay = state.next_delay(loop.time())
+                if delay is None:
+                    raise SendRequestError(str(exc), path=path, status_code=503)
+                logger.warning(f"Stream request failed, retry {state.attempt} in {delay:.2f}s: {exc}")
+            finally:
+                if circuits:
+                    breaker.release(circuits)
+            await asyncio.sleep(delay)
 
-                    raise SendRequestError(str(exc), path=path, status_code=500)
+        try:
+            logger.debug(f"Response status: {response.status}")
+            yield StreamingResponse(response, self._json_codec, response_model, validation or self._validation)
+        finally:
+            # Дочитанное соединение уходит обратно в пул, недочитанное закрывается
+            response.release()
 
     def initialize(
         self,
@@ -390,11 +5062,45 @@ class AiohttpClient:
         retries: int = 3,
         max_connections: int = 100,
         max_connections_per_host: int = 10,
+        json_codec: Union[str, JsonCodec, None] = None,
+        validation: str = "full",
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        single_flight: Union[bool, SingleFlight, None] = None,
+        response_cache: Optional[ResponseCache] = None,
+        transport: Union[str, Transport, None] = None,
+        metrics: Union[bool, ClientMetrics, None] = None,
+        timing_tracer: Optional[TimingTracer] = None,
+        tracing: Union[bool, OpenTelemetryTracing, None] = None,
+        warmup: Optional[int] = None,
+        min_idle: Optional[int] = None,
     ) -> "AiohttpClient":
-        \"\"\"Инициализация клиента с настройками\"\"\"
+        \"\"\"Инициализация клиента с настройками
+
+        json_codec: "auto" (по умолчанию), "orjson", "msgspec", "json"
+        или объект с методами dumps/loads
+        validation: "full" (по умолчанию), "construct" - модели без валидации
+        для доверенных API, "lazy" - валидация поля при первом обращении
+        retry_policy: RetryPolicy; по умолчанию retries попыток с экспоненциальной
+        задержкой, повторяются только идемпотентные методы
+        rate_limiter: RateLimiter - клиентское ограничение частоты запросов
+        circuit_breaker: CircuitBreaker - быстрый отказ при деградации API
+        single_flight: True или SingleFlight - объединение одинаковых конкурентных GET
+        response_cache: ResponseCache - кеш GET ответов (Cache-Control, ETag, LRU)
+        transport: "aiohttp" (по умолчанию), "http2" (HttpxTransport) или объект
+        Transport - чем отправляются запросы
+        metrics: True или ClientMetrics - метрики по endpoint'ам (client.metrics)
+        timing_tracer: TimingTracer - фазы запросов (DNS, connect, TTFB, decode) по выборке
+        tracing: True или OpenTelemetryTracing - span на вызов и traceparent в заголовках
+        warmup: число соединений, открываемых заранее в фоне (см. warmup())
+        min_idle: поддерживать в фоне не меньше min_idle свободных соединений к API
+        (0 - выключить)
+        \"\"\"
         self._api_url = str(api_url).rstrip("/")
+        self._json_codec = get_json_codec(json_codec)
+        self._validation = check_validation_mode(validation)
         
-        # Используем property для автоматического обновления сессии
         if headers:
             self.headers = headers
         if cookies:
@@ -402,34 +5108,262 @@ class AiohttpClient:
             
         self._timeout = int(timeout) if timeout else 30
         self._retries = int(retries) if retries else 3
+        self._retry_policy = retry_policy or RetryPolicy(max_attempts=self._retries)
+        if rate_limiter is not None:
+            self._rate_limiter = rate_limiter
+        if circuit_breaker is not None:
+            self._circuit_breaker = circuit_breaker
+        if single_flight is not None:
+            self.set_single_flight(single_flight)
+        if response_cache is not None:
+            self._response_cache = response_cache
+        if transport is not None:
+            self._transport = get_transport(transport)
+        if metrics is not None:
+            self.set_metrics(metrics)
+        if timing_tracer is not None:
+            self.set_timing_tracer(timing_tracer)
+        if tracing is not None:
+            self.set_tracing(tracing)
 
-        # Обновляем настройки пула соединений
+        # Обновляем настройки пула соединений; сессия на старом пуле
+        # пересоздается при следующем запросе
         self._connection_pool = ConnectionPool(
             max_connections, max_connections_per_host
         )
+        self._session_dirty = self._session is not None
+        if warmup is not None:
+            self._pending_warmup = max(0, int(warmup))
+        if min_idle is not None:
+            self._min_idle = max(0, int(min_idle))
+        self._start_pool_task()
 
         return self
 
     async def close(self):
         \"\"\"Закрытие клиента и освобождение ресурсов\"\"\"
+        task, self._pool_task = self._pool_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
         async with self._session_lock:
-            if self._session and not self._session.closed:
-                await self._session.close()
+            await self._close_session()
 
         await self._connection_pool.close()
 
+        if self._transport is not None:
+            await self._transport.close()
+
+        if self._response_cache is not None:
+            await self._response_cache.close()
+
     async def health_check(self) -> bool:
         \"\"\"Проверка здоровья API\"\"\"
         try:
+            if self._transport is not None:
+                response = await self._transport.send(
+                    self._build_transport_request("get", f"{self._api_url}/health")
+                )
+                return response.status_code == 200
             async with self._session_context() as session:
-                async with session.get(f"{self._api_url}/health") as response:
+                async with session.get(
+                    f"{self._api_url}/health",
+                    headers=self._request_headers(),
+                    cookies=self._request_cookies(),
+                ) as response:
                     return response.status == 200
         except Exception:
             return False
 
-    def set_rate_limiter(self, rate_limiter):
-        \"\"\"Установка ограничителя частоты запросов\"\"\"
+    async def warmup(self, connections: Optional[int] = None, path: str = "/", method: str = "HEAD") -> int:
+        \"\"\"
+        Прогрев пула: connections одновременных запросов method (HEAD или
+        OPTIONS) к path. Свободных соединений на все запросы нет, поэтому пул
+        открывает недостающие заранее - DNS, TCP и TLS handshake проходят до
+        первой волны запросов, а не в ней; после ответа соединения остаются
+        в пуле как keep-alive. Статус ответа не важен, ошибки логируются.
+
+        connections - по умолчанию и не больше max_connections_per_host (лимит
+        пула aiohttp). Возвращает число запросов, получивших ответ; с Transport
+        запросы отправляются через него.
+
+        Запросы идут через отдельную сессию на том же connector'е без trust_env:
+        сессия клиента перед каждым запросом ищет прокси и .netrc в потоке, запросы
+        приходили бы в пул вразнобой и брали уже освобожденные соединения. Прокси
+        из окружения определяется один раз на весь прогрев.
+        \"\"\"
+        if not self._api_url:
+            raise SendRequestError("API URL is not set", path=path, status_code=400)
+
+        pool = self._connection_pool
+        limits = [limit for limit in (pool.max_connections_per_host, pool.max_connections) if limit]
+        count = connections or (limits[0] if limits else 1)
+        url = f"{self._api_url}{path}"
+
+        if self._transport is not None:
+            results = await asyncio.gather(
+                *(self._transport.send(self._build_transport_request(method, url)) for _ in range(count)),
+                return_exceptions=True,
+            )
+            return sum(1 for result in results if not isinstance(result, BaseException))
+
+        count = min([count, *limits])
+        proxy, proxy_auth = await asyncio.to_thread(_env_proxy, URL(url))
+        headers, cookies = self._request_headers(), self._request_cookies()
+
+        async with ClientSession(
+            connector=pool.get_connector(),
+            connector_owner=False,
+            timeout=self._session_timeout(),
+            trace_configs=[pool.trace_config()],
+        ) as session:
+
+            async def open_connection() -> bool:
+                try:
+                    async with session.request(
+                        method, url, headers=headers, cookies=cookies, proxy=proxy, proxy_auth=proxy_auth
+                    ) as response:
+                        await response.read()
+                    return True
+                except Exception as exc:
+                    logger.warning(f"Warmup request to {url} failed: {exc}")
+                    return False
+
+            return sum(await asyncio.gather(*(open_connection() for _ in range(count))))
+
+    def set_min_idle(self, min_idle: int):
+        \"\"\"Поддержание не меньше min_idle свободных соединений к API в фоне (0 - выключить)\"\"\"
+        self._min_idle = max(0, int(min_idle))
+        self._start_pool_task()
+        return self
+
+    def _start_pool_task(self):
+        \"\"\"Запуск фонового прогрева / поддержания пула, если есть работа и event loop\"\"\"
+        if not (self._pending_warmup or self._min_idle):
+            return
+        task = self._pool_task
+        if task is not None and not task.done():
+            if not self._pending_warmup:
+                return  # поддержание min_idle уже идет
+            task.cancel()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # стартует в _ensure_session
+
+        warmup, self._pending_warmup = self._pending_warmup, 0
+        self._pool_task = asyncio.ensure_future(self._keep_pool_warm(warmup))
+
+    async def _keep_pool_warm(self, warmup: int):
+        \"\"\"
+        Начальный прогрев и поддержание min_idle: раз в треть keepalive_timeout
+        warmup(min_idle) - свободные соединения переиспользуются (и не закрываются
+        по keepalive_timeout), недостающие открываются заново
+        \"\"\"
+        if warmup:
+            try:
+                await self.warmup(warmup)
+            except Exception as exc:
+                logger.warning(f"Connection pool warmup failed: {exc}")
+
+        while self._min_idle:
+            if self._transport is None:
+                try:
+                    await self.warmup(self._min_idle)
+                except Exception as exc:
+                    logger.warning(f"Connection pool warmup failed: {exc}")
+            await asyncio.sleep(self._connection_pool.keepalive_timeout / 3)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        \"\"\"
+        Состояние пула aiohttp для подбора max_connections_per_host: acquired,
+        idle, waiting (всего и по хостам), created / reused и перцентили
+        ожидания свободного соединения (см. ConnectionPool.stats)
+        \"\"\"
+        return self._connection_pool.stats()
+
+    def set_retry_policy(self, retry_policy: RetryPolicy):
+        \"\"\"Установка политики повторов запросов\"\"\"
+        self._retry_policy = retry_policy
+        self._retries = retry_policy.max_attempts
+        return self
+
+    def set_circuit_breaker(self, circuit_breaker: Optional[CircuitBreaker]):
+        \"\"\"Установка circuit breaker (None - отключить)\"\"\"
+        self._circuit_breaker = circuit_breaker
+        return self
+
+    def circuit_state(self) -> Dict[str, Dict[str, Any]]:
+        \"\"\"Состояние цепей circuit breaker: {ключ: {state, calls, failures, ...}}\"\"\"
+        return self._circuit_breaker.snapshot() if self._circuit_breaker is not None else {}
+
+    def set_single_flight(self, single_flight: Union[bool, SingleFlight, None] = True):
+        \"\"\"Включение объединения одинаковых конкурентных GET запросов (False/None - выключить)\"\"\"
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self._single_flight = single_flight or None
+        return self
+
+    def set_response_cache(self, response_cache: Optional[ResponseCache]):
+        \"\"\"Установка кеша GET ответов (None - отключить)\"\"\"
+        self._response_cache = response_cache
+        return self
+
+    def set_transport(self, transport: Union[str, Transport, None]):
+        \"\"\"
+        Установка транспорта запросов: "aiohttp" или None - встроенная aiohttp
+        сессия, "http2" - HttpxTransport, или объект Transport.
+
+        Предыдущий транспорт не закрывается - это делает вызывающий код.
+        \"\"\"
+        self._transport = get_transport(transport)
+        return self
+
+    def set_metrics(self, metrics: Union[bool, ClientMetrics, None] = True):
+        \"\"\"Включение метрик по endpoint'ам (False/None - выключить)\"\"\"
+        if metrics is True:
+            metrics = ClientMetrics()
+        self._metrics = metrics or None
+        return self
+
+    def set_timing_tracer(self, timing_tracer: Optional[TimingTracer]):
+        \"\"\"Установка трассировки фаз запросов (None - отключить)\"\"\"
+        if (timing_tracer is None) != (self._timing_tracer is None):
+            # Меняется набор TraceConfig сессии - сессия пересоздается
+            self._session_dirty = self._session is not None
+        self._timing_tracer = timing_tracer
+        return self
+
+    def set_tracing(self, tracing: Union[bool, OpenTelemetryTracing, None] = True):
+        \"\"\"
+        Включение OpenTelemetry трассировки вызовов (False/None - выключить).
+        True - глобальные TracerProvider и propagator (нужен opentelemetry-api).
+        \"\"\"
+        self._tracing = get_tracing(tracing)
+        return self
+
+    @property
+    def metrics(self) -> Optional[ClientMetrics]:
+        \"\"\"Метрики по endpoint'ам (None - не включены): client.metrics.snapshot()\"\"\"
+        return self._metrics
+
+    def cache_stats(self) -> Dict[str, int]:
+        \"\"\"Счетчики кеша ответов (hits, misses, revalidated, evictions, bytes, ...)\"\"\"
+        return self._response_cache.stats() if self._response_cache is not None else {}
+
+    def set_rate_limiter(self, rate_limiter: Optional[RateLimiter]):
+        \"\"\"
+        Установка ограничителя частоты запросов (None - отключить).
+
+        Подходит любой объект с методами acquire(endpoint) и
+        observe(endpoint, status, headers).
+        \"\"\"
         self._rate_limiter = rate_limiter
+        return self
 
     def set_auth_token(self, token: str):
         \"\"\"Установка Bearer токена авторизации\"\"\"
@@ -437,9 +5371,9 @@ class AiohttpClient:
 
     def remove_auth(self):
         \"\"\"Удаление авторизации\"\"\"
-        if "Authorization" in self._base_headers:
-            del self._base_headers["Authorization"]
-            self._session_dirty = True
+        self._base_headers = {
+            key: value for key, value in self._base_headers.items() if key != "Authorization"
+        }
         return self
 
     async def __aenter__(self):
@@ -454,110 +5388,146 @@ HTTP декораторы для endpoints (FastAPI-style)
 
 import inspect
 from functools import wraps
-from typing import Optional, Any, Callable, TypeVar
-from .utils import handle_request, filter_params_by_suffix
+from typing import Optional, Any, Callable, Dict, TypeVar
+from .batch import endpoint_method
+from .pagination import PageIterator
+from .utils import RequestPlan, execute_plan, get_union_type, stream_plan
 
 DecoratedCallable = TypeVar("DecoratedCallable", bound=Callable[..., Any])
 
 
 def http_method(
-    method: str, path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    method: str, path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
     \"\"\"Базовый декоратор для HTTP методов с полной обработкой\"\"\"
 
     def decorator(func: DecoratedCallable) -> DecoratedCallable:
-        @wraps(func)
-        async def wrapper(self, *args, **kwargs):
-            # Получаем сигнатуру функции для восстановления locals()
-            sig = inspect.signature(func)
-            bound_args = sig.bind(self, *args, **kwargs)
-            bound_args.apply_defaults()
-            
-            locals_dict = dict(bound_args.arguments)
-            
-            # Подставляем path параметры используя утилиты
-            
-            formatted_path = path
-            path_params = filter_params_by_suffix(locals_dict, '_path')
-            
-            for param_name, value, field_name in path_params:
-                if value is not None:
-                    # Ищем все возможные варианты плейсхолдеров
-                    target_placeholder = '{' + field_name + '}'
-                    if target_placeholder in formatted_path:
-                        formatted_path = formatted_path.replace(target_placeholder, str(value))
-                    else:
-                        # Fallback - заменяем любой плейсхолдер в пути
-                        import re
-                        if '{' in formatted_path and '}' in formatted_path:
-                            # Простая замена первого найденного {placeholder}
-                            start = formatted_path.find('{')
-                            end = formatted_path.find('}', start)
-                            if start != -1 and end != -1:
-                                before = formatted_path[:start]
-                                after = formatted_path[end+1:]
-                                formatted_path = before + str(value) + after
-            
-            return await handle_request(
-                self.client, 
-                method, 
-                formatted_path.rstrip('/'), 
-                locals_dict, 
-                response_model=response_model,
-                response_models=response_models,
-                whole_body_fields=whole_body_fields,
-                field_mapping=field_mapping,
-                param_mapping=param_mapping,
-                body_required=body_required
-            )
+        # План запроса строится один раз при импорте, а не на каждый вызов
+        plan = RequestPlan(
+            func,
+            method,
+            path,
+            whole_body_fields=whole_body_fields,
+            field_mapping=field_mapping,
+            param_mapping=param_mapping,
+            body_required=body_required,
+            validation_arg=validation_arg,
+        )
+        # Union ответа собирается в один (tagged) тип тоже при импорте
+        parse_model = response_model
+        if response_models is not None:
+            parse_model = get_union_type(response_models, discriminator, discriminator_mapping, discriminator_fields)
+
+        if stream:
+            # Потоковый вариант возвращает async context manager, а не корутину
+            @wraps(func)
+            def wrapper(self, *args, **kwargs):
+                return stream_plan(self.client, plan, plan.bind(args, kwargs), response_model=parse_model)
+        else:
+            @wraps(func)
+            async def wrapper(self, *args, **kwargs):
+                return await execute_plan(
+                    self.client,
+                    plan,
+                    plan.bind(args, kwargs),
+                    response_model=parse_model,
+                )
         
         # Сохраняем метаданные для отладки
         wrapper._http_method = method
         wrapper._http_path = path
         wrapper._response_model = response_model
         wrapper._original_func = func
-        
-        return wrapper
+        wrapper._request_plan = plan
+
+        if stream:
+            return wrapper
+        # Обычный endpoint получает .map() для пакетных вызовов
+        return endpoint_method(wrapper)
     return decorator
 
 
 def _get(
-    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
-    return http_method("get", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required)
+    return http_method("get", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required, discriminator, discriminator_mapping, discriminator_fields, stream, validation_arg)
 
 
 def _post(
-    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
-    return http_method("post", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required)
+    return http_method("post", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required, discriminator, discriminator_mapping, discriminator_fields, stream, validation_arg)
 
 
 def _put(
-    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
-    return http_method("put", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required)
+    return http_method("put", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required, discriminator, discriminator_mapping, discriminator_fields, stream, validation_arg)
 
 
 def _delete(
-    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
-    return http_method("delete", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required)
+    return http_method("delete", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required, discriminator, discriminator_mapping, discriminator_fields, stream, validation_arg)
 
 
 def _patch(
-    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False
+    path: str, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False,
+    discriminator=None, discriminator_mapping=None, discriminator_fields=None, stream=False, validation_arg="validation"
 ) -> Callable[[DecoratedCallable], DecoratedCallable]:
-    return http_method("patch", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required)
+    return http_method("patch", path, response_model, response_models, whole_body_fields, field_mapping, param_mapping, body_required, discriminator, discriminator_mapping, discriminator_fields, stream, validation_arg)
+
+
+def _paginated(page_method: str, config: Dict[str, Any], prefetch_arg: str = "prefetch") -> Callable[[DecoratedCallable], DecoratedCallable]:
+    \"\"\"
+    Декоратор iter_* метода: элементы всех страниц page_method (PageIterator).
+
+    prefetch_arg - имя аргумента предзагрузки (генератор меняет его, если
+    prefetch занят параметром спецификации).
+    \"\"\"
+
+    def decorator(func: DecoratedCallable) -> DecoratedCallable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["self"]
+            prefetch = arguments.pop(prefetch_arg)
+            return PageIterator(getattr(self, page_method), arguments, config, prefetch=prefetch)
+
+        wrapper._pagination = config
+        return wrapper
+    return decorator
 """
 
     utils = """\"\"\"
 Вспомогательные утилиты для endpoints
 \"\"\"
 
-from typing import Optional, Dict, Any
+import codecs
+import inspect
+import json
+import mmap
+import os
+import re
+import time
+from typing import Annotated, Optional, Dict, Any, AsyncIterable, AsyncIterator, Callable, IO, List, Tuple, Union
 from datetime import datetime, date
+
+from pydantic import Discriminator, Field, Tag, TypeAdapter
+
 from . import constants
+from .metrics import metrics_key
+from .single_flight import request_key
+from .validation import build_response, check_validation_mode
 
 
 def is_not_set(value: Any) -> bool:
@@ -588,6 +5558,11 @@ def serialize_value(value: Any) -> Any:
         return value
 
 
+def format_path_value(value: Any, placeholder: str) -> str:
+    \"\"\"Значение path параметра в URL: незаданный параметр оставляет плейсхолдер как есть\"\"\"
+    return placeholder if value is None or value is constants.NOTSET else str(value)
+
+
 def serialize_query_value(value: Any) -> Any:
     \"\"\"Специальная сериализация для query параметров\"\"\"
     if isinstance(value, datetime):
@@ -704,7 +5679,9 @@ def prepare_body_data(locals_dict: dict, whole_body_fields=None, field_mapping=N
             
         # Проверяем если это поле указано как whole_body_field
         if field_name in whole_body_fields:
-            # Это поле передается как весь body целиком
+            # Это поле передается как весь body целиком (явный None - JSON null)
+            if value is None:
+                return constants.JSON_NULL
             whole_body_value = serialize_value(value)
             break  # Если найдено whole_body поле, используем только его
         elif param_name.startswith('additional_fields_body'):
@@ -745,6 +5722,40 @@ def prepare_body_data(locals_dict: dict, whole_body_fields=None, field_mapping=N
     return body_data if body_data else None
 
 
+class FileUpload:
+    \"\"\"
+    Файл для multipart загрузки с явным именем и content-type.
+
+    content - bytes, memoryview/mmap, pathlib.Path, бинарный файловый объект
+    или async итератор bytes.
+    \"\"\"
+
+    __slots__ = ("content", "filename", "content_type")
+
+    def __init__(self, content: Any, filename: Optional[str] = None, content_type: Optional[str] = None):
+        self.content = content
+        self.filename = filename
+        self.content_type = content_type
+
+
+_FILE_TYPES = (bytes, bytearray, memoryview, mmap.mmap, os.PathLike, FileUpload)
+
+# Что принимают _file параметры endpoints
+FileContent = Union[bytes, bytearray, memoryview, mmap.mmap, os.PathLike, IO[bytes], AsyncIterable[bytes], FileUpload]
+
+
+def is_file_value(value: Any) -> bool:
+    \"\"\"
+    Файлом считаются bytes, memoryview/mmap, пути (os.PathLike), бинарные файловые
+    объекты, async итераторы bytes, FileUpload и непустые списки из них
+    \"\"\"
+    if isinstance(value, list):
+        return bool(value) and is_file_value(value[0])
+    if isinstance(value, _FILE_TYPES) or hasattr(value, "__aiter__"):
+        return True
+    return hasattr(value, "read") and not isinstance(value, str)
+
+
 def prepare_files(locals_dict: dict) -> Optional[Dict[str, Any]]:
     \"\"\"Подготовка file параметров (bytes и List[bytes])\"\"\"
     
@@ -752,11 +5763,7 @@ def prepare_files(locals_dict: dict) -> Optional[Dict[str, Any]]:
     file_params = filter_params_by_suffix(locals_dict, '_file')
     
     for param_name, value, field_name in file_params:
-        # bytes или список bytes считаются файлами
-        if isinstance(value, bytes):
-            files[field_name] = value
-        elif isinstance(value, list) and value and isinstance(value[0], bytes):
-            # Список bytes файлов
+        if is_file_value(value):
             files[field_name] = value
     
     return files if files else None
@@ -769,31 +5776,428 @@ def prepare_form_data(locals_dict: dict) -> Optional[Dict[str, Any]]:
     file_params = filter_params_by_suffix(locals_dict, '_file')
     
     for param_name, value, field_name in file_params:
-        # Исключаем bytes и List[bytes] - это файлы
-        if not isinstance(value, bytes) and not (isinstance(value, list) and value and isinstance(value[0], bytes)):
+        # Исключаем файлы
+        if not is_file_value(value):
             form_data[field_name] = serialize_value(value)
     
     return form_data if form_data else None
 
 
-async def handle_request(client, method: str, path: str, locals_dict: dict, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False) -> Any:
-    \"\"\"Обработка HTTP запроса с автоматической подготовкой параметров и парсингом response модели\"\"\"
-    params = prepare_params(locals_dict, param_mapping)
-    data = prepare_body_data(locals_dict, whole_body_fields, field_mapping, body_required)
-    files = prepare_files(locals_dict)
-    form_data = prepare_form_data(locals_dict)
-    headers = prepare_headers(locals_dict, param_mapping)
-    cookies = prepare_cookies(locals_dict, param_mapping)
-    
-    # Добавляем cookies в headers как Cookie заголовок
+_type_adapters: Dict[Any, TypeAdapter] = {}
+_leading_whitespace = re.compile(rb'\\s*')
+
+
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    \"\"\"Кэшированный TypeAdapter для типа ответа (модель или List[модель])\"\"\"
+    adapter = _type_adapters.get(response_type)
+    if adapter is None:
+        adapter = _type_adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def validate_python_data(response_data: Any, response_model, validation: str = "full") -> Any:
+    \"\"\"Валидация уже декодированных данных: список моделей проверяется одним вызовом\"\"\"
+    if validation != "full":
+        # construct / lazy - модели без полной валидации
+        return build_response(response_data, response_model, validation)
+    if isinstance(response_data, list):
+        return get_type_adapter(List[response_model]).validate_python(response_data)
+    return get_type_adapter(response_model).validate_python(response_data)
+
+
+def validate_json_bytes(raw: bytes, response_model, loads=json.loads) -> Any:
+    \"\"\"
+    Валидация JSON ответа напрямую из bytes.
+
+    Модель строится только для объекта или массива на верхнем уровне
+    (тип определяется по первому значимому байту). Если валидация не удалась,
+    возвращаются декодированные данные как есть.
+    \"\"\"
+    start = _leading_whitespace.match(raw).end()
+    first_byte = raw[start:start + 1]
+
+    if first_byte == b'[':
+        adapter = get_type_adapter(List[response_model])
+    elif first_byte == b'{':
+        adapter = get_type_adapter(response_model)
+    else:
+        return loads(raw)
+
+    try:
+        return adapter.validate_json(raw)
+    except Exception:
+        return loads(raw)
+
+
+_union_types: Dict[tuple, Any] = {}
+
+
+def _discriminator_tag_getter(discriminator: Optional[str], discriminator_mapping: Optional[Dict[str, Any]], discriminator_fields: Optional[Dict[str, Any]]):
+    \"\"\"Функция выбора варианта Union: значение -> имя модели (тег) или None\"\"\"
+    if discriminator:
+        tags_by_value = {value: model.__name__ for value, model in discriminator_mapping.items()}
+
+        def get_tag(value: Any) -> Optional[str]:
+            if isinstance(value, dict):
+                tag_value = value.get(discriminator)
+            else:
+                tag_value = getattr(value, discriminator, None)
+            return tags_by_value.get(getattr(tag_value, "value", tag_value))
+
+        return get_tag
+
+    fields = list(discriminator_fields.items())
+
+    def get_tag(value: Any) -> Optional[str]:
+        for field_name, model in fields:
+            if isinstance(value, dict) and field_name in value or isinstance(value, model):
+                return model.__name__
+        return None
+
+    return get_tag
+
+
+def get_union_type(response_models: List[Any], discriminator: Optional[str] = None, discriminator_mapping: Optional[Dict[str, Any]] = None, discriminator_fields: Optional[Dict[str, Any]] = None) -> Any:
+    \"\"\"
+    Union тип ответа для валидации одним TypeAdapter.
+
+    discriminator + discriminator_mapping - tagged union по значению свойства
+    (если mapping не передан, тегом считается имя модели, как в OpenAPI).
+    discriminator_fields - tagged union по наличию обязательного поля,
+    уникального для варианта. Без дискриминатора - обычный Union, варианты
+    проверяются слева направо за один проход.
+    \"\"\"
+    key = (
+        tuple(response_models),
+        discriminator,
+        tuple(discriminator_mapping.items()) if discriminator_mapping else None,
+        tuple(discriminator_fields.items()) if discriminator_fields else None,
+    )
+    union_type = _union_types.get(key)
+    if union_type is not None:
+        return union_type
+
+    if discriminator or discriminator_fields:
+        if discriminator and not discriminator_mapping:
+            discriminator_mapping = {model.__name__: model for model in response_models}
+        variants = tuple(Annotated[model, Tag(model.__name__)] for model in response_models)
+        union_type = Annotated[
+            Union[variants],
+            Discriminator(_discriminator_tag_getter(discriminator, discriminator_mapping, discriminator_fields)),
+        ]
+    else:
+        union_type = Annotated[Union[tuple(response_models)], Field(union_mode="left_to_right")]
+
+    _union_types[key] = union_type
+    return union_type
+
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+_json_whitespace = re.compile(r'[ \\t\\n\\r]*')
+# Остаток строки JSON после открывающей кавычки; группа 1 пуста, если строка не закончилась
+_json_string_rest = re.compile(r'[^"\\\\]*(?:\\\\.[^"\\\\]*)*(")?', re.S)
+# Все, кроме скобок: значения, запятые и целые строки внутри контейнера
+_json_between_brackets = re.compile(r'[^\\[\\]{}"]*(?:"[^"\\\\]*(?:\\\\.[^"\\\\]*)*"[^\\[\\]{}"]*)*', re.S)
+# Конец числа или литерала верхнего уровня
+_json_structural = re.compile(r'["\\[\\]{},]')
+
+
+def _json_boundary_patterns(nesting: int) -> Tuple["re.Pattern", "re.Pattern"]:
+    \"\"\"
+    Регулярные выражения для границ элементов с вложенностью до nesting.
+
+    Первое совпадает с объектом или массивом целиком, второе - с серией
+    законченных элементов через запятую. Значения не разбираются и не
+    проверяются: это делает loads, нужны только границы.
+    \"\"\"
+    string = r'"[^"\\\\]*(?:\\\\.[^"\\\\]*)*"'
+    between = r'[^\\[\\]{}"]*'
+    container = None
+    for _ in range(nesting):
+        nested = string if container is None else f"{string}|{container}"
+        container = rf'[\\[{{]{between}(?:(?:{nested}){between})*[\\]}}]'
+    # Число или литерал закончен, только если за ним уже пришел разделитель
+    scalar = r'[^ \\t\\n\\r,\\[\\]{}"]+(?=[ \\t\\n\\r]*[,\\]])'
+    element = f"(?:{string}|{container}|{scalar})"
+    return re.compile(container, re.S), re.compile(rf"{element}(?:[ \\t\\n\\r]*,[ \\t\\n\\r]*{element})*", re.S)
+
+
+_json_container, _json_run = _json_boundary_patterns(6)
+
+
+def is_ndjson_content_type(content_type: str) -> bool:
+    \"\"\"NDJSON / JSON Lines ответ (одно JSON значение на строку)\"\"\"
+    return content_type.split(";", 1)[0].strip().lower() in NDJSON_CONTENT_TYPES
+
+
+def parse_ndjson(raw: bytes, loads=json.loads) -> List[Any]:
+    \"\"\"Декодирование NDJSON тела целиком в список значений\"\"\"
+    return [loads(line) for line in raw.splitlines() if line.strip()]
+
+
+class JsonArrayScanner:
+    \"\"\"
+    Инкрементальный разбор JSON массива верхнего уровня.
+
+    feed() принимает очередной кусок текста и возвращает элементы, которые уже
+    пришли целиком; значения декодирует loads кодека. Элемент, начатый на
+    границе куска, не разбирается заново с каждым куском: сканер помнит
+    глубину вложенности и положение внутри строки, копит куски элемента и
+    декодирует его один раз, когда найден конец.
+    Элементы, целиком лежащие в куске, сканер только разграничивает и
+    декодирует одним вызовом loads как массив.
+    Если тело не массив, оно накапливается и декодируется целиком в конце.
+    \"\"\"
+
+    __slots__ = ("_loads", "_state", "_parts", "_in_element", "_depth", "_in_string", "_escape", "_after_value")
+
+    _BEFORE, _INSIDE, _DONE, _NOT_ARRAY = range(4)
+
+    def __init__(self, loads: Callable[[Union[str, bytes]], Any] = json.loads):
+        self._loads = loads
+        self._state = self._BEFORE
+        # Куски текущего элемента (или всего тела, если это не массив)
+        self._parts: List[str] = []
+        self._in_element = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._after_value = False
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        values = []
+        pos = 0
+        length = len(text)
+        # Элементы подряд, целиком лежащие в куске, декодируются одним вызовом
+        run_start = run_end = None
+
+        while self._state == self._BEFORE:
+            pos = _json_whitespace.match(text, pos).end()
+            if pos >= length:
+                break
+            if text[pos] == "[":
+                self._state = self._INSIDE
+                pos += 1
+            else:
+                self._state = self._NOT_ARRAY
+
+        while self._state == self._INSIDE:
+            if not self._in_element:
+                pos = _json_whitespace.match(text, pos).end()
+                if pos >= length:
+                    break
+                char = text[pos]
+                if char == "]":
+                    self._state = self._DONE
+                    break
+                if char == "," and self._after_value:
+                    self._after_value = False
+                    pos += 1
+                    continue
+                if char == "," or self._after_value:
+                    raise json.JSONDecodeError("Expecting value" if char == "," else "Expecting ',' delimiter", text, pos)
+                if not self._parts:
+                    run = _json_run.match(text, pos)
+                    if run is not None:
+                        if run_start is None:
+                            run_start = pos
+                        run_end = pos = run.end()
+                        self._after_value = True
+                        continue
+                self._in_element = True
+                self._depth = 0
+                self._in_string = False
+
+            start = pos
+            end = self._scan_element(text, pos)
+            if end is None:
+                # Элемент продолжится в следующем куске
+                self._parts.append(text[start:])
+                break
+            if self._parts:
+                self._parts.append(text[start:end])
+                element, self._parts = "".join(self._parts), []
+                values.append(self._loads(element))
+            else:
+                if run_start is None:
+                    run_start = start
+                run_end = end
+            self._in_element = False
+            self._after_value = True
+            pos = end
+
+        if run_start is not None:
+            values.extend(self._loads(f"[{text[run_start:run_end]}]"))
+
+        if self._state == self._NOT_ARRAY:
+            self._parts.append(text[pos:])
+            if final:
+                value = self._loads("".join(self._parts))
+                self._parts = []
+                values.extend(value if isinstance(value, list) else [value])
+        elif final and self._state != self._DONE:
+            raise json.JSONDecodeError("Unterminated JSON array", text, length)
+        return values
+
+    def _scan_element(self, text: str, pos: int) -> Optional[int]:
+        \"\"\"
+        Конец текущего элемента в text или None, если элемент не закончился.
+
+        Нужен для элементов, которые не поместились в кусок или вложены
+        глубже _json_container; значения не строит, регулярные выражения
+        пропускают все между скобками и неглубокие контейнеры целиком.
+        \"\"\"
+        length = len(text)
+        if self._in_string:
+            if self._escape:
+                if pos >= length:
+                    return None
+                # Экранированный символ пришел в начале куска
+                self._escape = False
+                pos += 1
+            pos = self._skip_string(text, pos)
+            if pos is None:
+                return None
+            if self._depth == 0:
+                return pos
+
+        if self._depth == 0:
+            if pos >= length:
+                return None
+            char = text[pos]
+            if char == '"':
+                return self._skip_string(text, pos + 1)
+            if char not in "[{":
+                # Число или литерал заканчивается разделителем
+                match = _json_structural.search(text, pos)
+                return None if match is None else match.start()
+            flat = _json_container.match(text, pos)
+            if flat is not None:
+                return flat.end()
+            self._depth = 1
+            pos += 1
+
+        while True:
+            pos = _json_between_brackets.match(text, pos).end()
+            if pos >= length:
+                return None
+            char = text[pos]
+            if char == '"':
+                # Строка продолжится в следующем куске
+                return self._skip_string(text, pos + 1)
+            if char in "[{":
+                flat = _json_container.match(text, pos)
+                if flat is not None:
+                    pos = flat.end()
+                    continue
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos + 1
+            pos += 1
+
+    def _skip_string(self, text: str, pos: int) -> Optional[int]:
+        \"\"\"Позиция после закрывающей кавычки или None, если строка продолжится в следующем куске\"\"\"
+        match = _json_string_rest.match(text, pos)
+        if match.group(1) is None:
+            self._in_string = True
+            # Кусок оборвался на обратной косой черте
+            self._escape = match.end() < len(text)
+            return None
+        self._in_string = False
+        return match.end()
+
+
+async def _iter_json_array_values(chunks: AsyncIterator[bytes], loads=json.loads) -> AsyncIterator[Any]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    scanner = JsonArrayScanner(loads)
+    async for chunk in chunks:
+        for value in scanner.feed(decoder.decode(chunk)):
+            yield value
+    for value in scanner.feed(decoder.decode(b"", final=True), final=True):
+        yield value
+
+
+async def _iter_ndjson_values(chunks: AsyncIterator[bytes], loads=json.loads) -> AsyncIterator[Any]:
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield loads(line)
+    if tail.strip():
+        yield loads(tail)
+
+
+def _validate_items(items: List[Any], response_model, validation: str = "full") -> List[Any]:
+    \"\"\"Валидация пачки элементов одним вызовом, при ошибке - поэлементно с fallback на raw\"\"\"
+    try:
+        return validate_python_data(items, response_model, validation)
+    except Exception:
+        return [_validate_item(item, response_model, validation) for item in items]
+
+
+def _validate_item(item: Any, response_model, validation: str = "full") -> Any:
+    if not isinstance(item, (dict, list)):
+        return item
+    try:
+        if validation != "full":
+            return build_response(item, response_model, validation)
+        return get_type_adapter(response_model).validate_python(item)
+    except Exception:
+        return item
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes], content_type: str, response_model=None, batch_size: Optional[int] = None, loads=json.loads, validation: str = "full") -> AsyncIterator[Any]:
+    \"\"\"
+    Элементы потокового JSON ответа (массив или NDJSON) по мере поступления.
+
+    В памяти находятся только текущий кусок тела и текущая пачка элементов.
+    \"\"\"
+    if is_ndjson_content_type(content_type):
+        values = _iter_ndjson_values(chunks, loads)
+    else:
+        values = _iter_json_array_values(chunks, loads)
+
+    if not batch_size:
+        async for value in values:
+            yield _validate_item(value, response_model, validation) if response_model is not None else value
+        return
+
+    batch = []
+    async for value in values:
+        batch.append(value)
+        if len(batch) >= batch_size:
+            yield _validate_items(batch, response_model, validation) if response_model is not None else batch
+            batch = []
+    if batch:
+        yield _validate_items(batch, response_model, validation) if response_model is not None else batch
+
+
+def merge_cookies_into_headers(headers: Optional[Dict[str, Any]], cookies: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    \"\"\"Добавление cookies в headers как Cookie заголовок\"\"\"
     if cookies:
         cookie_header = "; ".join([f"{name}={value}" for name, value in cookies.items()])
         if headers:
             headers["Cookie"] = cookie_header
         else:
             headers = {"Cookie": cookie_header}
-    
-    # Объединяем form_data с data для multipart запросов
+    return headers
+
+
+def drop_overridden_cookies(cookies: Dict[str, str], cookie_header: Optional[str]) -> Dict[str, str]:
+    \"\"\"Cookies клиента без тех, что заданы Cookie параметрами endpoint'а (cookie_header)\"\"\"
+    if not cookie_header or not cookies:
+        return cookies
+    names = {part.split("=", 1)[0].strip() for part in cookie_header.split(";")}
+    return {name: value for name, value in cookies.items() if name not in names}
+
+
+def merge_form_data(data: Any, form_data: Optional[Dict[str, Any]]) -> Any:
+    \"\"\"Объединение form_data с data для multipart запросов\"\"\"
     if form_data:
         if data:
             # Если есть и body data и form data, объединяем
@@ -804,16 +6208,480 @@ async def handle_request(client, method: str, path: str, locals_dict: dict, resp
                 data = form_data
         else:
             data = form_data
-    
+    return data
+
+
+_BODY_FIELD = 0
+_BODY_WHOLE = 1
+_BODY_ADDITIONAL = 2
+
+
+class RequestPlan:
+    \"\"\"
+    Скомпилированный план запроса для одного endpoint.
+
+    Строится один раз при декорировании: классифицирует аргументы по слотам
+    (path/query/header/cookie/body/file), разрешает param_mapping/field_mapping
+    и компилирует шаблон пути. На каждом вызове остается только пройти по слотам,
+    без inspect.signature и повторного сканирования locals().
+    \"\"\"
+
+    __slots__ = (
+        "method",
+        "path",
+        "signature",
+        "arg_names",
+        "arg_name_set",
+        "defaults",
+        "static_path",
+        "path_segments",
+        "path_slots",
+        "query_slots",
+        "header_slots",
+        "cookie_slots",
+        "body_slots",
+        "file_slots",
+        "body_required",
+        "validation_arg",
+        "endpoint",
+        "route",
+    )
+
+    def __init__(self, func, method: str, path: str, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False, validation_arg='validation'):
+        whole_body_fields = whole_body_fields or []
+        field_mapping = field_mapping or {}
+        param_mapping = param_mapping or {}
+
+        self.method = method
+        self.path = path
+        # "Класс.метод" - ключ endpoint'а для лимитов и метрик клиента
+        self.endpoint = func.__qualname__
+        # "METHOD шаблон пути" - ключ метрик с ограниченным числом значений
+        self.route = f"{method.upper()} {path}"
+        self.signature = inspect.signature(func)
+        self.body_required = body_required
+
+        names = []
+        defaults = {}
+        for name, parameter in self.signature.parameters.items():
+            if name == 'self':
+                continue
+            names.append(name)
+            if parameter.default is not inspect.Parameter.empty:
+                defaults[name] = parameter.default
+        self.arg_names = tuple(names)
+        self.arg_name_set = frozenset(names)
+        self.defaults = defaults
+
+        path_slots = []
+        query_slots = []
+        header_slots = []
+        cookie_slots = []
+        body_slots = []
+        file_slots = []
+
+        for name in names:
+            if '_path' in name:
+                path_slots.append((name, extract_field_name_from_param(name, '_path')))
+            if '_query' in name:
+                field_name = extract_field_name_from_param(name, '_query')
+                if name in param_mapping:
+                    field_name = param_mapping[name]["name"]
+                query_slots.append((name, field_name))
+            if name in param_mapping:
+                param_info = param_mapping[name]
+                if param_info["type"] == "header":
+                    header_slots.append((name, param_info["name"]))
+                elif param_info["type"] == "cookie":
+                    cookie_slots.append((name, param_info["name"]))
+            if '_body' in name:
+                field_name = extract_field_name_from_param(name, '_body')
+                if field_name in whole_body_fields:
+                    body_slots.append((name, _BODY_WHOLE, field_name))
+                elif name.startswith('additional_fields_body'):
+                    body_slots.append((name, _BODY_ADDITIONAL, field_name))
+                else:
+                    body_slots.append((name, _BODY_FIELD, field_mapping.get(field_name, field_name)))
+            if '_file' in name:
+                file_slots.append((name, extract_field_name_from_param(name, '_file')))
+
+        self.path_slots = tuple(path_slots)
+        self.query_slots = tuple(query_slots)
+        self.header_slots = tuple(header_slots)
+        self.cookie_slots = tuple(cookie_slots)
+        self.body_slots = tuple(body_slots)
+        self.file_slots = tuple(file_slots)
+
+        # Аргумент режима модели ответа (validation или переименованный генератором
+        # при совпадении с параметром спецификации), если он не занят header/cookie параметром
+        self.validation_arg = validation_arg if validation_arg in self.arg_name_set and validation_arg not in param_mapping else None
+
+        self._compile_path()
+
+    def _compile_path(self):
+        \"\"\"Компиляция шаблона пути в format-строку с привязкой плейсхолдеров к аргументам\"\"\"
+        placeholders = [
+            (match.start(), match.end(), match.group(0))
+            for match in re.finditer('[{][^}]*[}]', self.path)
+        ]
+        bindings = {}
+
+        # Повторяем порядок подстановки: точное совпадение {field}, иначе первый свободный плейсхолдер
+        for param_name, field_name in self.path_slots:
+            target = '{' + field_name + '}'
+            matched = [
+                index for index, (_, _, text) in enumerate(placeholders)
+                if text == target and index not in bindings
+            ]
+            if not matched:
+                matched = [index for index in range(len(placeholders)) if index not in bindings][:1]
+            for index in matched:
+                bindings[index] = param_name
+
+        segments = []
+        position = 0
+        for index, (start, end, text) in enumerate(placeholders):
+            literal = self.path[position:start]
+            if index in bindings:
+                segments.append((literal, bindings[index], text))
+            else:
+                segments.append((literal + text, None, ''))
+            position = end
+        segments.append((self.path[position:], None, ''))
+
+        self.path_segments = tuple(segments)
+        self.static_path = self.path.rstrip('/') if not bindings else None
+
+    def bind(self, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        \"\"\"Быстрое связывание аргументов вызова с именами параметров\"\"\"
+        values = dict(self.defaults)
+        if args:
+            if len(args) > len(self.arg_names) or any(name in kwargs for name in self.arg_names[:len(args)]):
+                return self._bind_slow(args, kwargs)
+            values.update(zip(self.arg_names, args))
+        if kwargs:
+            if not self.arg_name_set.issuperset(kwargs):
+                return self._bind_slow(args, kwargs)
+            values.update(kwargs)
+        if len(values) != len(self.arg_names):
+            return self._bind_slow(args, kwargs)
+        return values
+
+    def _bind_slow(self, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        # Медленный путь нужен только для корректного TypeError как у обычного вызова
+        bound_args = self.signature.bind(None, *args, **kwargs)
+        bound_args.apply_defaults()
+        values = dict(bound_args.arguments)
+        values.pop('self', None)
+        return values
+
+    def format_path(self, values: Dict[str, Any]) -> str:
+        if self.static_path is not None:
+            return self.static_path
+
+        parts = []
+        for literal, param_name, placeholder in self.path_segments:
+            parts.append(literal)
+            if param_name is not None:
+                parts.append(format_path_value(values[param_name], placeholder))
+        return ''.join(parts).rstrip('/')
+
+    def build_params(self, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        params = {}
+        for param_name, field_name in self.query_slots:
+            value = values[param_name]
+            if value is not constants.NOTSET:
+                params[field_name] = serialize_query_value(value)
+        return params if params else None
+
+    def build_headers(self, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        headers = {}
+        for param_name, header_name in self.header_slots:
+            value = values[param_name]
+            if value is not constants.NOTSET:
+                headers[header_name] = str(value)
+
+        cookies = {}
+        for param_name, cookie_name in self.cookie_slots:
+            value = values[param_name]
+            if value is not constants.NOTSET:
+                cookies[cookie_name] = str(value)
+
+        return merge_cookies_into_headers(headers if headers else None, cookies)
+
+    def build_body(self, values: Dict[str, Any]) -> Any:
+        other_body_fields = {}
+        additional_fields = {}
+
+        for param_name, kind, field_name in self.body_slots:
+            value = values[param_name]
+            if value is constants.NOTSET:
+                continue
+            if kind == _BODY_WHOLE:
+                # Явный None - тело JSON null, а не отсутствие тела
+                return constants.JSON_NULL if value is None else serialize_value(value)
+            elif kind == _BODY_ADDITIONAL:
+                if isinstance(value, dict):
+                    additional_fields.update(serialize_value(value))
+            else:
+                other_body_fields[field_name] = serialize_value(value)
+
+        if len(other_body_fields) == 1 and not additional_fields:
+            single_field_name, single_field_value = next(iter(other_body_fields.items()))
+            if (single_field_name == 'request_body' or
+                (single_field_name in ['new_data'] and not isinstance(single_field_value, dict))):
+                return single_field_value
+
+        body_data = other_body_fields
+        body_data.update(additional_fields)
+
+        if not body_data and self.body_required:
+            return {}
+
+        return body_data if body_data else None
+
+    def build_files(self, values: Dict[str, Any]) -> tuple:
+        \"\"\"Возвращает (files, form_data) для multipart запросов\"\"\"
+        files = {}
+        form_data = {}
+        for param_name, field_name in self.file_slots:
+            value = values[param_name]
+            if value is constants.NOTSET:
+                continue
+            if is_file_value(value):
+                files[field_name] = value
+            else:
+                form_data[field_name] = serialize_value(value)
+        return files if files else None, form_data if form_data else None
+
+
+async def execute_plan(client, plan: RequestPlan, values: Dict[str, Any], response_model=None, response_models=None, discriminator=None, discriminator_mapping=None, discriminator_fields=None) -> Any:
+    \"\"\"Выполнение запроса по скомпилированному плану\"\"\"
+    data = plan.build_body(values) if plan.body_slots or plan.body_required else None
+    files = None
+    if plan.file_slots:
+        files, form_data = plan.build_files(values)
+        data = merge_form_data(data, form_data)
+
+    return await execute_request(
+        client,
+        plan.method,
+        plan.format_path(values),
+        params=plan.build_params(values) if plan.query_slots else None,
+        data=data,
+        files=files,
+        headers=plan.build_headers(values) if plan.header_slots or plan.cookie_slots else None,
+        response_model=response_model,
+        response_models=response_models,
+        discriminator=discriminator,
+        discriminator_mapping=discriminator_mapping,
+        discriminator_fields=discriminator_fields,
+        validation=values.get(plan.validation_arg) if plan.validation_arg else None,
+        endpoint=plan.endpoint,
+        route=plan.route,
+    )
+
+
+def stream_plan(client, plan: RequestPlan, values: Dict[str, Any], response_model=None):
+    \"\"\"Потоковый запрос по скомпилированному плану (async context manager)\"\"\"
+    data = plan.build_body(values) if plan.body_slots or plan.body_required else None
+    files = None
+    if plan.file_slots:
+        files, form_data = plan.build_files(values)
+        data = merge_form_data(data, form_data)
+
+    return stream_request(
+        client,
+        plan.method,
+        plan.format_path(values),
+        params=plan.build_params(values) if plan.query_slots else None,
+        data=data,
+        files=files,
+        headers=plan.build_headers(values) if plan.header_slots or plan.cookie_slots else None,
+        response_model=response_model,
+        validation=values.get(plan.validation_arg) if plan.validation_arg else None,
+        endpoint=plan.endpoint,
+    )
+
+
+def stream_request(client, method: str, path: str, params=None, data=None, files=None, headers=None, response_model=None, response_models=None, discriminator=None, discriminator_mapping=None, discriminator_fields=None, validation=None, endpoint=None):
+    \"\"\"
+    Потоковый запрос без буферизации тела.
+
+    async with client.files.download_file_stream(...) as stream:
+        await stream.save("export.zip")
+
+    async with client.items.list_items_stream(...) as stream:
+        async for item in stream.iter_items():
+            ...
+    \"\"\"
+    if response_models is not None:
+        response_model = get_union_type(response_models, discriminator, discriminator_mapping, discriminator_fields)
+
+    return client._stream_request(
+        method=method,
+        path=path,
+        params=params,
+        data=data,
+        files=files,
+        headers=headers,
+        response_model=response_model,
+        validation=check_validation_mode(validation) if validation else None,
+        endpoint=endpoint,
+    )
+
+
+async def handle_request(client, method: str, path: str, locals_dict: dict, response_model=None, response_models=None, whole_body_fields=None, field_mapping=None, param_mapping=None, body_required=False, discriminator=None, discriminator_mapping=None, discriminator_fields=None) -> Any:
+    \"\"\"Обработка HTTP запроса с автоматической подготовкой параметров и парсингом response модели\"\"\"
+    params = prepare_params(locals_dict, param_mapping)
+    data = prepare_body_data(locals_dict, whole_body_fields, field_mapping, body_required)
+    files = prepare_files(locals_dict)
+    form_data = prepare_form_data(locals_dict)
+    headers = prepare_headers(locals_dict, param_mapping)
+    cookies = prepare_cookies(locals_dict, param_mapping)
+
+    headers = merge_cookies_into_headers(headers, cookies)
+    data = merge_form_data(data, form_data)
+
+    return await execute_request(
+        client,
+        method,
+        path,
+        params=params,
+        data=data,
+        files=files,
+        headers=headers,
+        response_model=response_model,
+        response_models=response_models,
+        discriminator=discriminator,
+        discriminator_mapping=discriminator_mapping,
+        discriminator_fields=discriminator_fields,
+    )
+
+
+async def execute_request(client, method: str, path: str, params=None, data=None, files=None, headers=None, response_model=None, response_models=None, discriminator=None, discriminator_mapping=None, discriminator_fields=None, validation=None, endpoint=None, route=None) -> Any:
+    \"\"\"
+    Отправка подготовленного запроса и парсинг response модели.
+
+    validation - режим построения модели на этот вызов (full / construct / lazy),
+    по умолчанию берется из настроек клиента. endpoint - ключ "Класс.метод",
+    route - ключ метрик "METHOD шаблон пути".
+    \"\"\"
+    tracing = client._tracing
+    if tracing is None:
+        return await _execute_request(client, method, path, params, data, files, headers, response_model, response_models, discriminator, discriminator_mapping, discriminator_fields, validation, endpoint, route)
+    # Span на весь вызов: попытки, паузы между ними и разбор ответа
+    with tracing.span(endpoint or metrics_key(method, path, route), method, route):
+        return await _execute_request(client, method, path, params, data, files, headers, response_model, response_models, discriminator, discriminator_mapping, discriminator_fields, validation, endpoint, route)
+
+
+async def _execute_request(client, method: str, path: str, params, data, files, headers, response_model, response_models, discriminator, discriminator_mapping, discriminator_fields, validation, endpoint, route) -> Any:
+    validation = check_validation_mode(validation) if validation else client._validation
+    if response_models is not None:
+        # Union ответа валидируется одним TypeAdapter вместо перебора моделей
+        response_model = get_union_type(response_models, discriminator, discriminator_mapping, discriminator_fields)
+
+    single_flight = client._single_flight
+    response_cache = client._response_cache
+    if single_flight is None and response_cache is None:
+        return await _send_and_parse(client, method, path, params, data, files, headers, response_model, validation, endpoint, route)
+
+    url = f"{client._api_url}{path}"
+    if response_cache is not None and not response_cache.accepts(method):
+        # Изменяющий запрос делает сохраненные ответы этого URL неактуальными
+        await response_cache.invalidate_url(url)
+    if data is not None or files:
+        return await _send_and_parse(client, method, path, params, data, files, headers, response_model, validation, endpoint, route)
+
+    coalesce = single_flight.do if single_flight is not None and single_flight.accepts(method) else None
+    cached = response_cache is not None and response_cache.accepts(method)
+    if coalesce is None and not cached:
+        return await _send_and_parse(client, method, path, params, data, files, headers, response_model, validation, endpoint, route)
+
+    key = request_key(
+        method,
+        url,
+        params,
+        client._request_headers(headers),
+        client._request_cookies(),
+        response_model,
+        validation,
+    )
+    if not cached:
+        # Одинаковые конкурентные запросы получают результат одного HTTP вызова
+        return await coalesce(
+            key,
+            lambda: _send_and_parse(client, method, path, params, data, files, headers, response_model, validation, endpoint, route),
+        )
+
+    async def send(conditional_headers: Dict[str, str]):
+        response = await client._send_request(
+            method=method,
+            path=path,
+            params=params,
+            headers={**(headers or {}), **conditional_headers} if conditional_headers else headers,
+            endpoint=endpoint,
+            route=route,
+        )
+        if response.status_code == 304:
+            # Ответ 304 не разбирается - фазы запроса отдаются без decode
+            _emit_timing(client, response)
+        return response
+
+    return await response_cache.fetch(
+        key,
+        url,
+        endpoint,
+        send,
+        lambda response: _parse_measured(client, response, response_model, validation, method, path, route),
+        coalesce,
+    )
+
+
+async def _send_and_parse(client, method: str, path: str, params, data, files, headers, response_model, validation: str, endpoint, route=None) -> Any:
     response = await client._send_request(
         method=method,
         path=path,
         params=params,
         data=data,
         files=files,
-        headers=headers
+        headers=headers,
+        endpoint=endpoint,
+        route=route,
     )
-    
+    return await _parse_measured(client, response, response_model, validation, method, path, route)
+
+
+async def _parse_measured(client, response, response_model, validation: str, method: str, path: str, route) -> Any:
+    \"\"\"Разбор ответа с учетом времени в метриках и трассировке фаз клиента (если включены)\"\"\"
+    metrics = client._metrics
+    timing = getattr(response, "timing", None)
+    if metrics is None and timing is None:
+        return await _parse_response(client, response, response_model, validation)
+    started = time.perf_counter()
+    try:
+        return await _parse_response(client, response, response_model, validation)
+    finally:
+        elapsed = time.perf_counter() - started
+        if metrics is not None:
+            metrics.endpoint(metrics_key(method, path, route)).observe_decode(elapsed)
+        if timing is not None:
+            timing.decode = elapsed
+            _emit_timing(client, response)
+
+
+def _emit_timing(client, response) -> None:
+    \"\"\"Итоговая попытка вызова в sink TimingTracer (один раз на ответ)\"\"\"
+    timing = getattr(response, "timing", None)
+    tracer = client._timing_tracer
+    if timing is not None:
+        response.timing = None
+        if tracer is not None:
+            tracer.emit(timing)
+
+
+async def _parse_response(client, response, response_model, validation: str) -> Any:
+    \"\"\"Разбор ответа по content-type и построение модели\"\"\"
     if not hasattr(response, 'status_code'):
         return response
     
@@ -822,7 +6690,13 @@ async def handle_request(client, method: str, path: str, locals_dict: dict, resp
     
     try:
         if 'application/json' in content_type:
-            response_data = await response.json()
+            raw = await response.read()
+            if response_model is not None and validation == "full":
+                # Быстрый путь: bytes -> модель одним вызовом без промежуточных dict
+                return validate_json_bytes(raw, response_model, client._json_codec.loads)
+            response_data = client._json_codec.loads(raw)
+        elif is_ndjson_content_type(content_type):
+            response_data = parse_ndjson(await response.read(), client._json_codec.loads)
         elif content_type.startswith('text/'):
             response_data = await response.text()
         elif 'application/xml' in content_type or 'text/xml' in content_type:
@@ -843,29 +6717,10 @@ async def handle_request(client, method: str, path: str, locals_dict: dict, resp
         # Если все способы не сработали, возвращаем сырой response
         return response
     
-    # Если указан список моделей (Union типы), пытаемся парсить каждую по очереди
-    if response_models is not None and isinstance(response_data, (dict, list)):
-        for model in response_models:
-            try:
-                if isinstance(response_data, list):
-                    return [model(**item) for item in response_data]
-                else:
-                    return model(**response_data)
-            except Exception:
-                # Пробуем следующую модель
-                continue
-        # Если ни одна модель не подошла, возвращаем raw data
-        pass
-    
-    # Если указана одна модель для парсинга, пытаемся парсить (только для JSON)
-    elif response_model is not None and isinstance(response_data, (dict, list)):
+    # Если указана модель (или Union моделей) для парсинга, пытаемся парсить (только для JSON)
+    if response_model is not None and isinstance(response_data, (dict, list)):
         try:
-            # Если response_data - это список, создаем список моделей
-            if isinstance(response_data, list):
-                return [response_model(**item) for item in response_data]
-            # Иначе создаем одну модель
-            else:
-                return response_model(**response_data)
+            return validate_python_data(response_data, response_model, validation)
         except Exception:
             # Если парсинг не удался, возвращаем raw data
             pass
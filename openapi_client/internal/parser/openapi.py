@@ -13,15 +13,24 @@ class OpenApiParser:
         source_url: str = None,
         original_spec: Dict[str, Any] = None,
         package_name: str = None,
+        codegen_mode: str = "decorator",
+        sync: bool = False,
     ):
         self.openapi_dict = openapi_dict
         self.source_url = source_url
         self.original_spec = original_spec
         self.package_name = package_name
+        self.codegen_mode = codegen_mode
+        self.sync = sync
 
     def parse(self) -> Project:
         """Парсинг OpenAPI в Project структуру"""
         generator = ClientGenerator(
-            self.openapi_dict, self.source_url, self.original_spec, self.package_name
+            self.openapi_dict,
+            self.source_url,
+            self.original_spec,
+            self.package_name,
+            codegen_mode=self.codegen_mode,
+            sync=self.sync,
         )
         return generator.generate()
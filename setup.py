@@ -2,7 +2,7 @@ from setuptools import find_packages, setup
 
 setup(
     name="openapi_client",
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks", "benchmarks.*"]),
     version="0.2.0",
     description="Продвинутый генератор Python-клиентов из OpenAPI спецификаций",
     author="lite",
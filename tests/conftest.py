@@ -0,0 +1,268 @@
+"""
+Общие фикстуры: клиент, сгенерированный из небольшой спецификации в обоих
+режимах генерации, и сервер-заглушка на HandlerTransport
+"""
+
+import importlib
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jsonref
+import pytest
+
+from openapi_client.generator import ApiClientGenerator
+
+API_URL = "http://api.test"
+
+CODEGEN_MODES = ("decorator", "inline")
+
+
+def _item_schema_ref() -> Dict[str, Any]:
+    return {"$ref": "#/components/schemas/Item"}
+
+
+def _json_response(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"200": {"content": {"application/json": {"schema": schema}}}}
+
+
+SPEC: Dict[str, Any] = {
+    "openapi": "3.1.0",
+    "info": {"title": "Tests", "version": "1.0.0"},
+    "paths": {
+        "/items": {
+            "get": {
+                "tags": ["items"],
+                "summary": "List items",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer", "default": 10}},
+                    {"name": "offset", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "X-Tenant", "in": "header", "schema": {"type": "string"}},
+                    {"name": "session", "in": "cookie", "schema": {"type": "string"}},
+                ],
+                "responses": _json_response({"type": "array", "items": _item_schema_ref()}),
+            },
+            "post": {
+                "tags": ["items"],
+                "summary": "Create item",
+                "requestBody": {
+                    "required": True,
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ItemCreate"}}},
+                },
+                "responses": _json_response(_item_schema_ref()),
+            },
+        },
+        "/items/{item_id}": {
+            "get": {
+                "tags": ["items"],
+                "summary": "Get item",
+                "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                "responses": _json_response(_item_schema_ref()),
+            },
+            "patch": {
+                "tags": ["items"],
+                "summary": "Update item",
+                "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {"name": {"type": "string"}, "price-value": {"type": "number"}},
+                            }
+                        }
+                    }
+                },
+                "responses": _json_response(_item_schema_ref()),
+            },
+        },
+        "/pages": {
+            "get": {
+                "tags": ["catalog"],
+                "summary": "List pages",
+                "parameters": [
+                    {"name": "page", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "per_page", "in": "query", "schema": {"type": "integer"}},
+                ],
+                "responses": _json_response({"type": "array", "items": _item_schema_ref()}),
+            }
+        },
+        "/feed": {
+            "get": {
+                "tags": ["catalog"],
+                "summary": "Feed",
+                "parameters": [
+                    {"name": "cursor", "in": "query", "schema": {"type": "string"}},
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                ],
+                "responses": _json_response({"$ref": "#/components/schemas/FeedPage"}),
+            }
+        },
+        "/search": {
+            "get": {
+                "tags": ["catalog"],
+                "summary": "Search",
+                "x-pagination": {"style": "offset", "offset": "from", "limit": "size", "total": "total"},
+                "parameters": [
+                    {"name": "from", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "size", "in": "query", "schema": {"type": "integer"}},
+                ],
+                "responses": _json_response({"$ref": "#/components/schemas/SearchResult"}),
+            }
+        },
+        "/files": {
+            "post": {
+                "tags": ["files"],
+                "summary": "Upload file",
+                "requestBody": {
+                    "content": {
+                        "multipart/form-data": {
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "file": {"type": "string", "format": "binary"},
+                                    "note": {"type": "string"},
+                                },
+                            }
+                        }
+                    }
+                },
+                "responses": _json_response({"$ref": "#/components/schemas/UploadResult"}),
+            }
+        },
+    },
+    "components": {
+        "schemas": {
+            "Item": {
+                "type": "object",
+                "title": "Item",
+                "required": ["id", "name"],
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name": {"type": "string"},
+                    "price": {"type": "number"},
+                },
+            },
+            "ItemCreate": {
+                "type": "object",
+                "title": "ItemCreate",
+                "required": ["name"],
+                "properties": {"name": {"type": "string"}, "price": {"type": "number"}},
+            },
+            "FeedPage": {
+                "type": "object",
+                "title": "FeedPage",
+                "properties": {
+                    "data": {"type": "array", "items": _item_schema_ref()},
+                    "next_cursor": {"type": "string"},
+                },
+            },
+            "SearchResult": {
+                "type": "object",
+                "title": "SearchResult",
+                "properties": {
+                    "results": {"type": "array", "items": _item_schema_ref()},
+                    "total": {"type": "integer"},
+                },
+            },
+            "UploadResult": {
+                "type": "object",
+                "title": "UploadResult",
+                "properties": {"size": {"type": "integer"}, "filename": {"type": "string"}},
+            },
+        }
+    },
+}
+
+
+def generate_package(spec: Dict[str, Any], target_dir: str, package_name: str, **generator_kwargs):
+    """Генерация клиента в target_dir/package_name и импорт пакета"""
+    resolved_spec = dict(jsonref.loads(json.dumps(spec)))
+    project = ApiClientGenerator(
+        resolved_spec, original_spec=spec, package_name=package_name, **generator_kwargs
+    ).generate()
+
+    package_dir = os.path.join(target_dir, package_name)
+    for code_file in project.files:
+        path = os.path.join(package_dir, code_file.file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(str(code_file))
+
+    if target_dir not in sys.path:
+        sys.path.insert(0, target_dir)
+    return importlib.import_module(package_name)
+
+
+@pytest.fixture(scope="session")
+def packages(tmp_path_factory) -> Dict[str, Any]:
+    """Пакеты клиента по режиму генерации"""
+    target_dir = str(tmp_path_factory.mktemp("generated"))
+    return {
+        mode: generate_package(SPEC, target_dir, f"tests_{mode}_client", codegen_mode=mode)
+        for mode in CODEGEN_MODES
+    }
+
+
+class FakeServer:
+    """
+    Сервер-заглушка: обработчики по (METHOD, путь) и журнал запросов.
+
+    Обработчик получает TransportRequest и возвращает то же, что handler
+    HandlerTransport: JSON данные, (status, headers, body) или BufferedResponse.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Callable[[Any], Any]] = {}
+        self.requests: List[Any] = []
+
+    def route(self, method: str, path: str):
+        def register(handler):
+            self.routes[(method.upper(), path)] = handler
+            return handler
+        return register
+
+    def __call__(self, request) -> Any:
+        self.requests.append(request)
+        path = request.url[len(API_URL):] or "/"
+        handler = self.routes.get((request.method, path))
+        if handler is None:
+            return 404, {"content-type": "application/json"}, b'{"detail": "Not Found"}'
+        return handler(request)
+
+    def query(self, index: int = -1) -> Dict[str, Any]:
+        return dict(self.requests[index].params or {})
+
+
+def reset_client(client, server: Optional[FakeServer] = None):
+    """Клиент-синглтон без настроек предыдущего теста"""
+    transport = importlib.import_module(f"{type(client).__module__.rsplit('.', 1)[0]}.transport")
+    retry = importlib.import_module(f"{type(client).__module__.rsplit('.', 1)[0]}.retry")
+    client.headers = None
+    client.cookies = None
+    client.set_circuit_breaker(None)
+    client.set_single_flight(None)
+    client.set_response_cache(None)
+    client.set_rate_limiter(None)
+    client.set_metrics(None)
+    client.set_transport(transport.HandlerTransport(server) if server is not None else None)
+    client.initialize(API_URL, retry_policy=retry.RetryPolicy(max_attempts=1))
+    return client
+
+
+@pytest.fixture(params=CODEGEN_MODES)
+def package(request, packages):
+    return packages[request.param]
+
+
+@pytest.fixture
+def server() -> FakeServer:
+    return FakeServer()
+
+
+@pytest.fixture
+def client(package, server):
+    client = reset_client(package.ApiClient(), server)
+    yield client
+    reset_client(client)
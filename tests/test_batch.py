@@ -0,0 +1,133 @@
+"""
+Пакетные вызовы .map(): порядок результатов, ограничение параллельности
+и backpressure при медленном потребителе
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def batch(package):
+    return importlib.import_module(f"{package.__name__}.batch")
+
+
+class _Calls:
+    """Вызываемая функция пакета: задержка по значению, счетчик параллельных вызовов"""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.started = []
+
+    async def __call__(self, value, delay=0.0):
+        self.started.append(value)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(delay)
+            if value < 0:
+                raise ValueError(value)
+            return value
+        finally:
+            self.running -= 1
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+async def test_ordered_results_follow_input(batch):
+    calls = _Calls()
+    items = [(index, 0.001 * (10 - index)) for index in range(10)]
+
+    results = await batch.BatchMap(calls, items, concurrency=4).collect()
+
+    assert results == list(range(10))
+    assert calls.max_running == 4
+
+
+async def test_unordered_results_by_completion(batch):
+    calls = _Calls()
+    items = [{"value": 0, "delay": 0.03}, {"value": 1, "delay": 0.0}, {"value": 2, "delay": 0.01}]
+
+    pairs = [pair async for pair in batch.BatchMap(calls, items, concurrency=3, ordered=False).indexed()]
+
+    assert pairs == [(1, 1), (2, 2), (0, 0)]
+
+
+async def test_input_read_lazily(batch):
+    calls = _Calls()
+    read = []
+
+    def source():
+        for index in range(100):
+            read.append(index)
+            yield index
+
+    async with batch.BatchMap(calls, source(), concurrency=3) as results:
+        assert await results.__anext__() == 0
+        await _settle()
+
+    # Прочитано не больше окна плюс отданный результат
+    assert len(read) <= 1 + 2 * 3
+
+
+@pytest.mark.parametrize("window", [None, 2, 5])
+async def test_slow_consumer_stops_new_calls(batch, window):
+    calls = _Calls()
+    results = batch.BatchMap(calls, range(100), concurrency=2, window=window)
+
+    consumed = []
+    for _ in range(3):
+        consumed.append(await results.__anext__())
+        # Потребитель занят: завершенные вызовы не освобождают окно
+        await asyncio.sleep(0.01)
+
+    assert consumed == [0, 1, 2]
+    assert len(calls.started) <= len(consumed) + results.window
+    assert results.window == (window or 4)
+    await results.aclose()
+
+
+async def test_window_must_cover_concurrency(batch):
+    with pytest.raises(ValueError):
+        batch.BatchMap(_Calls(), range(3), concurrency=4, window=3)
+
+
+async def test_error_cancels_running_calls(batch):
+    calls = _Calls()
+    items = [(-1, 0.0)] + [(index, 1.0) for index in range(1, 4)]
+    results = batch.BatchMap(calls, items, concurrency=4)
+
+    with pytest.raises(ValueError):
+        await results.collect()
+
+    assert calls.running == 0
+    assert results.stats.in_flight == 0
+
+
+async def test_return_exceptions(batch):
+    results = await batch.BatchMap(_Calls(), [1, -2, 3], concurrency=2, return_exceptions=True).collect()
+
+    assert results[0] == 1 and isinstance(results[1], ValueError) and results[2] == 3
+
+
+async def test_endpoint_map(client, server):
+    server.route("GET", "/items/1")(lambda request: {"id": 1, "name": "a"})
+    server.route("GET", "/items/2")(lambda request: {"id": 2, "name": "b"})
+    progress = []
+
+    async with client.items.get_item.map(
+        [{"item_id_path": 2}, (1,)], concurrency=2, on_progress=lambda stats: progress.append(stats.completed)
+    ) as results:
+        items = [item async for item in results]
+
+    assert [item.id for item in items] == [2, 1]
+    assert progress == [1, 2]
+    assert results.stats.snapshot()["completed"] == 2
@@ -0,0 +1,121 @@
+"""
+Кеш GET ответов: свежие попадания, условные запросы и 304
+"""
+
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+def _item_handler(headers, status=200):
+    def handler(request):
+        return status, {"content-type": "application/json", **headers}, b'{"id": 1, "name": "cached"}'
+
+    return handler
+
+
+async def test_fresh_hit_skips_request(package, client, server):
+    cache = package.cache.ResponseCache()
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(_item_handler({"Cache-Control": "max-age=60"}))
+
+    first = await client.items.get_item(item_id_path=1)
+    second = await client.items.get_item(item_id_path=1)
+
+    assert first.name == second.name == "cached"
+    assert len(server.requests) == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+
+async def test_stale_entry_revalidated_with_etag(package, client, server):
+    cache = package.cache.ResponseCache()
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(_item_handler({"ETag": '"v1"', "Cache-Control": "no-cache"}))
+
+    first = await client.items.get_item(item_id_path=1)
+
+    def not_modified(request):
+        assert request.headers["If-None-Match"] == '"v1"'
+        return 304, {"ETag": '"v1"'}, b""
+
+    server.route("GET", "/items/1")(not_modified)
+    second = await client.items.get_item(item_id_path=1)
+
+    assert second.name == first.name == "cached"
+    assert len(server.requests) == 2
+    assert cache.revalidated == 1
+
+
+async def test_changed_resource_replaces_entry(package, client, server):
+    cache = package.cache.ResponseCache()
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(_item_handler({"ETag": '"v1"', "Cache-Control": "no-cache"}))
+    await client.items.get_item(item_id_path=1)
+
+    server.route("GET", "/items/1")(
+        lambda request: (200, {"ETag": '"v2"', "content-type": "application/json"}, b'{"id": 1, "name": "new"}')
+    )
+    item = await client.items.get_item(item_id_path=1)
+
+    assert item.name == "new"
+    assert cache.revalidated == 0
+
+
+async def test_unsafe_method_invalidates_url(package, client, server):
+    cache = package.cache.ResponseCache()
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(_item_handler({"Cache-Control": "max-age=60"}))
+    server.route("PATCH", "/items/1")(lambda request: {"id": 1, "name": "patched"})
+
+    await client.items.get_item(item_id_path=1)
+    await client.items.update_item(item_id_path=1, name_body="patched")
+    await client.items.get_item(item_id_path=1)
+
+    assert [request.method for request in server.requests] == ["GET", "PATCH", "GET"]
+
+
+@pytest.mark.parametrize("cache_control", ["max-age=60", "no-cache"])
+async def test_callers_get_independent_copies(package, client, server, cache_control):
+    client.set_response_cache(package.cache.ResponseCache())
+    server.route("GET", "/items/1")(_item_handler({"ETag": '"v1"', "Cache-Control": cache_control}))
+
+    first = await client.items.get_item(item_id_path=1)
+    first.name = "changed"
+    server.route("GET", "/items/1")(lambda request: (304, {"ETag": '"v1"'}, b""))
+    second = await client.items.get_item(item_id_path=1)
+    second.name = "changed again"
+    third = await client.items.get_item(item_id_path=1)
+
+    # Попадание и 304 отдают копию: изменения вызывающих не видны в кеше
+    assert third.name == "cached" and third is not second
+
+
+async def test_shared_values_without_copy(package, client, server):
+    client.set_response_cache(package.cache.ResponseCache(copy_values=False))
+    server.route("GET", "/items/1")(_item_handler({"Cache-Control": "max-age=60"}))
+
+    first = await client.items.get_item(item_id_path=1)
+    second = await client.items.get_item(item_id_path=1)
+
+    assert first is second
+
+
+async def test_coalesced_callers_get_independent_copies(package, client, server):
+    client.set_response_cache(package.cache.ResponseCache())
+    client.set_single_flight(True)
+
+    async def slow_item(request):
+        await asyncio.sleep(0.01)
+        return 200, {"content-type": "application/json", "Cache-Control": "max-age=60"}, b'{"id": 1, "name": "cached"}'
+
+    server.route("GET", "/items/1")(slow_item)
+
+    items = await asyncio.gather(*(client.items.get_item(item_id_path=1) for _ in range(3)))
+    items[0].name = "changed"
+
+    # Один запрос на всех, но у каждого ожидающего своя модель
+    assert len(server.requests) == 1
+    assert [item.name for item in items[1:]] == ["cached", "cached"]
+    assert len({id(item) for item in items}) == 3
@@ -0,0 +1,151 @@
+"""
+Circuit breaker: closed -> open -> half_open -> closed / open по ответам сервера
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from conftest import API_URL
+
+pytestmark = pytest.mark.asyncio
+
+ITEM = {"id": 1, "name": "a"}
+UNAVAILABLE = (503, {"content-type": "application/json"}, b'{"detail": "busy"}')
+
+
+@pytest.fixture
+def breaker_module(package):
+    return importlib.import_module(f"{package.__name__}.circuit_breaker")
+
+
+@pytest.fixture
+def common(package):
+    return importlib.import_module(f"{package.__name__}.common")
+
+
+@pytest.fixture
+def changes():
+    """Смены состояния цепей: (ключ, старое, новое)"""
+    return []
+
+
+@pytest.fixture
+def install_breaker(breaker_module, client, changes):
+    def install(**kwargs):
+        breaker = breaker_module.CircuitBreaker(**{"failure_rate": 0.5, "min_calls": 2, "open_timeout": 0.05, **kwargs})
+        breaker.add_listener(lambda key, previous, state: changes.append((key, previous, state)))
+        client.set_circuit_breaker(breaker)
+        return breaker
+
+    return install
+
+
+async def test_failures_open_circuit(client, server, common, install_breaker, changes):
+    breaker = install_breaker()
+    server.route("GET", "/items/1")(lambda request: UNAVAILABLE)
+
+    await client.items.get_item(item_id_path=1)
+    assert breaker.state(API_URL) == "closed"
+    await client.items.get_item(item_id_path=1)
+    assert breaker.state(API_URL) == "open"
+
+    with pytest.raises(common.CircuitOpenError) as raised:
+        await client.items.get_item(item_id_path=1)
+
+    # Открытая цепь отклоняет запрос без обращения к серверу
+    assert len(server.requests) == 2
+    assert raised.value.key == API_URL and 0 < raised.value.retry_in <= 0.05
+    assert changes == [(API_URL, "closed", "open")]
+
+
+async def test_successful_probe_closes_circuit(client, server, install_breaker, changes):
+    breaker = install_breaker()
+    responses = [UNAVAILABLE, UNAVAILABLE]
+    server.route("GET", "/items/1")(lambda request: responses.pop(0) if responses else ITEM)
+    for _ in range(2):
+        await client.items.get_item(item_id_path=1)
+
+    await asyncio.sleep(0.06)
+    item = await client.items.get_item(item_id_path=1)
+
+    assert item.id == 1 and breaker.state(API_URL) == "closed"
+    assert [state for _, _, state in changes] == ["open", "half_open", "closed"]
+    assert breaker.snapshot()[API_URL]["calls"] == 0
+
+
+async def test_failed_probe_reopens_circuit(client, server, common, install_breaker, changes):
+    breaker = install_breaker()
+    server.route("GET", "/items/1")(lambda request: UNAVAILABLE)
+    for _ in range(2):
+        await client.items.get_item(item_id_path=1)
+
+    await asyncio.sleep(0.06)
+    await client.items.get_item(item_id_path=1)
+
+    assert breaker.state(API_URL) == "open"
+    assert [state for _, _, state in changes] == ["open", "half_open", "open"]
+    with pytest.raises(common.CircuitOpenError):
+        await client.items.get_item(item_id_path=1)
+    assert len(server.requests) == 3
+
+
+async def test_half_open_limits_probes(client, server, common, install_breaker):
+    install_breaker()
+    release = asyncio.Event()
+    responses = [UNAVAILABLE, UNAVAILABLE]
+
+    async def handler(request):
+        if responses:
+            return responses.pop(0)
+        await release.wait()
+        return ITEM
+
+    server.route("GET", "/items/1")(handler)
+    for _ in range(2):
+        await client.items.get_item(item_id_path=1)
+    await asyncio.sleep(0.06)
+
+    probe = asyncio.ensure_future(client.items.get_item(item_id_path=1))
+    await asyncio.sleep(0)
+    # Пока идет единственная проба, остальные запросы отклоняются
+    with pytest.raises(common.CircuitOpenError):
+        await client.items.get_item(item_id_path=1)
+    release.set()
+
+    assert (await probe).id == 1
+    assert (await client.items.get_item(item_id_path=1)).id == 1
+
+
+async def test_per_endpoint_circuit(client, server, common, install_breaker):
+    breaker = install_breaker(failure_rate=0.6, per_endpoint=True)
+    server.route("GET", "/items")(lambda request: [])
+    server.route("GET", "/items/1")(lambda request: UNAVAILABLE)
+
+    for _ in range(2):
+        await client.items.list_items()
+    for _ in range(2):
+        await client.items.get_item(item_id_path=1)
+
+    assert breaker.state(API_URL, "Items.get_item") == "open"
+    assert breaker.state(API_URL) == "closed"
+    with pytest.raises(common.CircuitOpenError) as raised:
+        await client.items.get_item(item_id_path=1)
+    assert raised.value.key == f"{API_URL} Items.get_item"
+    assert await client.items.list_items() == []
+
+
+async def test_slow_calls_open_circuit(client, server, install_breaker):
+    breaker = install_breaker(slow_call_duration=0.01)
+
+    async def slow(request):
+        await asyncio.sleep(0.02)
+        return ITEM
+
+    server.route("GET", "/items/1")(slow)
+    for _ in range(2):
+        await client.items.get_item(item_id_path=1)
+
+    assert breaker.state(API_URL) == "open"
+    assert breaker.snapshot()[API_URL]["slow_calls"] == 2
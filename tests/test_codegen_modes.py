@@ -0,0 +1,61 @@
+"""
+Режимы генерации decorator и inline отправляют одинаковые запросы и
+одинаково разбирают ответы
+"""
+
+import pytest
+
+from conftest import API_URL, FakeServer, reset_client
+
+pytestmark = pytest.mark.asyncio
+
+CALLS = [
+    ("items", "list_items", {}),
+    ("items", "list_items", {"limit_query": 3, "offset_query": 2, "X_Tenant": "t1", "session": "s1"}),
+    ("items", "list_items", {"limit_query": None}),
+    ("items", "create_item", {"name_body": "n", "price_body": 2.5}),
+    ("items", "get_item", {"item_id_path": 7}),
+    ("items", "get_item", {"item_id_path": "a/b c"}),
+    ("items", "get_item", {"item_id_path": None}),
+    ("items", "get_item", {"item_id_path": ""}),
+    ("items", "get_item", {"item_id_path": "x/"}),
+    ("items", "update_item", {"item_id_path": 3, "name_body": "z", "price_value_body": 1.0}),
+    ("items", "update_item", {"item_id_path": 3}),
+    ("catalog", "search", {"from_field_query": 5, "size_query": 2}),
+]
+
+
+def _echo(request):
+    return {"id": 1, "name": request.method}
+
+
+async def _record(package, zone, method, kwargs):
+    server = FakeServer()
+    client = reset_client(package.ApiClient(), server)
+    server.route("GET", "/items")(lambda request: [{"id": 1, "name": "x"}])
+    server.route("POST", "/items")(_echo)
+    try:
+        result = await getattr(getattr(client, zone), method)(**kwargs)
+    finally:
+        reset_client(client)
+    request = server.requests[-1]
+    return (
+        (request.method, request.url, request.params, request.headers, request.content),
+        result,
+    )
+
+
+@pytest.mark.parametrize("zone, method, kwargs", CALLS)
+async def test_modes_send_same_request(packages, zone, method, kwargs):
+    decorator_request, decorator_result = await _record(packages["decorator"], zone, method, kwargs)
+    inline_request, inline_result = await _record(packages["inline"], zone, method, kwargs)
+
+    assert decorator_request == inline_request
+    assert type(decorator_result).__name__ == type(inline_result).__name__
+    assert repr(decorator_result) == repr(inline_result)
+
+
+async def test_unset_path_param_keeps_placeholder(client, server):
+    await client.items.get_item(item_id_path=None)
+
+    assert server.requests[-1].url == f"{API_URL}/items/{{item_id}}"
@@ -0,0 +1,187 @@
+"""
+Union ответа: вариант выбирается по дискриминатору без перебора моделей
+"""
+
+import importlib
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel, model_validator
+
+from conftest import CODEGEN_MODES, FakeServer, generate_package, reset_client
+
+pytestmark = pytest.mark.asyncio
+
+
+def _ref(name):
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+def _get(summary, schema):
+    return {
+        "get": {
+            "tags": ["pets"],
+            "summary": summary,
+            "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}],
+            "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": schema}}}},
+        }
+    }
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        # Дискриминатор из спецификации
+        "/pets/{id}": _get(
+            "Get pet",
+            {
+                "oneOf": [_ref("Cat"), _ref("Dog")],
+                "discriminator": {
+                    "propertyName": "pet_type",
+                    "mapping": {"cat": "#/components/schemas/Cat", "dog": "#/components/schemas/Dog"},
+                },
+            },
+        ),
+        # Дискриминатор выводится из enum с одним значением
+        "/animals/{id}": _get("Get animal", {"oneOf": [_ref("Cat"), _ref("Dog")]}),
+        # Вариант определяется по обязательному полю, которого нет у других
+        "/critters/{id}": _get("Get critter", {"oneOf": [_ref("Bird"), _ref("Fish")]}),
+    },
+    "components": {
+        "schemas": {
+            "Cat": {
+                "type": "object",
+                "title": "Cat",
+                "required": ["pet_type", "lives"],
+                "properties": {"pet_type": {"type": "string", "enum": ["cat"]}, "lives": {"type": "integer"}},
+            },
+            "Dog": {
+                "type": "object",
+                "title": "Dog",
+                "required": ["pet_type", "bark"],
+                "properties": {"pet_type": {"type": "string", "enum": ["dog"]}, "bark": {"type": "string"}},
+            },
+            "Bird": {
+                "type": "object",
+                "title": "Bird",
+                "required": ["wings"],
+                "properties": {"wings": {"type": "integer"}, "name": {"type": "string"}},
+            },
+            "Fish": {
+                "type": "object",
+                "title": "Fish",
+                "required": ["fins"],
+                "properties": {"fins": {"type": "integer"}, "name": {"type": "string"}},
+            },
+        }
+    },
+}
+
+validated = []
+
+
+class _Recorded(BaseModel):
+    @model_validator(mode="before")
+    @classmethod
+    def _record(cls, data):
+        validated.append(cls.__name__)
+        return data
+
+
+class Circle(_Recorded):
+    kind: Literal["circle"]
+    radius: float
+
+
+class Square(_Recorded):
+    kind: Literal["square"]
+    side: float
+
+
+class Triangle(_Recorded):
+    kind: Literal["triangle"]
+    base: float
+
+
+SHAPES = [Circle, Square, Triangle]
+SHAPE_MAPPING = {"circle": Circle, "square": Square, "triangle": Triangle}
+
+
+@pytest.fixture(scope="module")
+def pet_packages(tmp_path_factory):
+    target_dir = str(tmp_path_factory.mktemp("pets"))
+    return {
+        mode: generate_package(SPEC, target_dir, f"pets_{mode}_client", codegen_mode=mode)
+        for mode in CODEGEN_MODES
+    }
+
+
+@pytest.fixture(params=CODEGEN_MODES)
+def pets(request, pet_packages):
+    server = FakeServer()
+    client = reset_client(pet_packages[request.param].ApiClient(), server)
+    yield client.pets, server
+    reset_client(client)
+
+
+@pytest.fixture
+def utils(packages):
+    return importlib.import_module(f"{packages['decorator'].__name__}.utils")
+
+
+@pytest.fixture(autouse=True)
+def clear_validated():
+    validated.clear()
+
+
+@pytest.mark.parametrize("payload", [{"kind": "triangle", "base": 1}, {"kind": "square", "side": 2}])
+async def test_only_tagged_variant_validated(utils, payload):
+    adapter = utils.get_type_adapter(utils.get_union_type(SHAPES, "kind", SHAPE_MAPPING))
+
+    shape = adapter.validate_python(payload)
+
+    assert validated == [type(shape).__name__] == [payload["kind"].title()]
+
+
+async def test_field_discriminator_validates_one_variant(utils):
+    union = utils.get_union_type(SHAPES, discriminator_fields={"radius": Circle, "side": Square, "base": Triangle})
+
+    shapes = utils.validate_json_bytes(b'[{"kind": "triangle", "base": 1}, {"kind": "circle", "radius": 2}]', union)
+
+    assert [type(shape) for shape in shapes] == [Triangle, Circle]
+    assert validated == ["Triangle", "Circle"]
+
+
+async def test_union_type_cached(utils):
+    assert utils.get_union_type(SHAPES, "kind", SHAPE_MAPPING) is utils.get_union_type(SHAPES, "kind", SHAPE_MAPPING)
+
+
+@pytest.mark.parametrize("path", ["pets", "animals"])
+async def test_property_discriminator(pets, path):
+    zone, server = pets
+    server.route("GET", f"/{path}/1")(lambda request: {"pet_type": "dog", "bark": "woof"})
+    server.route("GET", f"/{path}/2")(lambda request: [{"pet_type": "cat", "lives": 9}, {"pet_type": "dog", "bark": "w"}])
+    method = getattr(zone, f"get_{path[:-1]}")
+
+    dog = await method(id_path="1")
+    pets_list = await method(id_path="2")
+
+    assert type(dog).__name__ == "Dog" and dog.bark == "woof"
+    assert [type(pet).__name__ for pet in pets_list] == ["Cat", "Dog"]
+
+
+async def test_required_field_discriminator(pets):
+    zone, server = pets
+    server.route("GET", "/critters/1")(lambda request: {"fins": 2, "name": "nemo"})
+
+    critter = await zone.get_critter(id_path="1")
+
+    assert type(critter).__name__ == "Fish" and critter.fins == 2
+
+
+async def test_unknown_tag_returns_data(pets):
+    zone, server = pets
+    server.route("GET", "/pets/1")(lambda request: {"pet_type": "fox"})
+
+    assert await zone.get_pet(id_path="1") == {"pet_type": "fox"}
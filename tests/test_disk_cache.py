@@ -0,0 +1,83 @@
+"""
+Кеш ответов на диске: удаление записей, закрытие вместе с клиентом и
+сохраненные ответы
+"""
+
+import contextlib
+import importlib
+import json
+import sqlite3
+
+import pytest
+
+from conftest import API_URL
+
+pytestmark = pytest.mark.asyncio
+
+
+def _item_handler(headers):
+    def handler(request):
+        return 200, {"content-type": "application/json", **headers}, b'{"id": 1, "name": "cached"}'
+
+    return handler
+
+
+async def test_disk_cache_invalidation_and_close(package, client, server, tmp_path):
+    disk_cache = importlib.import_module(f"{package.__name__}.disk_cache")
+    path = str(tmp_path / "responses.db")
+    cache = disk_cache.DiskResponseCache(path)
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(_item_handler({"Cache-Control": "max-age=60"}))
+
+    await client.items.get_item(item_id_path=1)
+    await cache.invalidate_url(f"{API_URL}/items/1")
+    executor = cache._executor
+    await client.close()
+
+    # close() клиента закрывает файл кеша и останавливает его поток
+    assert cache._connection is None and cache._executor is None and executor._shutdown
+
+    reopened = disk_cache.DiskResponseCache(path)
+    client.set_response_cache(reopened)
+    await client.items.get_item(item_id_path=1)
+    await reopened.close()
+
+    # Запись удалена с диска до возврата из invalidate_url()
+    assert len(server.requests) == 2 and reopened.disk_hits == 0
+
+
+class _CountingCodec:
+    """Кодек, считающий вызовы loads"""
+
+    def __init__(self):
+        self.loads_calls = 0
+
+    def dumps(self, value):
+        return json.dumps(value).encode()
+
+    def loads(self, raw):
+        self.loads_calls += 1
+        return json.loads(raw)
+
+
+async def test_stored_response_headers_and_codec(package, client, server, tmp_path):
+    disk_cache = importlib.import_module(f"{package.__name__}.disk_cache")
+    path = str(tmp_path / "responses.db")
+    codec = _CountingCodec()
+    cache = disk_cache.DiskResponseCache(path, json_codec=codec)
+    client.set_response_cache(cache)
+    server.route("GET", "/items/1")(
+        _item_handler({"Cache-Control": "max-age=60", "Content-Encoding": "gzip", "Content-Length": "123"})
+    )
+
+    await client.items.get_item(item_id_path=1)
+    await cache.close()
+
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        (headers,) = connection.execute("SELECT headers FROM responses").fetchone()
+    names = {name.lower() for name, _ in json.loads(headers)}
+    # Тело на диске уже раскодировано: заголовки сетевого представления не хранятся
+    assert "cache-control" in names and not names & {"content-encoding", "content-length"}
+
+    response = disk_cache.CachedResponse(200, json.loads(headers), b'{"id": 1}', cache._json_codec)
+    assert await response.json() == {"id": 1} and codec.loads_calls == 1
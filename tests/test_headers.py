@@ -0,0 +1,131 @@
+"""
+Заголовки и куки запроса: базовые, временные (with_headers / with_cookies)
+и параметры endpoint'а; смена заголовков не пересоздает сессию
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from conftest import reset_client
+
+pytestmark = pytest.mark.asyncio
+
+
+def _item(request):
+    return {"id": 1, "name": "a"}
+
+
+def _cookies(headers):
+    cookie_header = headers.get("Cookie")
+    if cookie_header is None:
+        return None
+    pairs = [part.strip().split("=", 1) for part in cookie_header.split(";")]
+    cookies = dict(pairs)
+    assert len(cookies) == len(pairs), f"duplicate cookies: {cookie_header}"
+    return cookies
+
+
+async def test_overlay_isolated_between_tasks(client, server):
+    arrived = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        arrived.append(request)
+        if len(arrived) == 3:
+            release.set()
+        # Все три запроса в обработке одновременно
+        await release.wait()
+        return _item(request)
+
+    server.route("GET", "/items/1")(handler)
+
+    async def call(tenant):
+        async with client.with_headers(X_Request=tenant):
+            async with client.with_cookies(tenant=tenant):
+                await client.items.get_item(item_id_path=1)
+
+    await asyncio.gather(call("a"), call("b"), client.items.get_item(item_id_path=1))
+
+    seen = [(request.headers.get("X_Request"), _cookies(request.headers)) for request in arrived]
+    assert sorted(seen, key=str) == [("a", {"tenant": "a"}), ("b", {"tenant": "b"}), (None, None)]
+    assert "X_Request" not in client.headers
+
+
+async def test_header_precedence(client, server):
+    server.route("GET", "/items")(lambda request: [])
+    client.headers = {"X-Tenant": "base", "X-Base": "1"}
+    client.cookies = {"session": "base", "theme": "dark"}
+
+    async with client.with_headers(**{"X-Tenant": "temp"}):
+        await client.items.list_items()
+        await client.items.list_items(X_Tenant="endpoint", session="endpoint")
+    await client.items.list_items()
+
+    first, second, third = (request.headers for request in server.requests)
+    assert (first["X-Tenant"], first["X-Base"]) == ("temp", "1")
+    assert _cookies(first) == {"session": "base", "theme": "dark"}
+    # Параметры endpoint'а важнее заголовков и cookies клиента
+    assert second["X-Tenant"] == "endpoint" and _cookies(second) == {"session": "endpoint", "theme": "dark"}
+    assert third["X-Tenant"] == "base"
+
+
+@pytest_asyncio.fixture
+async def peer_server():
+    peers = []
+
+    async def handler(request):
+        peers.append((request.transport.get_extra_info("peername"), request.headers.get("X-Version")))
+        return web.json_response({"id": 1, "name": "a"})
+
+    async def list_handler(request):
+        peers.append((request.transport.get_extra_info("peername"), dict(request.cookies)))
+        return web.json_response([])
+
+    app = web.Application()
+    app.router.add_get("/items/{item_id}", handler)
+    app.router.add_get("/items", list_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", peers
+    await runner.cleanup()
+
+
+async def test_header_change_keeps_session(package, peer_server):
+    api_url, peers = peer_server
+    client = reset_client(package.ApiClient())
+    client.initialize(api_url)
+    try:
+        client.headers = {"X-Version": "1"}
+        await client.items.get_item(item_id_path=1)
+        session = client._session
+        client.update_headers(**{"X-Version": "2"})
+        async with client.with_headers(**{"X-Version": "3"}):
+            await client.items.get_item(item_id_path=1)
+        await client.items.get_item(item_id_path=1)
+
+        assert client._session is session
+        # Одно keep-alive соединение на все запросы
+        assert [version for _, version in peers] == ["1", "3", "2"]
+        assert len({peer for peer, _ in peers}) == 1
+    finally:
+        await client.close()
+        reset_client(client)
+
+
+async def test_endpoint_cookie_overrides_client_cookie(package, peer_server):
+    api_url, peers = peer_server
+    client = reset_client(package.ApiClient())
+    client.initialize(api_url, cookies={"session": "base", "theme": "dark"})
+    try:
+        await client.items.list_items(session="endpoint")
+
+        assert peers[-1][1] == {"session": "endpoint", "theme": "dark"}
+    finally:
+        await client.close()
+        reset_client(client)
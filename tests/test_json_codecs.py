@@ -0,0 +1,84 @@
+"""
+JSON кодеки: выбор по имени, реестр и кодирование запросов и ответов клиента
+"""
+
+import importlib
+import json
+
+import pytest
+
+from conftest import API_URL
+
+pytestmark = pytest.mark.asyncio
+
+
+class _CompactCodec:
+    """Кодек без пробелов в JSON, считающий вызовы"""
+
+    def __init__(self):
+        self.dumps_calls = []
+        self.loads_calls = []
+
+    def dumps(self, value):
+        self.dumps_calls.append(value)
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, raw):
+        self.loads_calls.append(raw)
+        return json.loads(raw)
+
+
+@pytest.fixture
+def json_codecs(package):
+    return importlib.import_module(f"{package.__name__}.json_codecs")
+
+
+async def test_auto_picks_first_available(json_codecs):
+    available = json_codecs.available_json_codecs()
+
+    assert available[-1] == "json"
+    assert json_codecs.get_json_codec().name == available[0]
+    assert json_codecs.get_json_codec("auto").name == available[0]
+    assert json_codecs.get_json_codec("json").name == "json"
+
+
+async def test_codec_errors(json_codecs):
+    with pytest.raises(ValueError, match="Unknown JSON codec"):
+        json_codecs.get_json_codec("yaml")
+    with pytest.raises(TypeError):
+        json_codecs.get_json_codec(object())
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec"])
+async def test_optional_codecs_match_stdlib(json_codecs, name):
+    if name not in json_codecs.available_json_codecs():
+        with pytest.raises(ValueError, match="not installed"):
+            json_codecs.get_json_codec(name)
+        return
+    codec = json_codecs.get_json_codec(name)
+    value = {"id": 1, "name": "ünicode", "tags": [1.5, None, True], 2: "int key"}
+
+    assert json.loads(codec.dumps(value)) == json.loads(json.dumps(value))
+    assert codec.loads(json.dumps(value).encode()) == json.loads(json.dumps(value))
+
+
+async def test_registered_codec_selected_by_name(json_codecs):
+    json_codecs.register_json_codec("compact", _CompactCodec)
+    try:
+        assert isinstance(json_codecs.get_json_codec("compact"), _CompactCodec)
+    finally:
+        json_codecs._codec_factories.pop("compact")
+        json_codecs._codec_available.pop("compact")
+
+
+async def test_client_encodes_and_decodes_with_codec(client, server):
+    codec = _CompactCodec()
+    client.initialize(API_URL, json_codec=codec)
+    server.route("POST", "/items")(lambda request: {"id": 1, "name": "n"})
+
+    await client.items.create_item(name_body="n", price_body=2.5)
+    assert await client.items.get_item(item_id_path=404) == {"detail": "Not Found"}
+
+    assert server.requests[0].content == b'{"name":"n","price":2.5}'
+    assert codec.dumps_calls == [{"name": "n", "price": 2.5}]
+    assert codec.loads_calls == [b'{"detail": "Not Found"}']
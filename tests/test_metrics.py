@@ -0,0 +1,106 @@
+"""
+Метрики по endpoint'ам: точность перцентилей гистограммы и экспорт в Prometheus
+"""
+
+import importlib
+import math
+import random
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def metrics(package):
+    return importlib.import_module(f"{package.__name__}.metrics")
+
+
+def _exact_percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * percent / 100)) - 1]
+
+
+@pytest.mark.parametrize("percent", [50, 90, 99, 99.9])
+async def test_percentiles_within_bucket_precision(metrics, percent):
+    rng = random.Random(7)
+    # От десятков микросекунд до десятков секунд
+    values = [rng.lognormvariate(math.log(0.02), 2.0) for _ in range(20000)]
+    histogram = metrics.LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    exact = _exact_percentile(values, percent)
+
+    assert histogram.percentile(percent) == pytest.approx(exact, rel=1 / metrics._SUB_COUNT)
+
+
+async def test_histogram_edges(metrics):
+    histogram = metrics.LatencyHistogram()
+    assert histogram.percentile(99) == 0.0 and histogram.snapshot()["min"] == 0.0
+
+    for value in (0.0, 0.000003, 0.5, 1e7):
+        histogram.record(value)
+
+    snapshot = histogram.snapshot()
+    assert (snapshot["count"], snapshot["min"], snapshot["max"]) == (4, 0.0, 1e7)
+    assert snapshot["p50"] == pytest.approx(0.000003, abs=1e-6)
+    # Значение за пределом диапазона попадает в последнюю корзину, перцентиль не больше max
+    assert histogram.percentile(100) <= 1e7
+
+
+async def test_cumulative_buckets(metrics):
+    histogram = metrics.LatencyHistogram()
+    for value in (0.0004, 0.003, 0.003, 0.02, 0.7, 40.0):
+        histogram.record(value)
+
+    assert histogram.cumulative([0.001, 0.01, 0.1, 1.0, 10.0]) == [1, 3, 4, 5, 5]
+
+
+async def test_prometheus_text(metrics):
+    client_metrics = metrics.ClientMetrics()
+    item = client_metrics.endpoint('GET /items/{item_id}')
+    item.observe(200, 120, 0.004)
+    item.observe(503, 10, 0.2)
+    item.observe_error(1.5)
+    item.retries = 2
+    client_metrics.endpoint('POST /say"hi"').observe(201, 0, 0.01)
+
+    text = metrics.prometheus_text(client_metrics, prefix="api", buckets=[0.1, 0.01, 1.0])
+    lines = text.splitlines()
+
+    labels = 'method="GET",path="/items/{item_id}"'
+    assert "# TYPE api_requests_total counter" in lines
+    assert f'api_requests_total{{{labels},status_class="2xx"}} 1' in lines
+    assert f'api_requests_total{{{labels},status_class="5xx"}} 1' in lines
+    assert f"api_request_errors_total{{{labels}}} 1" in lines
+    assert f"api_retries_total{{{labels}}} 2" in lines
+    assert f"api_response_bytes_total{{{labels}}} 130" in lines
+    assert "# TYPE api_request_duration_seconds histogram" in lines
+    # Границы отсортированы, значения накопленные
+    buckets = [line for line in lines if line.startswith(f"api_request_duration_seconds_bucket{{{labels}")]
+    assert [line.rsplit(" ", 1)[1] for line in buckets] == ["1", "1", "2", "3"]
+    assert [line.split('le="')[1].split('"')[0] for line in buckets] == ["0.01", "0.1", "1.0", "+Inf"]
+    assert f"api_request_duration_seconds_count{{{labels}}} 3" in lines
+    # Кавычки в метках экранируются
+    assert 'api_requests_total{method="POST",path="/say\\"hi\\"",status_class="2xx"} 1' in lines
+    assert text.endswith("\n")
+
+
+async def test_client_records_calls_by_route(package, client, server):
+    client.set_metrics(True)
+    client.set_retry_policy(package.retry.RetryPolicy(max_attempts=2, backoff_base=10.0))
+    failures = [(503, {"Retry-After": "0"}, b"")]
+    server.route("GET", "/items/1")(lambda request: failures.pop(0) if failures else {"id": 1, "name": "a"})
+    server.route("GET", "/items/2")(lambda request: {"id": 2, "name": "b"})
+
+    await client.items.get_item(item_id_path=1)
+    await client.items.get_item(item_id_path=2)
+    await client.items.get_item(item_id_path=404)
+
+    snapshot = client.metrics.snapshot()
+    assert list(snapshot) == ["GET /items/{item_id}"]
+    endpoint = snapshot["GET /items/{item_id}"]
+    assert endpoint["count"] == 3 and endpoint["retries"] == 1
+    assert endpoint["status"] == {"2xx": 2, "4xx": 1}
+    assert endpoint["latency"]["count"] == 3 and endpoint["decode"]["count"] == 3
@@ -0,0 +1,104 @@
+"""
+Сгенерированные имена (validation, prefetch, *_stream, iter_*) не перекрывают
+параметры и операции спецификации
+"""
+
+import importlib
+import inspect
+
+import pytest
+
+from conftest import CODEGEN_MODES, FakeServer, generate_package, reset_client
+
+pytestmark = pytest.mark.asyncio
+
+
+def _ok(schema):
+    return {"200": {"description": "OK", "content": {"application/json": {"schema": schema}}}}
+
+
+THING = {"$ref": "#/components/schemas/Thing"}
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Collisions", "version": "1.0.0"},
+    "paths": {
+        "/things": {
+            "get": {
+                "tags": ["things"],
+                "summary": "List things",
+                "parameters": [
+                    {"name": "limit", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "offset", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "validation", "in": "header", "schema": {"type": "string"}},
+                    {"name": "prefetch", "in": "header", "schema": {"type": "string"}},
+                ],
+                "responses": _ok({"type": "array", "items": THING}),
+            }
+        },
+        # Операции с именами, которые генератор выбрал бы для *_stream и iter_*
+        "/things/stream": {"get": {"tags": ["things"], "summary": "List things stream", "responses": _ok(THING)}},
+        "/things/iter": {"get": {"tags": ["things"], "summary": "Iter list things", "responses": _ok(THING)}},
+    },
+    "components": {
+        "schemas": {
+            "Thing": {
+                "type": "object",
+                "title": "Thing",
+                "required": ["id"],
+                "properties": {"id": {"type": "integer"}},
+            }
+        }
+    },
+}
+
+ROWS = [{"id": index} for index in range(5)]
+
+
+@pytest.fixture(scope="module")
+def collision_packages(tmp_path_factory):
+    target_dir = str(tmp_path_factory.mktemp("collisions"))
+    return {
+        mode: generate_package(SPEC, target_dir, f"collisions_{mode}_client", codegen_mode=mode)
+        for mode in CODEGEN_MODES
+    }
+
+
+@pytest.fixture(params=CODEGEN_MODES)
+def things(request, collision_packages):
+    server = FakeServer()
+    server.route("GET", "/things")(lambda request: ROWS[int(request.params["offset"]):][:2])
+    server.route("GET", "/things/stream")(lambda request: {"id": 100})
+    server.route("GET", "/things/iter")(lambda request: {"id": 200})
+    client = reset_client(collision_packages[request.param].ApiClient(), server)
+    yield client.things, server
+    reset_client(client)
+
+
+async def test_generated_methods_get_free_names(things):
+    zone, _ = things
+
+    assert (await zone.list_things_stream()).id == 100
+    assert (await zone.iter_list_things()).id == 200
+    assert "validation_" in inspect.signature(zone.list_things_stream_).parameters
+    assert "prefetch_" in inspect.signature(zone.iter_list_things_).parameters
+
+
+async def test_renamed_validation_argument(things):
+    zone, server = things
+    validation = importlib.import_module(f"{type(zone.client).__module__.rsplit('.', 1)[0]}.validation")
+
+    items = await zone.list_things(limit_query=2, offset_query=0, validation="header", validation_="lazy")
+
+    assert server.requests[-1].headers["validation"] == "header"
+    assert all(isinstance(item, validation.LazyModel) for item in items)
+
+
+async def test_renamed_prefetch_argument(things):
+    zone, server = things
+
+    items = await zone.iter_list_things_(limit_query=2, prefetch="header", prefetch_=0).collect()
+
+    assert [item.id for item in items] == [0, 1, 2, 3, 4]
+    assert {request.headers["prefetch"] for request in server.requests} == {"header"}
+
@@ -0,0 +1,125 @@
+"""
+Автопагинация iter_*: смещения, конец итерации и предзагрузка
+"""
+
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+ROWS = [{"id": index, "name": f"item-{index}"} for index in range(25)]
+
+
+def _offset_handler(cap=None):
+    """GET /items с limit/offset; cap - максимальный размер страницы сервера"""
+
+    def handler(request):
+        params = request.params or {}
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 10))
+        if cap is not None:
+            limit = min(limit, cap)
+        return ROWS[offset:offset + limit]
+
+    return handler
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+async def test_offset_full_pages(client, server, prefetch):
+    server.route("GET", "/items")(_offset_handler())
+
+    items = await client.items.iter_list_items(limit_query=10, prefetch=prefetch).collect()
+
+    assert [item.id for item in items] == list(range(25))
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+async def test_offset_server_caps_page_size(client, server, prefetch):
+    server.route("GET", "/items")(_offset_handler(cap=5))
+
+    items = await client.items.iter_list_items(limit_query=10, prefetch=prefetch).collect()
+
+    assert [item.id for item in items] == list(range(25))
+    # Смещение - число полученных элементов, а не номер страницы * limit
+    offsets = [request.params["offset"] for request in server.requests]
+    assert offsets[:6] == [0, 5, 10, 15, 20, 25]
+
+
+@pytest.mark.parametrize("cap, requests", [(None, 4), (5, 2)])
+async def test_offset_prefetch_waits_for_confirmed_page_size(client, server, cap, requests):
+    server.route("GET", "/items")(_offset_handler(cap=cap))
+
+    iterator = client.items.iter_list_items(limit_query=10, prefetch=3)
+    await iterator.__anext__()
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    # Страницы грузятся параллельно, только если первая пришла полной
+    assert len(server.requests) == requests
+    await iterator.aclose()
+
+
+async def test_offset_short_page_is_not_the_end(client, server):
+    pages = {0: ROWS[:3], 3: ROWS[3:5]}
+    server.route("GET", "/items")(lambda request: pages.get(int(request.params["offset"]), []))
+
+    items = await client.items.iter_list_items(limit_query=10).collect()
+
+    assert [item.id for item in items] == [0, 1, 2, 3, 4]
+    assert [request.params["offset"] for request in server.requests] == [0, 3, 5]
+
+
+async def test_offset_total_stops_iteration(client, server):
+    def search(request):
+        start = int(request.params.get("from", 0))
+        size = int(request.params.get("size", 10))
+        return {"results": ROWS[start:start + min(size, 4)], "total": 12}
+
+    server.route("GET", "/search")(search)
+
+    items = await client.catalog.iter_search(size_query=10).collect()
+
+    assert [item.id for item in items] == list(range(12))
+    assert [request.params["from"] for request in server.requests] == [0, 4, 8]
+
+
+async def test_page_style(client, server):
+    def pages(request):
+        page = int(request.params.get("page", 1))
+        per_page = min(int(request.params.get("per_page", 10)), 4)
+        return ROWS[(page - 1) * per_page:page * per_page]
+
+    server.route("GET", "/pages")(pages)
+
+    items = await client.catalog.iter_list_pages(per_page_query=10, prefetch=2).collect()
+
+    assert [item.id for item in items] == list(range(25))
+
+
+async def test_cursor_style(client, server):
+    def feed(request):
+        start = int((request.params or {}).get("cursor") or 0)
+        rows = ROWS[start:start + 10]
+        next_cursor = str(start + 10) if start + 10 < len(ROWS) else None
+        return {"data": rows, "next_cursor": next_cursor}
+
+    server.route("GET", "/feed")(feed)
+
+    items = await client.catalog.iter_feed(prefetch=2).collect()
+
+    assert [item.id for item in items] == list(range(25))
+    assert len(server.requests) == 3
+
+
+async def test_error_stops_iteration(client, server):
+    server.route("GET", "/items")(_offset_handler())
+    iterator = client.items.iter_list_items(limit_query=10)
+    await iterator.__anext__()
+
+    def broken(request):
+        raise RuntimeError("boom")
+
+    server.route("GET", "/items")(broken)
+    with pytest.raises(Exception):
+        await iterator.collect()
@@ -0,0 +1,78 @@
+"""
+Ограничитель частоты запросов: лимиты клиента и подстройка под ответы сервера
+"""
+
+import importlib
+import time
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def rate_limit(package):
+    return importlib.import_module(f"{package.__name__}.rate_limit")
+
+
+async def _acquire_time(limiter, endpoint="Items.get_item"):
+    started = time.monotonic()
+    await limiter.acquire(endpoint)
+    return time.monotonic() - started
+
+
+async def test_set_rate_limiter_returns_client(rate_limit, client):
+    limiter = rate_limit.RateLimiter(rate=100)
+
+    assert client.set_rate_limiter(limiter) is client
+    assert client.set_rate_limiter(None) is client
+
+
+async def test_endpoint_limit_spaces_requests(rate_limit):
+    limiter = rate_limit.RateLimiter(endpoints={"Items.get_item": (20, 1)})
+
+    waits = [await _acquire_time(limiter) for _ in range(3)]
+
+    # Пачка из одного запроса, дальше - по одному раз в 50 мс
+    assert waits[0] < 0.01 and all(wait >= 0.04 for wait in waits[1:])
+    assert await _acquire_time(limiter, "Items.list_items") < 0.01
+
+
+async def test_429_pauses_and_slows_down(rate_limit):
+    limiter = rate_limit.RateLimiter(rate=100, burst=100)
+
+    limiter.observe("Items.get_item", 429, {"Retry-After": "0.05"})
+
+    assert limiter.stats()["*"]["factor"] == 0.5
+    assert await _acquire_time(limiter) >= 0.04
+
+    limiter.observe("Items.get_item", 200, {})
+    assert limiter.stats()["*"]["factor"] == pytest.approx(0.5 + limiter.recovery)
+
+
+async def test_server_remaining_spread_until_reset(rate_limit):
+    limiter = rate_limit.RateLimiter(adaptive_scope="endpoint")
+
+    limiter.observe("Items.get_item", 200, {"X-RateLimit-Remaining": "2", "X-RateLimit-Reset": "0.1"})
+    waits = [await _acquire_time(limiter) for _ in range(3)]
+
+    # Два оставшихся запроса сразу, третий - в темпе 2 запроса за 0.1 с
+    assert waits[0] < 0.01 and waits[1] < 0.01 and waits[2] >= 0.04
+    assert await _acquire_time(limiter, "Items.list_items") < 0.01
+
+
+async def test_client_waits_for_exhausted_server_window(rate_limit, client, server):
+    client.set_rate_limiter(rate_limit.RateLimiter())
+    server.route("GET", "/items/1")(
+        lambda request: (
+            200,
+            {"content-type": "application/json", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.05"},
+            b'{"id": 1, "name": "limited"}',
+        )
+    )
+
+    await client.items.get_item(item_id_path=1)
+    started = time.monotonic()
+    await client.items.get_item(item_id_path=1)
+
+    assert time.monotonic() - started >= 0.04
@@ -0,0 +1,100 @@
+"""
+RequestPlan: те же query, headers, cookies и body, что и разбор locals() без плана
+"""
+
+import datetime
+import importlib
+
+import pytest
+
+from conftest import API_URL
+
+pytestmark = pytest.mark.asyncio
+
+PARAM_MAPPING = {
+    "limit_query": {"name": "limit", "type": "query"},
+    "created_query": {"name": "created-at", "type": "query"},
+    "X_Tenant": {"name": "X-Tenant", "type": "header"},
+    "session": {"name": "session", "type": "cookie"},
+}
+
+CALLS = [
+    {},
+    {"limit_query": 5, "created_query": datetime.date(2024, 1, 2), "flag_query": True, "X_Tenant": 7, "session": "s1"},
+    {"limit_query": None, "name_body": "n", "price_value_body": 1.5},
+    {"name_body": "n", "additional_fields_body": {"extra": datetime.datetime(2024, 1, 2, 3, 4)}},
+    {"request_body_body": {"raw": [1, 2]}},
+    {"session": "only cookie", "name_body": None},
+]
+
+
+@pytest.fixture
+def utils(packages):
+    return importlib.import_module(f"{packages['decorator'].__name__}.utils")
+
+
+@pytest.fixture
+def endpoint(packages):
+    NOTSET = importlib.import_module(f"{packages['decorator'].__name__}.constants").NOTSET
+
+    def update_item(
+        self,
+        item_id_path,
+        limit_query=NOTSET,
+        created_query=NOTSET,
+        flag_query=NOTSET,
+        X_Tenant=NOTSET,
+        session=NOTSET,
+        name_body=NOTSET,
+        price_value_body=NOTSET,
+        request_body_body=NOTSET,
+        additional_fields_body=NOTSET,
+        validation=None,
+    ):
+        pass
+
+    return update_item
+
+
+@pytest.mark.parametrize("kwargs", CALLS)
+async def test_plan_matches_locals_scan(utils, endpoint, kwargs):
+    plan = utils.RequestPlan(
+        endpoint, "PATCH", "/items/{item_id}/", field_mapping={"price_value": "price-value"}, param_mapping=PARAM_MAPPING
+    )
+    values = plan.bind((3,), kwargs)
+    local_values = {"self": None, **values}
+
+    assert plan.format_path(values) == "/items/3"
+    assert plan.build_params(values) == utils.prepare_params(local_values, PARAM_MAPPING)
+    assert plan.build_headers(values) == utils.merge_cookies_into_headers(
+        utils.prepare_headers(local_values, PARAM_MAPPING), utils.prepare_cookies(local_values, PARAM_MAPPING)
+    )
+    assert plan.build_body(values) == utils.prepare_body_data(local_values, field_mapping={"price_value": "price-value"})
+
+
+async def test_bind_reports_bad_arguments_like_a_call(utils, endpoint):
+    plan = utils.RequestPlan(endpoint, "PATCH", "/items/{item_id}")
+
+    with pytest.raises(TypeError):
+        plan.bind((), {"limit_query": 1})
+    with pytest.raises(TypeError):
+        plan.bind((1,), {"unknown_query": 1})
+
+
+async def test_request_contents(client, server):
+    server.route("GET", "/items")(lambda request: [{"id": 2, "name": "a"}, {"id": 3, "name": "b"}])
+
+    items = await client.items.list_items(limit_query=3, offset_query=2, X_Tenant="t1", session="s1")
+
+    assert [item.id for item in items] == [2, 3]
+    request = server.requests[-1]
+    assert request.url == f"{API_URL}/items"
+    assert request.params == {"limit": 3, "offset": 2}
+    assert request.headers["X-Tenant"] == "t1"
+    assert request.headers["Cookie"] == "session=s1"
+
+
+async def test_non_2xx_returns_body(client, server):
+    item = await client.items.get_item(item_id_path=404)
+
+    assert item == {"detail": "Not Found"}
@@ -0,0 +1,80 @@
+"""
+Разбор ответа: модели строятся из bytes одним TypeAdapter, без промежуточного dict
+"""
+
+import importlib
+import json
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+pytestmark = pytest.mark.asyncio
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    price: Optional[float] = None
+
+
+@pytest.fixture
+def utils(packages):
+    return importlib.import_module(f"{packages['decorator'].__name__}.utils")
+
+
+@pytest.fixture
+def loads_calls():
+    calls = []
+
+    def loads(raw):
+        calls.append(raw)
+        return json.loads(raw)
+
+    return loads, calls
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        (b'{"id": 1, "name": "a"}', Item(id=1, name="a")),
+        (b'  \n[{"id": 1, "name": "a"}, {"id": 2, "name": "b", "price": 2.5}]', [Item(id=1, name="a"), Item(id=2, name="b", price=2.5)]),
+        (b"[]", []),
+    ],
+)
+async def test_models_validated_from_bytes(utils, loads_calls, raw, expected):
+    loads, calls = loads_calls
+
+    assert utils.validate_json_bytes(raw, Item, loads) == expected
+    # Валидная модель строится без отдельного декодирования JSON
+    assert calls == []
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        (b'"plain"', "plain"),
+        (b"42", 42),
+        (b'{"detail": "Not Found"}', {"detail": "Not Found"}),
+        (b'[{"id": 1}]', [{"id": 1}]),
+    ],
+)
+async def test_non_model_body_returned_as_data(utils, loads_calls, raw, expected):
+    loads, calls = loads_calls
+
+    assert utils.validate_json_bytes(raw, Item, loads) == expected
+    assert calls == [raw]
+
+
+async def test_type_adapters_cached(utils):
+    assert utils.get_type_adapter(Item) is utils.get_type_adapter(Item)
+    assert utils.get_type_adapter(List[Item]) is utils.get_type_adapter(List[Item])
+
+
+async def test_client_returns_models(client, server):
+    server.route("GET", "/items")(lambda request: [{"id": index, "name": str(index)} for index in range(3)])
+
+    items = await client.items.list_items()
+
+    assert [type(item).__name__ for item in items] == ["Item"] * 3
+    assert [item.id for item in items] == [0, 1, 2]
@@ -0,0 +1,69 @@
+"""
+Повторы запросов: статусы из retry_statuses, Retry-After, идемпотентность
+"""
+
+import time
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+def _flaky(failures):
+    """Обработчик: сначала ответы из failures, затем Item"""
+
+    def handler(request):
+        if failures:
+            return failures.pop(0)
+        return {"id": 1, "name": "ok"}
+
+    return handler
+
+
+def _policy(package, **kwargs):
+    # Большой backoff_base: быстрые повторы возможны только по Retry-After
+    return package.retry.RetryPolicy(backoff_base=10.0, **kwargs)
+
+
+async def test_retry_after_replaces_backoff(package, client, server):
+    client.set_retry_policy(_policy(package, max_attempts=3, retry_after_max=0.05))
+    server.route("GET", "/items/1")(_flaky([(503, {"Retry-After": "30"}, b""), (429, {"Retry-After": "0"}, b"")]))
+
+    started = time.perf_counter()
+    item = await client.items.get_item(item_id_path=1)
+    elapsed = time.perf_counter() - started
+
+    assert item.id == 1
+    assert len(server.requests) == 3
+    # 30 секунд ограничены retry_after_max, вторая пауза - 0
+    assert 0.05 <= elapsed < 1.0
+
+
+async def test_attempts_exhausted_return_last_response(package, client, server):
+    client.set_retry_policy(_policy(package, max_attempts=2))
+    server.route("GET", "/items/1")(lambda request: (503, {"Retry-After": "0", "content-type": "application/json"}, b'{"detail": "busy"}'))
+
+    result = await client.items.get_item(item_id_path=1)
+
+    assert result == {"detail": "busy"}
+    assert len(server.requests) == 2
+
+
+async def test_non_idempotent_method_not_retried(package, client, server):
+    client.set_retry_policy(_policy(package, max_attempts=3))
+    server.route("POST", "/items")(_flaky([(503, {"Retry-After": "0"}, b"")]))
+
+    await client.items.create_item(name_body="n")
+
+    assert len(server.requests) == 1
+
+
+async def test_idempotency_key_allows_post_retry(package, client, server):
+    client.set_retry_policy(_policy(package, max_attempts=3, idempotency_keys=True))
+    server.route("POST", "/items")(_flaky([(503, {"Retry-After": "0"}, b"")]))
+
+    item = await client.items.create_item(name_body="n")
+
+    assert item.id == 1
+    keys = {request.headers["Idempotency-Key"] for request in server.requests}
+    assert len(server.requests) == 2 and len(keys) == 1
@@ -0,0 +1,137 @@
+"""
+Single-flight: одинаковые конкурентные GET запросы - один HTTP вызов
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def single_flight(package, client):
+    module = importlib.import_module(f"{package.__name__}.single_flight")
+    flight = module.SingleFlight()
+    client.set_single_flight(flight)
+    return flight
+
+
+class _Gate:
+    """Обработчики сервера ждут release() - запросы успевают собраться"""
+
+    def __init__(self, server):
+        self.server = server
+        self._release = asyncio.Event()
+
+    def route(self, method, path, result):
+        async def handler(request):
+            await self._release.wait()
+            return result(request) if callable(result) else result
+
+        self.server.route(method, path)(handler)
+
+    def release(self):
+        self._release.set()
+
+
+@pytest.fixture
+def gate(server):
+    return _Gate(server)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_identical_requests_coalesced(client, server, single_flight, gate):
+    gate.route("GET", "/items/1", {"id": 1, "name": "a"})
+
+    calls = [asyncio.ensure_future(client.items.get_item(item_id_path=1)) for _ in range(5)]
+    await _settle()
+    gate.release()
+    results = await asyncio.gather(*calls)
+
+    assert len(server.requests) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats() == {"calls": 1, "shared": 4, "inflight": 0}
+
+
+async def test_different_requests_not_coalesced(client, server, single_flight, gate):
+    gate.route("GET", "/items", lambda request: [])
+
+    calls = [
+        client.items.list_items(limit_query=1),
+        client.items.list_items(limit_query=2),
+        client.items.list_items(limit_query=1, X_Tenant="t"),
+        client.items.list_items(limit_query=1, session="s"),
+    ]
+    futures = [asyncio.ensure_future(call) for call in calls]
+    await _settle()
+    gate.release()
+    await asyncio.gather(*futures)
+
+    assert len(server.requests) == 4
+
+
+async def test_unsafe_method_not_coalesced(client, server, single_flight, gate):
+    gate.route("POST", "/items", {"id": 1, "name": "n"})
+
+    futures = [asyncio.ensure_future(client.items.create_item(name_body="n")) for _ in range(2)]
+    await _settle()
+    gate.release()
+    await asyncio.gather(*futures)
+
+    assert len(server.requests) == 2
+
+
+async def test_exception_shared(package, client, server, single_flight, gate):
+    transport = importlib.import_module(f"{package.__name__}.transport")
+    common = importlib.import_module(f"{package.__name__}.common")
+
+    def refuse(request):
+        raise transport.TransportError("connection reset")
+
+    gate.route("GET", "/items/1", refuse)
+
+    futures = [asyncio.ensure_future(client.items.get_item(item_id_path=1)) for _ in range(3)]
+    await _settle()
+    gate.release()
+    results = await asyncio.gather(*futures, return_exceptions=True)
+
+    assert len(server.requests) == 1
+    assert all(isinstance(result, common.SendRequestError) for result in results)
+
+
+async def test_cancelled_leader_hands_over(client, server, single_flight, gate):
+    gate.route("GET", "/items/1", {"id": 1, "name": "a"})
+
+    leader = asyncio.ensure_future(client.items.get_item(item_id_path=1))
+    await _settle()
+    waiter = asyncio.ensure_future(client.items.get_item(item_id_path=1))
+    await _settle()
+    leader.cancel()
+    await _settle()
+    gate.release()
+
+    # Ожидающий не получает чужую отмену, а выполняет запрос сам
+    assert (await waiter).id == 1
+    assert leader.cancelled()
+    assert len(server.requests) == 2
+
+
+async def test_cancelled_waiter_keeps_shared_call(client, server, single_flight, gate):
+    gate.route("GET", "/items/1", {"id": 1, "name": "a"})
+
+    leader = asyncio.ensure_future(client.items.get_item(item_id_path=1))
+    await _settle()
+    waiter = asyncio.ensure_future(client.items.get_item(item_id_path=1))
+    await _settle()
+    waiter.cancel()
+    gate.release()
+
+    assert (await leader).id == 1
+    assert waiter.cancelled()
+    assert len(server.requests) == 1
@@ -0,0 +1,116 @@
+"""
+Потоковый разбор JSON массива: границы кусков и однократное декодирование
+"""
+
+import importlib
+import json
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+DOCUMENT = [
+    {"id": 1, "name": "a \"quoted\" \\ name", "tags": ["x", "]", "}", ","], "nested": {"deep": [[], {}]}},
+    -2.5e3,
+    "строка",
+    None,
+    True,
+    [1, [2, [3]]],
+    12345678901234567890,
+    # Глубже, чем регулярные выражения сканера пропускают за один раз
+    {"a": {"b": [{"c": [[{"d": [["e", {"f": "]"}]]}]]}]}},
+]
+
+
+@pytest.fixture
+def utils(packages):
+    return importlib.import_module(f"{packages['decorator'].__name__}.utils")
+
+
+class _CountingLoads:
+    """loads кодека, запоминающий декодированные куски текста"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, raw):
+        self.calls.append(raw)
+        return json.loads(raw)
+
+
+def _feed(scanner, text, size):
+    values = []
+    for start in range(0, len(text), size):
+        values.extend(scanner.feed(text[start:start + size]))
+    values.extend(scanner.feed("", final=True))
+    return values
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize("indent", [None, 2])
+async def test_scanner_matches_json_loads(utils, size, indent):
+    text = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False)
+
+    assert _feed(utils.JsonArrayScanner(), text, size) == DOCUMENT
+    assert _feed(utils.JsonArrayScanner(_CountingLoads()), text, size) == DOCUMENT
+
+
+async def test_split_element_decoded_once(utils):
+    element = {"rows": [{"value": "v" * 50, "index": index} for index in range(200)]}
+    text = json.dumps([element, 1])
+    loads = _CountingLoads()
+
+    assert _feed(utils.JsonArrayScanner(loads), text, 16) == [element, 1]
+    # Элемент из сотен кусков декодирован один раз, целиком
+    assert loads.calls[0] == json.dumps(element)
+
+
+ROWS = [{"id": index, "tags": ["a", "b"], "meta": {"x": [index]}} for index in range(20)]
+
+
+def _feed_split(scanner):
+    text = json.dumps(ROWS)
+    cut = text.index('{"id": 10') + 5
+    return scanner.feed(text[:cut]) + scanner.feed(text[cut:]) + scanner.feed("", final=True)
+
+
+async def test_runs_decoded_with_one_codec_call(utils):
+    loads = _CountingLoads()
+
+    assert _feed_split(utils.JsonArrayScanner(loads)) == ROWS
+    # Элементы до разрыва, разорванный элемент и элементы после - три вызова,
+    # каждый элемент декодирован ровно один раз
+    assert loads.calls == [json.dumps(ROWS[:10]), json.dumps(ROWS[10]), json.dumps(ROWS[11:])]
+
+
+async def test_stdlib_codec_not_used_for_boundaries(utils, monkeypatch):
+    raw_decode = json.JSONDecoder.raw_decode
+    calls = []
+
+    def counting_raw_decode(self, text, *args, **kwargs):
+        calls.append(text)
+        return raw_decode(self, text, *args, **kwargs)
+
+    monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting_raw_decode)
+
+    assert _feed_split(utils.JsonArrayScanner()) == ROWS
+    assert len(calls) == 3
+
+
+async def test_invalid_array_raises(utils):
+    for text in ("[1 2]", "[1,,2]", "[{} {}]", "[1, x]", "[1"):
+        with pytest.raises(ValueError):
+            _feed(utils.JsonArrayScanner(), text, 2)
+
+
+async def test_iter_json_items_uses_codec_loads(utils):
+    loads = _CountingLoads()
+
+    async def chunks():
+        text = json.dumps(DOCUMENT).encode()
+        for start in range(0, len(text), 5):
+            yield text[start:start + 5]
+
+    items = [item async for item in utils.iter_json_items(chunks(), "application/json", loads=loads)]
+
+    assert items == DOCUMENT and loads.calls
@@ -0,0 +1,103 @@
+"""
+Синхронный клиент (--sync) отправляет те же запросы и строит те же модели,
+что и async клиент
+"""
+
+import asyncio
+import copy
+import importlib
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from conftest import CODEGEN_MODES, SPEC, generate_package, reset_client
+
+pytestmark = pytest.mark.asyncio
+
+SYNC_SPEC = copy.deepcopy(SPEC)
+# Тело целиком (не объект из полей): явный None отправляется как JSON null
+SYNC_SPEC["paths"]["/raw"] = {
+    "put": {
+        "tags": ["items"],
+        "summary": "Put raw",
+        "requestBody": {"content": {"application/json": {"schema": {"type": "array", "items": {"type": "integer"}}}}},
+        "responses": {"200": {"description": "OK"}},
+    }
+}
+
+CALLS = [
+    ("list_items", {"limit_query": 3, "offset_query": 2, "X_Tenant": "t1", "session": "s1"}),
+    ("create_item", {"name_body": "n", "price_body": 2.5}),
+    ("get_item", {"item_id_path": "a/b c"}),
+    ("update_item", {"item_id_path": 3, "name_body": None}),
+    ("update_item", {"item_id_path": 3}),
+    ("put_raw", {"models_body": [1, 2]}),
+    ("put_raw", {"models_body": None}),
+    ("put_raw", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def sync_packages(tmp_path_factory):
+    target_dir = str(tmp_path_factory.mktemp("sync"))
+    return {
+        mode: generate_package(SYNC_SPEC, target_dir, f"tests_sync_{mode}_client", codegen_mode=mode, sync=True)
+        for mode in CODEGEN_MODES
+    }
+
+
+@pytest_asyncio.fixture
+async def api():
+    received = []
+
+    async def handler(request):
+        received.append((request.method, request.path_qs, request.headers.get("X-Tenant"), request.headers.get("Cookie"), await request.read()))
+        if request.method == "GET" and request.path == "/items":
+            return web.json_response([{"id": 1, "name": "a"}])
+        return web.json_response({"id": 1, "name": request.method})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", received
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture(params=CODEGEN_MODES)
+async def clients(request, sync_packages, api):
+    package = sync_packages[request.param]
+    api_url, received = api
+    async_client = reset_client(package.ApiClient())
+    async_client.initialize(api_url)
+    sync_client = importlib.import_module(f"{package.__name__}.sync").SyncApiClient().initialize(api_url)
+    yield async_client, sync_client, received
+    sync_client.close()
+    await async_client.close()
+    reset_client(async_client)
+
+
+@pytest.mark.parametrize("method, kwargs", CALLS)
+async def test_sync_client_sends_same_request(clients, method, kwargs):
+    async_client, sync_client, received = clients
+
+    async_result = await getattr(async_client.items, method)(**kwargs)
+    # Блокирующий вызов в потоке: сервер работает в этом же event loop
+    sync_result = await asyncio.to_thread(getattr(sync_client.items, method), **kwargs)
+
+    assert len(received) == 2 and received[0] == received[1]
+    assert type(async_result) is type(sync_result) and repr(async_result) == repr(sync_result)
+
+
+async def test_explicit_none_body_is_json_null(clients):
+    async_client, sync_client, received = clients
+
+    await async_client.items.put_raw(models_body=None)
+    await asyncio.to_thread(sync_client.items.put_raw, models_body=None)
+    await asyncio.to_thread(sync_client.items.put_raw)
+
+    assert [body for *_, body in received] == [b"null", b"null", b""]
@@ -0,0 +1,141 @@
+"""
+Трассировка фаз запросов через aiohttp TraceConfig на локальном сервере
+"""
+
+import asyncio
+import importlib
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from conftest import reset_client
+
+pytestmark = pytest.mark.asyncio
+
+SERVER_DELAY = 0.02
+
+
+@pytest_asyncio.fixture
+async def timing_server():
+    failures = []
+
+    async def get_item(request):
+        await asyncio.sleep(SERVER_DELAY)
+        if failures:
+            return web.Response(status=failures.pop(0), headers={"Retry-After": "0"})
+        return web.json_response({"id": int(request.match_info["item_id"]), "name": "x"})
+
+    app = web.Application()
+    app.router.add_get("/items/{item_id}", get_item)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    # Имя хоста, а не IP: первое соединение проходит через DNS
+    yield f"http://localhost:{port}", failures
+    await runner.cleanup()
+
+
+@pytest.fixture
+def timings(package):
+    return importlib.import_module(f"{package.__name__}.timings")
+
+
+@pytest_asyncio.fixture
+async def traced(package, timings, timing_server):
+    api_url, failures = timing_server
+    sink = timings.MemorySink()
+    client = reset_client(package.ApiClient())
+    client.initialize(api_url, timing_tracer=timings.TimingTracer(sink=sink))
+    yield client, sink, failures
+    client.set_timing_tracer(None)
+    await client.close()
+    reset_client(client)
+
+
+async def test_phases_of_new_and_reused_connection(traced):
+    client, sink, _ = traced
+
+    await client.items.get_item(item_id_path=1)
+    await client.items.get_item(item_id_path=2)
+
+    first, second = sink.timings
+    assert (first.status, first.route, first.attempt) == (200, "GET /items/{item_id}", 1)
+    assert not first.reused and first.dns is not None and first.connect is not None
+    assert first.ttfb >= SERVER_DELAY and first.download is not None and first.decode is not None
+    assert first.total >= first.ttfb + first.download
+    # Соединение из keep-alive пула: без DNS и connect
+    assert second.reused and second.dns is None and second.connect is None
+    assert second.ttfb >= SERVER_DELAY
+
+
+async def test_every_attempt_emitted(package, traced):
+    client, sink, failures = traced
+    client.set_retry_policy(package.retry.RetryPolicy(max_attempts=3, backoff_base=10.0))
+    failures.append(503)
+
+    await client.items.get_item(item_id_path=1)
+
+    assert [(timing.attempt, timing.status) for timing in sink.timings] == [(1, 503), (2, 200)]
+    # Разбор ответа есть только у итоговой попытки
+    assert sink.timings[0].decode is None and sink.timings[1].decode is not None
+
+
+async def test_failed_attempt_records_error(package, timings):
+    sink = timings.MemorySink()
+    client = reset_client(package.ApiClient())
+    client.initialize(
+        "http://127.0.0.1:1",
+        retry_policy=package.retry.RetryPolicy(max_attempts=1),
+        timing_tracer=timings.TimingTracer(sink=sink),
+    )
+    common = importlib.import_module(f"{package.__name__}.common")
+    try:
+        with pytest.raises(common.SendRequestError):
+            await client.items.get_item(item_id_path=1)
+    finally:
+        client.set_timing_tracer(None)
+        await client.close()
+        reset_client(client)
+
+    (timing,) = sink.timings
+    assert timing.status is None and timing.error and timing.total is not None
+
+
+async def test_pool_wait_recorded(traced, timing_server):
+    client, sink, _ = traced
+    api_url, _ = timing_server
+    client.initialize(api_url, max_connections=1, max_connections_per_host=1)
+
+    await asyncio.gather(*(client.items.get_item(item_id_path=index) for index in range(4)))
+
+    waits = [timing.pool_wait for timing in sink.timings if timing.pool_wait is not None]
+    # Три вызова ждали единственное соединение, последний - дольше остальных
+    assert len(waits) == 3 and max(waits) >= 2 * SERVER_DELAY
+
+
+async def test_sampling_decided_per_call(package, timings, traced):
+    client, sink, failures = traced
+    samples = iter([0.9, 0.1])
+    client.set_timing_tracer(timings.TimingTracer(sink=sink, sample_rate=0.5, rng=lambda: next(samples)))
+    client.set_retry_policy(package.retry.RetryPolicy(max_attempts=2, backoff_base=10.0))
+
+    await client.items.get_item(item_id_path=1)
+    failures.append(503)
+    await client.items.get_item(item_id_path=2)
+
+    # Первый вызов не попал в выборку, второй - со всеми попытками
+    assert [timing.attempt for timing in sink.timings] == [1, 2]
+
+
+async def test_broken_sink_does_not_fail_request(timings, traced):
+    client, _, _ = traced
+
+    def broken(timing):
+        raise RuntimeError("sink is down")
+
+    client.set_timing_tracer(timings.TimingTracer(sink=broken))
+
+    assert (await client.items.get_item(item_id_path=1)).id == 1
@@ -0,0 +1,91 @@
+"""
+OpenTelemetry трассировка: span на вызов endpoint'а и traceparent в запросе
+"""
+
+import importlib
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind, StatusCode
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def exporter(package, client):
+    tracing = importlib.import_module(f"{package.__name__}.tracing")
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    client.set_tracing(tracing.OpenTelemetryTracing(tracer_provider=provider))
+    yield exporter
+    client.set_tracing(None)
+
+
+async def test_span_per_call(client, server, exporter):
+    server.route("GET", "/items/7")(lambda request: {"id": 7, "name": "a"})
+
+    await client.items.get_item(item_id_path=7)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "Items.get_item"
+    assert span.kind is SpanKind.CLIENT
+    assert span.attributes["http.request.method"] == "GET"
+    assert span.attributes["url.template"] == "/items/{item_id}"
+    assert span.attributes["url.full"] == "http://api.test/items/7"
+    assert span.attributes["http.response.status_code"] == 200
+    assert span.status.status_code is StatusCode.UNSET
+
+
+async def test_one_span_for_all_retry_attempts(package, client, server, exporter):
+    client.set_retry_policy(package.retry.RetryPolicy(max_attempts=3, backoff_base=10.0))
+    failures = [(503, {"Retry-After": "0"}, b""), (503, {"Retry-After": "0"}, b"")]
+    server.route("GET", "/items/1")(lambda request: failures.pop(0) if failures else {"id": 1, "name": "ok"})
+
+    await client.items.get_item(item_id_path=1)
+
+    (span,) = exporter.get_finished_spans()
+    assert len(server.requests) == 3
+    assert span.attributes["http.request.resend_count"] == 2
+    assert span.attributes["http.response.status_code"] == 200
+
+
+async def test_failed_call_records_exception(package, client, server, exporter):
+    transport = importlib.import_module(f"{package.__name__}.transport")
+    common = importlib.import_module(f"{package.__name__}.common")
+
+    def refuse(request):
+        raise transport.TransportError("connection reset")
+
+    server.route("GET", "/items/1")(refuse)
+
+    with pytest.raises(common.SendRequestError):
+        await client.items.get_item(item_id_path=1)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.status.status_code is StatusCode.ERROR
+    assert [event.name for event in span.events] == ["exception"]
+    assert span.events[0].attributes["exception.type"].endswith("SendRequestError")
+
+
+async def test_error_status_marks_span(client, server, exporter):
+    await client.items.get_item(item_id_path=404)
+
+    (span,) = exporter.get_finished_spans()
+    assert span.attributes["http.response.status_code"] == 404
+    assert span.status.status_code is StatusCode.ERROR
+
+
+async def test_traceparent_sent_to_server(client, server, exporter):
+    server.route("GET", "/items/1")(lambda request: {"id": 1, "name": "a"})
+
+    await client.items.get_item(item_id_path=1)
+
+    (span,) = exporter.get_finished_spans()
+    context = span.get_span_context()
+    version, trace_id, span_id, flags = server.requests[-1].headers["traceparent"].split("-")
+    assert version == "00" and int(flags, 16) & 0x01  # sampled
+    assert int(trace_id, 16) == context.trace_id
+    assert int(span_id, 16) == context.span_id
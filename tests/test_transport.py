@@ -0,0 +1,108 @@
+"""
+Транспорты: потоковые multipart загрузки и разбор ответов кодеком клиента
+"""
+
+import io
+import json
+import threading
+
+import pytest
+
+from conftest import API_URL
+
+pytestmark = pytest.mark.asyncio
+
+httpx = pytest.importorskip("httpx")
+
+
+class _RecordingFile(io.BytesIO):
+    """Файл, который запоминает потоки, читавшие его содержимое"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.threads = set()
+
+    def read(self, size=-1):
+        self.threads.add(threading.get_ident())
+        return super().read(size)
+
+
+class _CountingCodec:
+    """Кодек, считающий вызовы loads"""
+
+    def __init__(self):
+        self.loads_calls = 0
+
+    def dumps(self, value):
+        return json.dumps(value).encode()
+
+    def loads(self, raw):
+        self.loads_calls += 1
+        return json.loads(raw)
+
+
+async def test_httpx_response_uses_client_codec(package, client):
+    codec = _CountingCodec()
+    client.initialize(API_URL, json_codec=codec)
+
+    def handler(request):
+        # Нестандартный content-type разбирается через response.json()
+        return httpx.Response(200, headers={"content-type": "application/vnd.item"}, content=b'{"id": 1}')
+
+    client.set_transport(package.transport.HttpxTransport(transport=httpx.MockTransport(handler)))
+
+    assert await client.items.get_item(item_id_path=1) == {"id": 1}
+    assert codec.loads_calls == 1
+
+
+async def test_httpx_multipart_upload_is_streamed(package, client):
+    received = {}
+
+    def handler(request):
+        received["headers"] = request.headers
+        received["body"] = request.content
+        return httpx.Response(200, json={"size": len(request.content), "filename": "data.bin"})
+
+    client.set_transport(package.transport.HttpxTransport(transport=httpx.MockTransport(handler)))
+    payload = bytes(range(256)) * 1024
+    upload = _RecordingFile(payload)
+
+    result = await client.files.upload_file(file_file=upload, note_file="n")
+
+    assert result.filename == "data.bin"
+    headers, body = received["headers"], received["body"]
+    # Тело передано потоком: длина заранее не известна
+    assert "content-length" not in headers and headers["transfer-encoding"] == "chunked"
+    boundary = headers["content-type"].split("boundary=", 1)[1]
+    assert body.startswith(f"--{boundary}\r\n".encode()) and body.endswith(f"--{boundary}--\r\n".encode())
+    assert b'name="note"\r\n\r\nn\r\n' in body and payload in body
+    # Файл читается кусками в thread pool, а не в цикле событий
+    assert threading.get_ident() not in upload.threads
+
+
+async def test_asgi_multipart_upload_is_streamed(package, client):
+    messages = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            messages.append(message)
+            if not message.get("more_body"):
+                break
+        body = b"".join(message["body"] for message in messages)
+        messages.append(dict(scope["headers"]))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps({"size": len(body), "filename": "data.bin"}).encode()})
+
+    client.set_transport(package.transport.ASGITransport(app))
+    payload = bytes(range(256)) * 1024
+    upload = _RecordingFile(payload)
+
+    result = await client.files.upload_file(file_file=upload, note_file="n")
+
+    *body_messages, headers = messages
+    # Файл пришел в приложение несколькими сообщениями, а не одним телом
+    assert len(body_messages) > 2 and result.size == sum(len(message["body"]) for message in body_messages)
+    assert b"content-length" not in headers and headers[b"transfer-encoding"] == b"chunked"
+    assert payload in b"".join(message["body"] for message in body_messages)
+    assert threading.get_ident() not in upload.threads
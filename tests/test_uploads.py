@@ -0,0 +1,116 @@
+"""
+Multipart загрузки из bytes, путей, файловых объектов и async итераторов
+через aiohttp сессию клиента
+"""
+
+import io
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from conftest import reset_client
+
+pytestmark = pytest.mark.asyncio
+
+PAYLOAD = bytes(range(256)) * 512
+
+
+async def _chunks(data, size=10000):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return path
+
+
+@pytest_asyncio.fixture
+async def upload_server():
+    received = []
+    failures = []
+
+    async def handler(request):
+        parts = {}
+        async for part in await request.multipart():
+            parts[part.name] = (part.filename, part.headers.get("Content-Type"), await part.read())
+        received.append(parts)
+        if failures:
+            return web.Response(status=failures.pop(0), headers={"Retry-After": "0"})
+        filename, _, content = parts["file"]
+        return web.json_response({"size": len(content), "filename": filename})
+
+    app = web.Application()
+    app.router.add_post("/files", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", received, failures
+    await runner.cleanup()
+
+
+@pytest_asyncio.fixture
+async def upload_client(package, upload_server):
+    api_url, received, failures = upload_server
+    client = reset_client(package.ApiClient())
+    client.initialize(api_url, retry_policy=package.retry.RetryPolicy(max_attempts=2, idempotency_keys=True))
+    yield client, received, failures
+    await client.close()
+    reset_client(client)
+
+
+@pytest.mark.parametrize(
+    "source, filename",
+    [
+        (lambda tmp_path: PAYLOAD, "file.bin"),
+        (lambda tmp_path: memoryview(PAYLOAD), "file.bin"),
+        (lambda tmp_path: _write(tmp_path / "report.csv", PAYLOAD), "report.csv"),
+        (lambda tmp_path: open(_write(tmp_path / "opened.bin", PAYLOAD), "rb"), "opened.bin"),
+        (lambda tmp_path: _chunks(PAYLOAD), "file.bin"),
+    ],
+)
+async def test_upload_sources(upload_client, tmp_path, source, filename):
+    client, received, _ = upload_client
+    value = source(tmp_path)
+
+    result = await client.files.upload_file(file_file=value, note_file="n")
+
+    assert (result.size, result.filename) == (len(PAYLOAD), filename)
+    assert received[-1]["file"][2] == PAYLOAD
+    assert received[-1]["note"][2] == b"n"
+    if hasattr(value, "close"):
+        value.close()
+
+
+async def test_file_upload_name_and_content_type(package, upload_client):
+    client, received, _ = upload_client
+    upload = package.utils.FileUpload(_chunks(PAYLOAD), filename="data.json", content_type="application/json")
+
+    await client.files.upload_file(file_file=upload)
+
+    assert received[-1]["file"] == ("data.json", "application/json", PAYLOAD)
+
+
+async def test_file_object_replayed_from_start_position(upload_client):
+    client, received, failures = upload_client
+    failures.append(503)
+    upload = io.BytesIO(b"skip" + PAYLOAD)
+    upload.seek(4)
+
+    result = await client.files.upload_file(file_file=upload)
+
+    assert result.size == len(PAYLOAD)
+    assert [parts["file"][2] for parts in received] == [PAYLOAD, PAYLOAD]
+
+
+async def test_async_iterator_sent_once(upload_client):
+    client, received, failures = upload_client
+    failures.append(503)
+
+    await client.files.upload_file(file_file=_chunks(PAYLOAD))
+
+    # Итератор уже прочитан: повтор невозможен, возвращается ответ 503
+    assert len(received) == 1
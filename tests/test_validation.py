@@ -0,0 +1,78 @@
+"""
+Режим validation="construct": та же модель, что и при полной валидации
+"""
+
+import copy
+import importlib
+from typing import Dict, List, Optional
+
+import pytest
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+
+pytestmark = pytest.mark.asyncio
+
+
+class Tag(BaseModel):
+    name: str
+    weight: int = 1
+
+
+class Owner(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    user_id: int = Field(alias="userId")
+    email: Optional[str] = Field(default=None, validation_alias=AliasChoices("mail", "email"))
+
+
+class Document(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    id: int
+    title: str = Field(alias="Title")
+    owner: Owner
+    tags: List[Tag] = []
+    related: Dict[str, Optional[Tag]] = {}
+    note: Optional[str] = None
+
+
+DOCUMENTS = [
+    {"id": 1, "Title": "a", "owner": {"userId": 7}},
+    {
+        "id": 2,
+        "Title": "b",
+        "owner": {"userId": 8, "mail": "x@y.z", "role": "admin"},
+        "tags": [{"name": "t"}, {"name": "u", "weight": 3, "color": "red"}],
+        "related": {"first": {"name": "r"}, "missing": None},
+        "revision": 4,
+    },
+    {"id": 3, "title": "by name", "owner": {"userId": 9, "email": "e@f.g"}, "note": None},
+]
+
+
+@pytest.fixture
+def validation(packages):
+    return importlib.import_module(f"{packages['decorator'].__name__}.validation")
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+async def test_construct_equals_full_validation(validation, data):
+    constructed = validation.construct_model(Document, data)
+    validated = Document.model_validate(data)
+
+    assert constructed == validated
+    assert constructed.model_fields_set == validated.model_fields_set
+    assert constructed.model_extra == validated.model_extra
+    assert constructed.owner.model_extra == validated.owner.model_extra
+    assert constructed.model_dump(by_alias=True) == validated.model_dump(by_alias=True)
+
+
+async def test_lazy_model_deepcopy(validation):
+    lazy = validation.build_response(DOCUMENTS[1], Document, "lazy")
+    assert lazy.tags[0].name == "t"
+
+    clone = copy.deepcopy(lazy)
+    clone.tags[0].name = "changed"
+    clone.tags.append(None)
+
+    assert clone is not lazy and clone.tags[0].name == "changed"
+    assert lazy.tags[0].name == "t" and len(lazy.tags) == 2